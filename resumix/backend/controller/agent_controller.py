@@ -20,16 +20,21 @@ def optimize_resume(req: BaseRequest):
     data = req.data
 
     section = data.get("section", None)
+    sections = data.get("sections", None)
     tech_stack = data.get("tech_stack", None)
 
-    section_obj = SectionBase(**section)
+    if (section is None and sections is None) or tech_stack is None:
+        return BaseResponse(code=1)
+
+    # 多个段落一次提交，检索合并为一次批量调用
+    if sections is not None:
+        section_obj = [SectionBase(**item) for item in sections]
+    else:
+        section_obj = SectionBase(**section)
 
     logger.info(section_obj)
     logger.info(type(section_obj))
 
-    if section is None or tech_stack is None:
-        return BaseResponse(code=1)
-
     result = service.optimize_resume(
         section_obj, req.data["tech_stack"], req.data["job_positions"]
     )
@@ -1,16 +1,21 @@
 # dispatcher/prompt_dispatcher.py
 from resumix.backend.prompt.prompt_templates import (
     PROMPT_MAP,
+    PREFIX_FIRST_SCORE_PROMPT_MAP,
     SCORE_PROMPT_MAP,
     TECHSTACK_TAILORING_PROMPT,
     TAILORING_PROMPT,
 )
 from resumix.shared.section.section_base import SectionBase
+from resumix.shared.utils.token_budget import TokenBudget
+from resumix.config.config import Config
 from enum import Enum
-from typing import List
+from typing import List, Optional
 from loguru import logger
 import threading
 
+CONFIG = Config().config
+
 
 class PromptMode(str, Enum):
     DEFAULT = "default"
@@ -40,11 +45,25 @@ class PromptDispatcher:
         self.prompt_templates = PROMPT_MAP
 
     def get_prompt(
-        self, section: SectionBase, mode: PromptMode = PromptMode.DEFAULT
+        self,
+        section: SectionBase,
+        mode: PromptMode = PromptMode.DEFAULT,
+        jd_text: str = "",
     ) -> str:
         """
-        根据 section 名称选取 prompt，并将 raw_text 插入 <CV_TEXT>
+        根据 section 名称选取 prompt，并将 raw_text 插入 <CV_TEXT>；
+        提供 jd_text 时在末尾附上目标岗位描述
         """
+        prompt = self._get_section_prompt(section, mode)
+        if jd_text and jd_text.strip():
+            prompt += (
+                "\n\n## Target Job Description\n"
+                "Tailor the rewrite to the requirements below.\n\n"
+                f"{jd_text.strip()}\n"
+            )
+        return prompt
+
+    def _get_section_prompt(self, section: SectionBase, mode: PromptMode) -> str:
         prompt = self.prompt_templates.get(section.name)
         if not prompt and mode != "tailor":
             raise ValueError(f"No prompt found for section: {section.name}")
@@ -67,26 +86,56 @@ class PromptDispatcher:
         section: SectionBase,
         jd_section_basic: SectionBase,
         jd_section_preferred: SectionBase,
+        layout: Optional[str] = None,
     ) -> str:
         """
         用于评分的 prompt 构造
+
+        layout 为 "prefix_first"（默认取 prompt.score_layout）时 JD 与说明在前、
+        段落在最后，且 JD 压缩与段落无关，同一 JD 的所有评分 prompt 共享完全相同的前缀
         """
-        prompt = SCORE_PROMPT_MAP[section.name]
+        layout = layout or CONFIG.PROMPT.SCORE_LAYOUT
+        prefix_first = layout == "prefix_first"
+        if prefix_first:
+            prompt = PREFIX_FIRST_SCORE_PROMPT_MAP[section.name]
+        else:
+            prompt = SCORE_PROMPT_MAP[section.name]
         placeholder = "<CV_TEXT>"
         jd_basic_placeholder = "<JD_BASIC_TEXT>"
         jd_preferred_placeholder = "<JD_PREFERRED_TEXT>"
 
-        # 替换 CV 和 JD 的占位符
-        prompt = prompt.replace(placeholder, section.raw_text.strip())
+        # JD 超出预算时抽取压缩：legacy 布局保留与该段落最相关的句子，
+        # prefix_first 布局按与整个 JD 的相关度压缩，保证前缀不随段落变化
+        query = "" if prefix_first else section.raw_text
+        label = "score/prefix" if prefix_first else f"score/{section.name}"
 
-        prompt = prompt.replace(jd_basic_placeholder, jd_section_basic.raw_text.strip())
+        jd_basic = self._fit_budget(
+            jd_section_basic.raw_text,
+            query,
+            CONFIG.PROMPT_BUDGET.JD_TOKENS,
+            f"{label}/basic",
+        )
+        prompt = prompt.replace(jd_basic_placeholder, jd_basic)
 
         if jd_section_preferred:
-            prompt = prompt.replace(
-                jd_preferred_placeholder, jd_section_preferred.raw_text.strip()
+            jd_preferred = self._fit_budget(
+                jd_section_preferred.raw_text,
+                query,
+                CONFIG.PROMPT_BUDGET.JD_PREFERRED_TOKENS,
+                f"{label}/preferred",
             )
+            prompt = prompt.replace(jd_preferred_placeholder, jd_preferred)
 
-        return prompt
+        # 段落文本最后替换，避免其内容被当作 JD 占位符处理
+        return prompt.replace(placeholder, section.raw_text.strip())
+
+    def _fit_budget(self, text: str, query: str, budget: int, label: str) -> str:
+        result = TokenBudget.get_instance().compress(text, query, budget)
+        if result.saved > 0:
+            logger.info(
+                f"[TokenBudget] {label}: {result.original_tokens} → {result.tokens} tokens (节省 {result.saved})"
+            )
+        return result.text
 
     def get_tailoring_prompt(self, full_cv: str) -> str:
         """
@@ -118,6 +167,12 @@ class PromptDispatcher:
         job_positions: List[str],
         retrieved_context: str,
     ) -> str:
+        retrieved_context = self._fit_budget(
+            retrieved_context,
+            section.raw_text,
+            CONFIG.PROMPT_BUDGET.CONTEXT_TOKENS,
+            f"rag/{section.name}/context",
+        )
         prompt = f"""
 You are a professional resume rewriting assistant with deep understanding of technical hiring expectations.
 
@@ -258,6 +258,54 @@ interface ScoreResult {
 }
 """
 
+# 静态前缀在前：说明、JD 与输出格式对同一 JD 的所有段落完全一致，
+# 段落文本放在最后，便于服务端前缀缓存（DeepSeek context caching、Ollama KV 复用）
+PREFIX_FIRST_SCORE_PROMPT = """
+You are a professional HR analyst.
+Please evaluate a **resume section**, given at the end of this message, based on the provided **job description** and rate it from 0 to 10 across six key criteria.
+
+## Job Description
+
+**Basic Requirements**:
+<JD_BASIC_TEXT>
+
+**Preferred Requirements**:
+<JD_PREFERRED_TEXT>
+
+## Evaluation Instructions:
+
+Score the section on a scale from 0 to 10 for each dimension below.
+Give an integer score and concise explanation.
+If a dimension is not applicable, assign 0 and explain why.
+
+### Evaluation Dimensions:
+- **Completeness**: Does the section provide complete and sufficient information?
+- **Clarity**: Is the writing clear, organized, and easy to follow?
+- **Relevance**: Does the content align with the basic and preferred requirements?
+- **Professional Language**: Does the candidate use appropriate technical and formal language?
+- **Achievement-Oriented**: Are accomplishments and results emphasized?
+- **Quantitative Support**: Are there any numbers, data, or measurable indicators?
+
+At the end, give a concise **comment** summarizing strengths and improvement suggestions.
+
+## Output JSON Format
+
+You must return **only** valid JSON in the following format:
+
+interface ScoreResult {
+  "Completeness": int;
+  "Clarity": int;
+  "Relevance": int;
+  "ProfessionalLanguage": int;
+  "AchievementOriented": int;
+  "QuantitativeSupport": int;
+  "Comment": str;
+}
+
+## Resume Section:
+<CV_TEXT>
+"""
+
 SCORE_PROMPT_MAP = {
     "personal_info": PROJECTS_SCORE_PROMPT,
     "education": PROJECTS_SCORE_PROMPT,
@@ -267,6 +315,15 @@ SCORE_PROMPT_MAP = {
     "awards": PROJECTS_SCORE_PROMPT,
 }
 
+PREFIX_FIRST_SCORE_PROMPT_MAP = {
+    "personal_info": PREFIX_FIRST_SCORE_PROMPT,
+    "education": PREFIX_FIRST_SCORE_PROMPT,
+    "experience": PREFIX_FIRST_SCORE_PROMPT,
+    "projects": PREFIX_FIRST_SCORE_PROMPT,
+    "skills": PREFIX_FIRST_SCORE_PROMPT,
+    "awards": PREFIX_FIRST_SCORE_PROMPT,
+}
+
 
 TECHSTACK_TAILORING_PROMPT = """
 You are a professional resume assistant specializing in tailoring CVs to technical job positions.
@@ -1,5 +1,6 @@
 from pdfminer.high_level import extract_text
 import docx2txt
+from functools import lru_cache
 
 
 def extract_text_from_pdf(file):
@@ -26,33 +27,67 @@ def extract_text_from_upload(file):
         return file.getvalue().decode("utf-8")
 
 
+# Adapted from https://stackoverflow.com/q/16259923
+LATEX_SPECIAL_CHARS = {
+    "&": r"\&",
+    "%": r"\%",
+    "$": r"\$",
+    "#": r"\#",
+    "_": r"\_",
+    "{": r"\{",
+    "}": r"\}",
+    "~": r"\textasciitilde{}",
+    "^": r"\^{}",
+    "\\": r"\textbackslash{}",
+    "\n": "\\newline%\n",
+    "-": r"{-}",
+    "\xA0": "~",  # Non-breaking space
+    "[": r"{[}",
+    "]": r"{]}",
+}
+
+_LATEX_TRANSLATION = str.maketrans(LATEX_SPECIAL_CHARS)
+
+
+@lru_cache(maxsize=8192)
+def escape_latex_string(text):
+    # 简历中大量重复的字符串（日期、地点、技能名）只转义一次
+    return text.translate(_LATEX_TRANSLATION)
+
+
 def escape_for_latex(data):
-    if isinstance(data, dict):
-        new_data = {}
-        for key in data.keys():
-            new_data[key] = escape_for_latex(data[key])
-        return new_data
-    elif isinstance(data, list):
-        return [escape_for_latex(item) for item in data]
-    elif isinstance(data, str):
-        # Adapted from https://stackoverflow.com/q/16259923
-        latex_special_chars = {
-            "&": r"\&",
-            "%": r"\%",
-            "$": r"\$",
-            "#": r"\#",
-            "_": r"\_",
-            "{": r"\{",
-            "}": r"\}",
-            "~": r"\textasciitilde{}",
-            "^": r"\^{}",
-            "\\": r"\textbackslash{}",
-            "\n": "\\newline%\n",
-            "-": r"{-}",
-            "\xA0": "~",  # Non-breaking space
-            "[": r"{[}",
-            "]": r"{]}",
-        }
-        return "".join([latex_special_chars.get(c, c) for c in data])
-
-    return data
\ No newline at end of file
+    """
+    Escape every string in a JSON resume for LaTeX.
+
+    The structure is walked once with an explicit stack instead of recursion,
+    and dicts/lists are copied so the input is left untouched.
+    """
+    if isinstance(data, str):
+        return escape_latex_string(data)
+    if not isinstance(data, (dict, list)):
+        return data
+
+    root = {} if isinstance(data, dict) else []
+    stack = [(data, root)]
+    while stack:
+        source, target = stack.pop()
+        if isinstance(source, dict):
+            for key, value in source.items():
+                target[key] = _escape_node(value, stack)
+        else:
+            for value in source:
+                target.append(_escape_node(value, stack))
+    return root
+
+
+def _escape_node(value, stack):
+    if isinstance(value, str):
+        return escape_latex_string(value)
+    if isinstance(value, dict):
+        copy = {}
+    elif isinstance(value, list):
+        copy = []
+    else:
+        return value
+    stack.append((value, copy))
+    return copy
@@ -0,0 +1,345 @@
+"""
+Cached, parallel LaTeX -> PDF rendering service for resume generation.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+from resumix.config.config import Config
+from resumix.backend.resume_generator.doc_utils import escape_for_latex
+from resumix.backend.resume_generator.resume_generator import (
+    BASE_DIR,
+    TECTONIC_CACHE_DIR,
+    build_tectonic_command,
+    get_final_section_ordering,
+    render_latex,
+    warm_templates,
+)
+
+CONFIG = Config().config
+
+# 模板依赖的 .cls / .sty 文件，每个任务复制到独立目录中
+SUPPORT_FILES = sorted(
+    glob.glob(os.path.join(BASE_DIR, "*.cls"))
+    + glob.glob(os.path.join(BASE_DIR, "*.sty"))
+)
+
+
+def compile_pdf(
+    tex_source: str,
+    template_name: str,
+    output_path: str,
+    only_cached: bool = True,
+    timeout: int = 120,
+    download_fallback: bool = False,
+) -> str:
+    """
+    Compile LaTeX source with tectonic inside an isolated temporary directory.
+
+    Args:
+        tex_source: Rendered LaTeX document
+        template_name: Template the document was rendered with
+        output_path: Where the resulting PDF is atomically written
+        only_cached: Restrict tectonic to the shared warm cache (no downloads)
+        timeout: Maximum compile time in seconds
+        download_fallback: When an ``only_cached`` compile fails, retry once
+            with downloads into a per-job cache; the shared cache is never written
+
+    Returns:
+        Path of the written PDF
+    """
+    env = os.environ.copy()
+    env["TECTONIC_CACHE"] = TECTONIC_CACHE_DIR
+
+    with tempfile.TemporaryDirectory(prefix=f"resumix-{template_name}-") as job_dir:
+        for support_file in SUPPORT_FILES:
+            shutil.copy(support_file, job_dir)
+
+        tex_file = f"{template_name}-resume.tex"
+        with open(os.path.join(job_dir, tex_file), "w", encoding="utf-8") as f:
+            f.write(tex_source)
+
+        command = build_tectonic_command(tex_file, outdir=".", only_cached=only_cached)
+        try:
+            subprocess.run(
+                command,
+                cwd=job_dir,
+                env=env,
+                check=True,
+                capture_output=True,
+                timeout=timeout,
+            )
+        except subprocess.CalledProcessError:
+            if not (only_cached and download_fallback):
+                raise
+            # 缓存中缺少宏包时联网补全一次；下载写入任务自己的缓存目录，
+            # 共享的 tectonic_cache 保持只读
+            logger.warning(
+                f"[RenderService] {template_name} 仅缓存编译失败，使用独立缓存联网重试"
+            )
+            retry_env = dict(env, TECTONIC_CACHE=os.path.join(job_dir, "tectonic_cache"))
+            command = build_tectonic_command(tex_file, outdir=".")
+            subprocess.run(
+                command,
+                cwd=job_dir,
+                env=retry_env,
+                check=True,
+                capture_output=True,
+                timeout=timeout,
+            )
+
+        pdf_file = os.path.join(job_dir, f"{template_name}-resume.pdf")
+        tmp_output = f"{output_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.copyfile(pdf_file, tmp_output)
+        os.replace(tmp_output, output_path)
+
+    return output_path
+
+
+def _link_or_copy(source: Path, target: str):
+    tmp_target = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.link(source, tmp_target)
+    except OSError:
+        shutil.copyfile(source, tmp_target)
+    os.replace(tmp_target, target)
+
+
+class RenderService:
+    """
+    Render resumes to PDF with per-job isolation, bounded concurrency and caching.
+
+    Every job compiles in its own temporary directory, so concurrent renders
+    never share a ``.tex`` file. At most ``max_workers`` tectonic processes run
+    at once. PDFs are cached on disk by a hash of (template, escaped JSON
+    resume, section ordering); identical requests that are already in flight
+    share a single compile. On a cache miss only changed section fragments are
+    re-rendered, and the assembled ``.tex`` is hashed so an unchanged document
+    is never compiled twice. The cache keeps at most ``max_cache_files`` PDFs,
+    evicting the least recently used ones.
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls) -> "RenderService":
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        cache_dir: Optional[str] = None,
+        only_cached: Optional[bool] = None,
+        timeout: Optional[int] = None,
+        max_cache_files: Optional[int] = None,
+        download_fallback: Optional[bool] = None,
+    ):
+        """
+        Initialize the RenderService.
+
+        Args:
+            max_workers: Maximum number of concurrent tectonic processes
+            cache_dir: Directory holding cached PDFs
+            only_cached: Compile against the shared tectonic cache only
+            timeout: Maximum compile time in seconds
+            max_cache_files: Maximum number of cached PDFs; least recently
+                used ones are evicted beyond it
+            download_fallback: Retry a failed cache-only compile with downloads
+                into a per-job tectonic cache
+        """
+        settings = CONFIG.RESUME_GENERATOR
+        self.max_workers = max_workers or settings.MAX_WORKERS
+        self.cache_dir = Path(cache_dir or settings.CACHE_DIR)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.only_cached = (
+            settings.ONLY_CACHED if only_cached is None else only_cached
+        )
+        self.timeout = timeout or settings.COMPILE_TIMEOUT
+        self.max_cache_files = max_cache_files or settings.CACHE_MAX_FILES
+        self.download_fallback = (
+            settings.DOWNLOAD_FALLBACK if download_fallback is None else download_fallback
+        )
+        self._prune_lock = threading.Lock()
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="tectonic"
+        )
+        self._in_flight: Dict[str, Future] = {}
+        self._in_flight_lock = threading.Lock()
+
+        warm_templates()
+
+    @staticmethod
+    def cache_key(
+        template_name: str, escaped_json_resume: Dict, section_ordering: List[str]
+    ) -> str:
+        """Hash of everything that determines the rendered PDF."""
+        payload = json.dumps(
+            {
+                "template": template_name,
+                "resume": escaped_json_resume,
+                "ordering": section_ordering,
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def submit(
+        self,
+        template_name: str,
+        json_resume: Dict,
+        prelim_section_ordering: Optional[List[str]] = None,
+    ) -> Future:
+        """
+        Schedule a render and return a future resolving to the PDF path.
+
+        Cached PDFs resolve immediately without touching the worker pool.
+        """
+        escaped_json_resume = escape_for_latex(json_resume)
+        section_ordering = get_final_section_ordering(prelim_section_ordering or [])
+        key = self.cache_key(template_name, escaped_json_resume, section_ordering)
+        pdf_path = self.cache_dir / f"{key}.pdf"
+
+        if self._touch(pdf_path):
+            logger.info(f"[RenderService] 命中 PDF 缓存: {key[:12]}")
+            future = Future()
+            future.set_result(str(pdf_path))
+            return future
+
+        with self._in_flight_lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                logger.info(f"[RenderService] 复用进行中的编译任务: {key[:12]}")
+                return future
+
+            future = self._executor.submit(
+                self._render,
+                template_name,
+                escaped_json_resume,
+                prelim_section_ordering or [],
+                str(pdf_path),
+            )
+            self._in_flight[key] = future
+
+        future.add_done_callback(lambda _: self._forget(key))
+        return future
+
+    def render_pdf(
+        self,
+        template_name: str,
+        json_resume: Dict,
+        prelim_section_ordering: Optional[List[str]] = None,
+    ) -> bytes:
+        """
+        Render a resume and return the PDF bytes (blocking).
+        """
+        pdf_path = self.submit(
+            template_name, json_resume, prelim_section_ordering
+        ).result()
+        with open(pdf_path, "rb") as f:
+            return f.read()
+
+    def export_pdf(
+        self,
+        template_name: str,
+        json_resume: Dict,
+        output_path: str,
+        prelim_section_ordering: Optional[List[str]] = None,
+    ) -> str:
+        """
+        Render a resume (blocking) and atomically write the PDF to ``output_path``.
+        """
+        pdf_path = self.submit(
+            template_name, json_resume, prelim_section_ordering
+        ).result()
+        tmp_output = f"{output_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.copyfile(pdf_path, tmp_output)
+        os.replace(tmp_output, output_path)
+        return output_path
+
+    def clear_cache(self):
+        """Remove every cached PDF."""
+        for pdf_path in self.cache_dir.glob("*.pdf"):
+            pdf_path.unlink(missing_ok=True)
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+    def _render(
+        self,
+        template_name: str,
+        escaped_json_resume: Dict,
+        prelim_section_ordering: List[str],
+        pdf_path: str,
+    ) -> str:
+        # 未改动的 section 直接复用已渲染片段
+        tex_source = render_latex(
+            template_name, escaped_json_resume, prelim_section_ordering
+        )
+
+        # 拼装后的 .tex 未变化时跳过编译
+        tex_key = hashlib.sha256(tex_source.encode("utf-8")).hexdigest()
+        tex_pdf_path = self.cache_dir / f"tex-{tex_key}.pdf"
+        if self._touch(tex_pdf_path):
+            logger.info(f"[RenderService] .tex 未变化，跳过编译: {tex_key[:12]}")
+        else:
+            logger.info(f"[RenderService] 开始编译 {template_name} -> {pdf_path}")
+            compile_pdf(
+                tex_source,
+                template_name,
+                str(tex_pdf_path),
+                only_cached=self.only_cached,
+                timeout=self.timeout,
+                download_fallback=self.download_fallback,
+            )
+
+        _link_or_copy(tex_pdf_path, pdf_path)
+        self._prune_cache()
+        return pdf_path
+
+    @staticmethod
+    def _touch(pdf_path: Path) -> bool:
+        # 命中时刷新 mtime，淘汰按最近使用顺序进行
+        try:
+            os.utime(pdf_path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def _prune_cache(self):
+        """Evict the least recently used PDFs beyond ``max_cache_files``."""
+        with self._prune_lock:
+            entries = []
+            for pdf_path in self.cache_dir.glob("*.pdf"):
+                try:
+                    entries.append((pdf_path.stat().st_mtime, pdf_path))
+                except FileNotFoundError:
+                    continue
+            excess = len(entries) - self.max_cache_files
+            if excess <= 0:
+                return
+            entries.sort()
+            for _, pdf_path in entries[:excess]:
+                pdf_path.unlink(missing_ok=True)
+            logger.info(f"[RenderService] PDF 缓存超出上限，淘汰 {excess} 个文件")
+
+    def _forget(self, key: str):
+        with self._in_flight_lock:
+            self._in_flight.pop(key, None)
@@ -1,5 +1,9 @@
 import jinja2
 import os
+import threading
+import hashlib
+import json
+from collections import OrderedDict
 
 # This is a hack to import from doc_utils
 import sys
@@ -7,34 +11,63 @@ import time
 
 sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 from resumix.backend.resume_generator.doc_utils import escape_for_latex
+from resumix.config.config import Config
 
-BASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resume")
+CONFIG = Config().config
 
-os.chdir(BASE_DIR)
+BASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resume")
 
 TEMPLATE_NAME = "Plush"
 
-ENV = os.environ.copy()
-ENV["TECTONIC_CACHE"] = os.path.join(os.path.dirname(__file__), "tectonic_cache")
+TEMPLATE_NAMES = ["Simple", "Awesome", "BGJC", "Deedy", "Modern", "Plush", "Alta"]
+
+TECTONIC_CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "tectonic_cache"
+)
+
+TEMPLATE_DIR = os.path.dirname(os.path.realpath(__file__))
+TEMPLATE_PARTS = [
+    "resume",
+    "basics",
+    "education",
+    "work",
+    "skills",
+    "projects",
+    "awards",
+]
+TEMPLATE_EXTENSION = "tex.jinja"
+
+# 字节码缓存属于运行时数据，放在包目录之外
+JINJA_CACHE_DIR = CONFIG.RESUME_GENERATOR.JINJA_CACHE_DIR
+
+# 全局共享的 Jinja 环境：模板只编译一次，字节码缓存到磁盘供其他进程复用
+# 首次使用时才创建（连同缓存目录），导入本模块不写磁盘
+_LATEX_JINJA_ENV = None
+_LATEX_JINJA_ENV_LOCK = threading.Lock()
 
+_TEMPLATE_SETS = {}
+_TEMPLATE_SETS_LOCK = threading.Lock()
 
-# TEX_FILENAME = TEMPLATE_NAME + "-resume-" + time.strftime("%Y-%m-%d-%H-%-M-%S") + ".tex"
-TEX_FILENAME = TEMPLATE_NAME + "-resume.tex"
-TEX_PATH = os.path.join(BASE_DIR, TEX_FILENAME)
+# 已渲染的 section 片段，按内容哈希缓存（LRU）
+FRAGMENT_CACHE_SIZE = 1024
+_FRAGMENT_CACHE = OrderedDict()
+_FRAGMENT_CACHE_LOCK = threading.Lock()
 
-template_commands = {
-    name: lambda tex_file: [
+
+def build_tectonic_command(tex_file, outdir=".", only_cached=False):
+    command = [
         "tectonic",
         tex_file,
         "-Z",
         "continue-on-errors",
         "--untrusted",
-        # "--only-cached",
         "--outdir",
-        ".",
+        outdir,
     ]
-    for name in ["Simple", "Awesome", "BGJC", "Deedy", "Modern", "Plush", "Alta"]
-}
+    if only_cached:
+        command.append("--only-cached")
+    return command
+
 
 # template_commands = {
 #     "Simple": [
@@ -124,72 +157,195 @@ template_commands = {
 # }
 
 
-def generate_latex(template_name, json_resume, prelim_section_ordering):
-    dir_path = os.path.dirname(os.path.realpath(__file__))
-
-    latex_jinja_env = jinja2.Environment(
-        block_start_string=r"\BLOCK{",
-        block_end_string="}",
-        variable_start_string=r"\VAR{",
-        variable_end_string="}",
-        comment_start_string=r"\#{",
-        comment_end_string="}",
-        line_statement_prefix="%-",
-        line_comment_prefix="%#",
-        trim_blocks=True,
-        autoescape=False,
-        loader=jinja2.FileSystemLoader(dir_path),
-    )
+def get_latex_jinja_env():
+    """
+    Return the process-wide LaTeX Jinja environment, building it on first use.
+    """
+    global _LATEX_JINJA_ENV
+    if _LATEX_JINJA_ENV is None:
+        with _LATEX_JINJA_ENV_LOCK:
+            if _LATEX_JINJA_ENV is None:
+                os.makedirs(JINJA_CACHE_DIR, exist_ok=True)
+                _LATEX_JINJA_ENV = jinja2.Environment(
+                    block_start_string=r"\BLOCK{",
+                    block_end_string="}",
+                    variable_start_string=r"\VAR{",
+                    variable_end_string="}",
+                    comment_start_string=r"\#{",
+                    comment_end_string="}",
+                    line_statement_prefix="%-",
+                    line_comment_prefix="%#",
+                    trim_blocks=True,
+                    autoescape=False,
+                    loader=jinja2.FileSystemLoader(TEMPLATE_DIR),
+                    bytecode_cache=jinja2.FileSystemBytecodeCache(JINJA_CACHE_DIR),
+                    auto_reload=False,
+                )
+    return _LATEX_JINJA_ENV
+
+
+def __getattr__(name):
+    # 兼容旧的模块属性访问方式
+    if name == "LATEX_JINJA_ENV":
+        return get_latex_jinja_env()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
+def generate_latex(template_name, json_resume, prelim_section_ordering):
     escaped_json_resume = escape_for_latex(json_resume)
 
+    return render_latex(template_name, escaped_json_resume, prelim_section_ordering)
+
+
+def render_latex(template_name, escaped_json_resume, prelim_section_ordering):
+    """
+    Render an already escaped JSON resume (see ``escape_for_latex``) to LaTeX.
+    """
     return use_template(
-        template_name, latex_jinja_env, escaped_json_resume, prelim_section_ordering
+        template_name,
+        get_latex_jinja_env(),
+        escaped_json_resume,
+        prelim_section_ordering,
     )
 
 
+def get_template_set(template_name, jinja_env=None):
+    """
+    Return the compiled templates of a theme, keyed by part name.
+
+    Templates from the shared environment (the default) are compiled once per
+    process.
+    """
+    if jinja_env is not None and jinja_env is not _LATEX_JINJA_ENV:
+        return _load_template_set(template_name, jinja_env)
+    jinja_env = get_latex_jinja_env()
+
+    template_set = _TEMPLATE_SETS.get(template_name)
+    if template_set is None:
+        with _TEMPLATE_SETS_LOCK:
+            template_set = _TEMPLATE_SETS.get(template_name)
+            if template_set is None:
+                template_set = _load_template_set(template_name, jinja_env)
+                _TEMPLATE_SETS[template_name] = template_set
+    return template_set
+
+
+def _load_template_set(template_name, jinja_env):
+    return {
+        part: jinja_env.get_template(f"{template_name}/{part}.{TEMPLATE_EXTENSION}")
+        for part in TEMPLATE_PARTS
+    }
+
+
+def warm_templates(template_names=None):
+    """
+    Pre-compile the templates of every theme so the first render is not paying for it.
+    """
+    for template_name in template_names or TEMPLATE_NAMES:
+        get_template_set(template_name)
+
+
+def render_batch(json_resumes, template_names=None, prelim_section_ordering=None):
+    """
+    Render many resumes against many templates in one call.
+
+    Each resume is escaped once and reused for every template.
+
+    Returns:
+        List with one ``{template_name: latex}`` dict per input resume
+    """
+    template_names = template_names or TEMPLATE_NAMES
+    prelim_section_ordering = prelim_section_ordering or []
+    warm_templates(template_names)
+
+    results = []
+    for json_resume in json_resumes:
+        escaped_json_resume = escape_for_latex(json_resume)
+        results.append(
+            {
+                template_name: render_latex(
+                    template_name, escaped_json_resume, prelim_section_ordering
+                )
+                for template_name in template_names
+            }
+        )
+    return results
+
+
 def use_template(template_name, jinja_env, json_resume, prelim_section_ordering):
-    PREFIX = f"{template_name}"
-    EXTENSION = "tex.jinja"
+    templates = get_template_set(template_name, jinja_env)
 
-    resume_template = jinja_env.get_template(f"{PREFIX}/resume.{EXTENSION}")
-    basics_template = jinja_env.get_template(f"{PREFIX}/basics.{EXTENSION}")
-    education_template = jinja_env.get_template(f"{PREFIX}/education.{EXTENSION}")
-    work_template = jinja_env.get_template(f"{PREFIX}/work.{EXTENSION}")
-    skills_template = jinja_env.get_template(f"{PREFIX}/skills.{EXTENSION}")
-    projects_template = jinja_env.get_template(f"{PREFIX}/projects.{EXTENSION}")
-    awards_template = jinja_env.get_template(f"{PREFIX}/awards.{EXTENSION}")
+    resume_template = templates["resume"]
+    basics_template = templates["basics"]
+    education_template = templates["education"]
+    work_template = templates["work"]
+    skills_template = templates["skills"]
+    projects_template = templates["projects"]
+    awards_template = templates["awards"]
 
     sections = {}
     section_ordering = get_final_section_ordering(prelim_section_ordering)
 
+    use_cache = jinja_env is _LATEX_JINJA_ENV
+
     if "basics" in json_resume:
         firstName = json_resume["basics"]["name"].split(" ")[0]
         lastName = " ".join(json_resume["basics"]["name"].split(" ")[1:])
-        sections["basics"] = basics_template.render(
-            firstName=firstName, lastName=lastName, **json_resume["basics"]
+        sections["basics"] = _render_fragment(
+            template_name,
+            "basics",
+            basics_template,
+            use_cache,
+            firstName=firstName,
+            lastName=lastName,
+            **json_resume["basics"],
         )
     if "education" in json_resume and len(json_resume["education"]) > 0:
-        sections["education"] = education_template.render(
-            schools=json_resume["education"], heading="Education"
+        sections["education"] = _render_fragment(
+            template_name,
+            "education",
+            education_template,
+            use_cache,
+            schools=json_resume["education"],
+            heading="Education",
         )
     if "work" in json_resume and len(json_resume["work"]) > 0:
-        sections["work"] = work_template.render(
-            works=json_resume["work"], heading="Work Experience"
+        sections["work"] = _render_fragment(
+            template_name,
+            "work",
+            work_template,
+            use_cache,
+            works=json_resume["work"],
+            heading="Work Experience",
         )
 
     if "skills" in json_resume and len(json_resume["skills"]) > 0:
-        sections["skills"] = skills_template.render(
-            skills=json_resume["skills"], heading="Skills"
+        sections["skills"] = _render_fragment(
+            template_name,
+            "skills",
+            skills_template,
+            use_cache,
+            skills=json_resume["skills"],
+            heading="Skills",
         )
     if "projects" in json_resume and len(json_resume["projects"]) > 0:
-        sections["projects"] = projects_template.render(
-            projects=json_resume["projects"], heading="Projects"
+        sections["projects"] = _render_fragment(
+            template_name,
+            "projects",
+            projects_template,
+            use_cache,
+            projects=json_resume["projects"],
+            heading="Projects",
         )
 
     if "awards" in json_resume and len(json_resume["awards"]) > 0:
-        sections["awards"] = awards_template.render(
-            awards=json_resume["awards"], heading="Awards"
+        sections["awards"] = _render_fragment(
+            template_name,
+            "awards",
+            awards_template,
+            use_cache,
+            awards=json_resume["awards"],
+            heading="Awards",
         )
 
     resume = resume_template.render(
@@ -198,6 +354,33 @@ def use_template(template_name, jinja_env, json_resume, prelim_section_ordering)
     return resume
 
 
+def _render_fragment(template_name, section, template, use_cache, /, **context):
+    """
+    Render one section, reusing the cached fragment when its content is unchanged.
+    """
+    if not use_cache:
+        return template.render(**context)
+
+    payload = json.dumps(context, sort_keys=True, ensure_ascii=False, default=str)
+    key = hashlib.sha256(
+        f"{template_name}/{section}\0{payload}".encode("utf-8")
+    ).hexdigest()
+
+    with _FRAGMENT_CACHE_LOCK:
+        fragment = _FRAGMENT_CACHE.get(key)
+        if fragment is not None:
+            _FRAGMENT_CACHE.move_to_end(key)
+            return fragment
+
+    fragment = template.render(**context)
+
+    with _FRAGMENT_CACHE_LOCK:
+        _FRAGMENT_CACHE[key] = fragment
+        if len(_FRAGMENT_CACHE) > FRAGMENT_CACHE_SIZE:
+            _FRAGMENT_CACHE.popitem(last=False)
+    return fragment
+
+
 def get_final_section_ordering(section_ordering):
     final_ordering = ["basics"]
     additional_ordering = section_ordering + [
@@ -274,27 +457,17 @@ if __name__ == "__main__":
         ],
     }
 
-    # 调用 Jinja2 渲染生成 LaTeX 内容
-    latex_content = generate_latex(
-        template_name=TEMPLATE_NAME,
-        json_resume=json_resume,
-        prelim_section_ordering=[],  # 可自定义顺序
-    )
-
-    # 将 LaTeX 内容写入 resume.tex
+    # 经 RenderService 渲染编译：每个任务独立目录，不会覆盖固定的 .tex 文件
+    from resumix.backend.resume_generator.render_service import RenderService
 
-    with open(TEX_PATH, "w", encoding="utf-8") as f:
-        f.write(latex_content)
-    print(f"[INFO] LaTeX 源码已写入: {TEX_PATH}")
-
-    # 编译为 PDF
+    service = RenderService.get_instance()
+    output_path = os.path.join(os.getcwd(), f"{TEMPLATE_NAME}-resume.pdf")
     try:
         print(f"[INFO] 开始使用 tectonic 编译 PDF... {TEMPLATE_NAME}")
-        command = template_commands[TEMPLATE_NAME](tex_file=TEX_FILENAME)
-
-        print(ENV)
-        subprocess.run(command, check=True, env=ENV)
-        print("[SUCCESS] PDF 编译完成，输出为 resume.pdf")
+        service.export_pdf(TEMPLATE_NAME, json_resume, output_path)
+        print(f"[SUCCESS] PDF 编译完成，输出为 {output_path}")
     except subprocess.CalledProcessError as e:
         print("[ERROR] PDF 编译失败：")
         print(e)
+    finally:
+        service.shutdown()
@@ -0,0 +1,277 @@
+"""
+BM25 inverted index with tech-keyword category tags for lexical retrieval.
+"""
+
+import json
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from loguru import logger
+
+# 保留 C++ / C# / Node.js / CI/CD 这类技术词的完整形态；中文按单字切分
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[./\-][a-z0-9]+)*(?:\+\+|#)?|[\u4e00-\u9fff]")
+_SPLIT_RE = re.compile(r"[./\-]")
+
+ARRAY_FILES = (
+    "postings_docs",
+    "postings_tf",
+    "offsets",
+    "idf",
+    "doc_norm",
+    "doc_categories",
+)
+
+
+def tokenize(text: str, expand: bool = True) -> List[str]:
+    """
+    Lowercase word tokens that keep tech terms intact.
+
+    Args:
+        text: Input text
+        expand: Also emit the parts of compound tokens ("ci/cd" -> "ci", "cd")
+
+    Returns:
+        List of tokens
+    """
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        tokens.append(token)
+        if expand and _SPLIT_RE.search(token):
+            tokens.extend(part for part in _SPLIT_RE.split(token) if part)
+    return tokens
+
+
+class TechCategories:
+    """
+    Category bitmasks from ``tech_keywords.json`` (category -> keywords).
+    """
+
+    def __init__(self, keywords: Dict[str, Iterable[str]]):
+        if len(keywords) > 32:
+            raise ValueError("At most 32 tech keyword categories are supported")
+        self.names = list(keywords)
+        self._keywords: List[Tuple[int, Tuple[str, ...]]] = []
+        for bit, name in enumerate(self.names):
+            for keyword in keywords[name]:
+                keyword_tokens = tuple(tokenize(keyword, expand=False))
+                if keyword_tokens:
+                    self._keywords.append((1 << bit, keyword_tokens))
+
+    @classmethod
+    def from_json(cls, path: str) -> "TechCategories":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def mask_for_tokens(self, tokens: Set[str]) -> int:
+        """Categories with at least one keyword fully present in ``tokens``."""
+        mask = 0
+        for bit, keyword_tokens in self._keywords:
+            if not mask & bit and all(t in tokens for t in keyword_tokens):
+                mask |= bit
+        return mask
+
+    def names_for_mask(self, mask: int) -> List[str]:
+        return [name for bit, name in enumerate(self.names) if mask & (1 << bit)]
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a CSR inverted index held in numpy arrays.
+
+    Postings for term ``t`` live in ``postings_docs[offsets[t]:offsets[t + 1]]``
+    with matching term frequencies, so a query only touches the postings of
+    its own terms. Saved indexes are plain ``.npy`` files loaded with
+    ``mmap_mode="r"``, which keeps startup and memory flat for large corpora.
+    """
+
+    def __init__(
+        self,
+        vocab: Dict[str, int],
+        arrays: Dict[str, np.ndarray],
+        k1: float = 1.5,
+        b: float = 0.75,
+        category_names: Optional[List[str]] = None,
+    ):
+        self.vocab = vocab
+        self.k1 = k1
+        self.b = b
+        self.category_names = category_names or []
+        self.postings_docs = arrays["postings_docs"]
+        self.postings_tf = arrays["postings_tf"]
+        self.offsets = arrays["offsets"]
+        self.idf = arrays["idf"]
+        self.doc_norm = arrays["doc_norm"]
+        self.doc_categories = arrays["doc_categories"]
+
+    @property
+    def num_docs(self) -> int:
+        return len(self.doc_norm)
+
+    @classmethod
+    def build(
+        cls,
+        texts: Sequence[str],
+        categories: Optional[TechCategories] = None,
+        k1: float = 1.5,
+        b: float = 0.75,
+    ) -> "BM25Index":
+        """
+        Build the index from raw texts.
+
+        Args:
+            texts: Corpus; document ids are positions in this sequence
+            categories: Tech categories tagged on every document
+            k1: BM25 term frequency saturation
+            b: BM25 length normalization
+
+        Returns:
+            BM25Index
+        """
+        vocab: Dict[str, int] = {}
+        term_ids: List[int] = []
+        doc_ids: List[int] = []
+        tfs: List[int] = []
+        doc_lengths = np.zeros(len(texts), dtype=np.float32)
+        doc_categories = np.zeros(len(texts), dtype=np.uint32)
+
+        for doc_id, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            doc_lengths[doc_id] = sum(counts.values())
+            if categories is not None:
+                doc_categories[doc_id] = categories.mask_for_tokens(counts.keys())
+            for token, tf in counts.items():
+                term_ids.append(vocab.setdefault(token, len(vocab)))
+                doc_ids.append(doc_id)
+                tfs.append(tf)
+
+        term_ids = np.asarray(term_ids, dtype=np.int64)
+        order = np.argsort(term_ids, kind="stable")
+        df = np.bincount(term_ids, minlength=len(vocab))
+        offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(df, out=offsets[1:])
+
+        num_docs = max(len(texts), 1)
+        avg_length = float(doc_lengths.mean()) if len(texts) else 0.0
+        idf = np.log1p((num_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+        doc_norm = (
+            k1 * (1 - b + b * doc_lengths / max(avg_length, 1e-9))
+        ).astype(np.float32)
+
+        arrays = {
+            "postings_docs": np.asarray(doc_ids, dtype=np.int32)[order],
+            "postings_tf": np.asarray(tfs, dtype=np.float32)[order],
+            "offsets": offsets,
+            "idf": idf,
+            "doc_norm": doc_norm,
+            "doc_categories": doc_categories,
+        }
+        category_names = categories.names if categories is not None else []
+        return cls(vocab, arrays, k1=k1, b=b, category_names=category_names)
+
+    def search(
+        self,
+        query: str,
+        top_k: int = 10,
+        allowed: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score documents sharing at least one term with the query.
+
+        Args:
+            query: Query text
+            top_k: Number of results
+            allowed: Optional boolean mask over documents
+
+        Returns:
+            (doc_ids, scores) sorted by descending score
+        """
+        doc_chunks, weight_chunks = [], []
+        for token, query_tf in Counter(tokenize(query)).items():
+            term_id = self.vocab.get(token)
+            if term_id is None:
+                continue
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            docs = self.postings_docs[start:end]
+            tf = self.postings_tf[start:end]
+            weights = (
+                query_tf * self.idf[term_id] * tf * (self.k1 + 1)
+                / (tf + self.doc_norm[docs])
+            )
+            doc_chunks.append(docs)
+            weight_chunks.append(weights)
+
+        if not doc_chunks:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        candidates, inverse = np.unique(
+            np.concatenate(doc_chunks), return_inverse=True
+        )
+        scores = np.bincount(
+            inverse, weights=np.concatenate(weight_chunks)
+        ).astype(np.float32)
+
+        if allowed is not None:
+            keep = allowed[candidates]
+            candidates, scores = candidates[keep], scores[keep]
+
+        if len(candidates) > top_k:
+            top = np.argpartition(-scores, top_k - 1)[:top_k]
+            candidates, scores = candidates[top], scores[top]
+        order = np.argsort(-scores, kind="stable")
+        return candidates[order].astype(np.int64), scores[order]
+
+    def category_filter(self, names: Iterable[str]) -> np.ndarray:
+        """Boolean mask of documents tagged with any of the given categories."""
+        mask = 0
+        for name in names:
+            if name not in self.category_names:
+                raise ValueError(f"Unknown tech keyword category: {name}")
+            mask |= 1 << self.category_names.index(name)
+        return (self.doc_categories & np.uint32(mask)) != 0
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        return (Path(path) / "meta.json").exists()
+
+    def save(self, path: str):
+        directory = Path(path)
+        directory.mkdir(parents=True, exist_ok=True)
+        for name in ARRAY_FILES:
+            np.save(directory / f"{name}.npy", np.asarray(getattr(self, name)))
+        with open(directory / "vocab.json", "w", encoding="utf-8") as f:
+            json.dump(self.vocab, f, ensure_ascii=False)
+        # meta.json 最后写入，作为索引完整的标记
+        with open(directory / "meta.json", "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "k1": self.k1,
+                    "b": self.b,
+                    "num_docs": self.num_docs,
+                    "category_names": self.category_names,
+                },
+                f,
+                ensure_ascii=False,
+            )
+        logger.info(f"[BM25Index] 已保存 {self.num_docs} 条文档索引到 {directory}")
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        directory = Path(path)
+        with open(directory / "meta.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(directory / "vocab.json", "r", encoding="utf-8") as f:
+            vocab = json.load(f)
+        arrays = {
+            name: np.load(directory / f"{name}.npy", mmap_mode="r")
+            for name in ARRAY_FILES
+        }
+        return cls(
+            vocab,
+            arrays,
+            k1=meta["k1"],
+            b=meta["b"],
+            category_names=meta["category_names"],
+        )
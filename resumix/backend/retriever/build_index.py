@@ -2,6 +2,8 @@ import json
 import numpy as np
 import faiss
 from resumix.shared.utils.sentence_transformer_utils import SentenceTransformerUtils
+from resumix.backend.retriever.bm25_index import BM25Index, TechCategories
+from resumix.backend.retriever.sharded_index import ShardedIndexBuilder
 from pathlib import Path
 from resumix.config.config import Config
 
@@ -11,6 +13,7 @@ CONFIG = Config().config
 def build_faiss_index(
     data_save_path: str = CONFIG.RAG.DATA_PATH,
     index_save_path: str = CONFIG.RAG.INDEX_PATH,
+    bm25_save_path: str = CONFIG.RAG.BM25_PATH,
 ):
     # 1. 加载语料
 
@@ -71,13 +74,49 @@ def build_faiss_index(
     with open(data_save_path, "w", encoding="utf-8") as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
 
+    # 5. 构建 BM25 倒排索引（与向量索引共用文档下标）
+    bm25 = BM25Index.build(
+        texts, TechCategories.from_json(CONFIG.RAG.TECH_KEYWORDS_PATH)
+    )
+    bm25.save(bm25_save_path)
+
     print(f"✅ FAISS index saved to {index_save_path}")
     print(f"✅ Text data saved to {data_save_path}")
+    print(f"✅ BM25 index saved to {bm25_save_path}")
+
+
+def build_sharded_index(
+    input_path: str,
+    output_dir: str = CONFIG.RAG.SHARD_DIR,
+    shard_size: int = CONFIG.RAG.SHARD_SIZE,
+    batch_size: int = CONFIG.RAG.ENCODE_BATCH_SIZE,
+):
+    """
+    流式读取 JSONL 语料（每行 {"text": ...}），分批编码并写入分片索引。
+    重复执行会从最后一个完成的分片继续；换一个输入文件则追加到已有语料之后。
+    """
+    builder = ShardedIndexBuilder(
+        output_dir=output_dir, shard_size=shard_size, batch_size=batch_size
+    )
+    manifest = builder.build(input_path)
+    total = sum(shard["num_docs"] for shard in manifest["shards"])
+    print(f"✅ {len(manifest['shards'])} shards ({total} texts) saved to {output_dir}")
 
 
 # 用法示例
 if __name__ == "__main__":
+    import argparse
     import os
 
+    parser = argparse.ArgumentParser(description="Build the RAG retrieval index")
+    parser.add_argument("--input", help="JSONL corpus; omit to build the built-in sample")
+    parser.add_argument("--output", default=CONFIG.RAG.SHARD_DIR)
+    parser.add_argument("--shard-size", type=int, default=CONFIG.RAG.SHARD_SIZE)
+    parser.add_argument("--batch-size", type=int, default=CONFIG.RAG.ENCODE_BATCH_SIZE)
+    args = parser.parse_args()
+
     print("当前工作目录是:", os.getcwd())
-    build_faiss_index()
+    if args.input:
+        build_sharded_index(args.input, args.output, args.shard_size, args.batch_size)
+    else:
+        build_faiss_index()
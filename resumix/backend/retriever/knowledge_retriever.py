@@ -1,64 +1,290 @@
-from typing import List
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
 from resumix.shared.utils.sentence_transformer_utils import SentenceTransformerUtils
+from resumix.backend.retriever.bm25_index import BM25Index, TechCategories
+from resumix.backend.retriever.sharded_index import ShardedCorpus
+from resumix.shared.utils.faiss_utils import read_index_mmap
+from loguru import logger
 import faiss
+import hashlib
 import numpy as np
 import json
 import os
+import threading
+import time
 from resumix.config.config import Config
 
 CONFIG = Config().config
 
 
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[int]], k: int = 60
+) -> List[Tuple[int, float]]:
+    """
+    Fuse ranked id lists with RRF: score(d) = sum(1 / (k + rank(d))).
+
+    Args:
+        rankings: Ranked document ids, best first, one list per retriever
+        k: Rank offset damping the weight of top positions
+
+    Returns:
+        (doc_id, fused_score) pairs sorted by descending score
+    """
+    scores: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
 class KnowledgeRetriever:
     def __init__(
         self,
         data_path: str = CONFIG.RAG.DATA_PATH,
         index_path: str = CONFIG.RAG.INDEX_PATH,
-        model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        model_name: str = CONFIG.SENTENCE_TRANSFORMER.USE_MODEL,
+        bm25_path: str = CONFIG.RAG.BM25_PATH,
+        tech_keywords_path: str = CONFIG.RAG.TECH_KEYWORDS_PATH,
+        candidate_k: int = CONFIG.RAG.CANDIDATE_K,
+        rrf_k: int = CONFIG.RAG.RRF_K,
+        shard_dir: str = CONFIG.RAG.SHARD_DIR,
+        query_cache_size: int = CONFIG.RAG.QUERY_CACHE_SIZE,
     ):
         """
         :param index_path: FAISS index 文件路径
         :param data_path: 与 index 对应的原始文本文件（JSON list，每个 entry 有 'text' 字段）
-        :param model_name: 嵌入模型名称
+        :param model_name: 嵌入模型名称，须与构建索引时使用的模型一致
+        :param bm25_path: BM25 倒排索引目录，不存在时在内存中构建
+        :param tech_keywords_path: 技术关键词分类文件，用于按类别过滤
+        :param candidate_k: 向量与 BM25 各自召回的候选数
+        :param rrf_k: RRF 融合的排名平滑常数
+        :param shard_dir: 分片索引目录（build_index.py --input 生成），存在时优先使用并按需加载分片
+        :param query_cache_size: 查询向量缓存条数
         """
-        self.index = faiss.read_index(index_path) if index_path else None
-        self.data = self._load_data(data_path)
+        if ShardedCorpus.exists(shard_dir):
+            self.shards = ShardedCorpus(shard_dir)
+            self.index, self.data, self.bm25 = None, [], None
+            logger.info(
+                f"[KnowledgeRetriever] 使用分片索引: {len(self.shards.shards)} 个分片, {self.shards.num_docs} 条文本"
+            )
+        else:
+            self.shards = None
+            self.index = read_index_mmap(index_path) if index_path else None
+            self.data = self._load_data(data_path)
+            self.tech_categories = TechCategories.from_json(tech_keywords_path)
+            self.bm25 = self._load_bm25(bm25_path)
+        self.model_name = model_name
+        self.candidate_k = candidate_k
+        self.rrf_k = rrf_k
+        self.last_latency: Dict[str, float] = {}
+        self._filter_cache: Dict[Tuple[str, ...], Tuple[np.ndarray, object]] = {}
+        self.query_cache_size = query_cache_size
+        self._query_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._query_lock = threading.Lock()
         self.init()
 
     def init(self):
-        self.model = SentenceTransformerUtils.get_instance()
+        self.model = SentenceTransformerUtils.get_instance(self.model_name)
 
     def _load_data(self, path: str) -> List[dict]:
         with open(path, "r", encoding="utf-8") as f:
             return json.load(f)
 
+    def _load_bm25(self, path: str) -> BM25Index:
+        if path and BM25Index.exists(path):
+            bm25 = BM25Index.load(path)
+            if bm25.num_docs == len(self.data):
+                return bm25
+            logger.warning(
+                f"[KnowledgeRetriever] BM25 索引文档数 {bm25.num_docs} 与语料 {len(self.data)} 不一致，重新构建"
+            )
+        logger.info("[KnowledgeRetriever] 未找到 BM25 索引，在内存中构建")
+        return BM25Index.build(
+            [entry["text"] for entry in self.data], self.tech_categories
+        )
+
     def retrieve(
-        self, section, tech_stacks: List[str], job_positions: List[str], top_k=5
+        self,
+        section,
+        tech_stacks: List[str],
+        job_positions: List[str],
+        top_k=5,
+        categories: Optional[List[str]] = None,
     ) -> List[str]:
         """
         给定简历段落、技术栈、岗位名称，检索相关上下文
         """
+        return self.retrieve_many(
+            [section], tech_stacks, job_positions, top_k, categories
+        )[0]
+
+    def retrieve_many(
+        self,
+        sections: Sequence,
+        tech_stacks: List[str],
+        job_positions: List[str],
+        top_k=5,
+        categories: Optional[List[str]] = None,
+    ) -> List[List[str]]:
+        """
+        批量检索多个简历段落的上下文：所有查询一次编码、一次向量检索。
+
+        :return: 与 sections 顺序一致的上下文列表
+        """
+        return [
+            [self.get_text(doc_id) for doc_id, _ in hits]
+            for hits in self.search_many(
+                sections, tech_stacks, job_positions, top_k, categories
+            )
+        ]
+
+    def get_text(self, doc_id: int) -> str:
+        if self.shards is not None:
+            return self.shards.text(doc_id)
+        return self.data[doc_id]["text"]
+
+    def search(
+        self,
+        section,
+        tech_stacks: List[str],
+        job_positions: List[str],
+        top_k=5,
+        categories: Optional[List[str]] = None,
+    ) -> List[Tuple[int, float]]:
+        """
+        混合检索：向量召回与 BM25 召回分别取 candidate_k 个候选，再用 RRF 融合。
+
+        :param categories: 仅保留命中这些技术类别（tech_keywords.json 中的键）的片段
+        :return: (文档下标, RRF 分数) 列表，各阶段耗时记录在 self.last_latency（毫秒）
+        """
+        return self.search_many(
+            [section], tech_stacks, job_positions, top_k, categories
+        )[0]
+
+    def search_many(
+        self,
+        sections: Sequence,
+        tech_stacks: List[str],
+        job_positions: List[str],
+        top_k=5,
+        categories: Optional[List[str]] = None,
+    ) -> List[List[Tuple[int, float]]]:
+        """
+        search 的批量版本，每个段落返回一组 (文档下标, RRF 分数)。
+        """
+        latency = {}
+        candidate_k = max(top_k, self.candidate_k)
+        allowed, params = self._category_filter(categories)
+        if not sections:
+            return []
+
         # 1. 构造查询语句（可以更复杂）
+        query_texts = [
+            self._query_text(section, tech_stacks, job_positions)
+            for section in sections
+        ]
+
+        # 2. 向量检索：未缓存的查询一次批量编码，所有查询一次检索
+        vector_ids: List[List[int]] = [[] for _ in sections]
+        if self.index is not None or self.shards is not None:
+            start = time.perf_counter()
+            query_embeddings = self._encode_queries(query_texts)  # shape: (n, dim)
+            latency["encode"] = (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            if self.shards is not None:
+                vector_ids = self.shards.search(
+                    query_embeddings, candidate_k, categories
+                )
+            else:
+                distances, indices = self.index.search(
+                    query_embeddings, candidate_k, params=params
+                )
+                vector_ids = [
+                    [int(i) for i in row if 0 <= i < len(self.data)]
+                    for row in indices
+                ]
+            latency["vector"] = (time.perf_counter() - start) * 1000
 
-        query_text = (
+        # 3. BM25 检索：稀有技术词（gRPC、Istio 等）靠字面匹配召回
+        start = time.perf_counter()
+        bm25_ids: List[List[int]] = []
+        for section in sections:
+            lexical_query = " ".join(
+                [section.raw_text, *tech_stacks, *tech_stacks, *job_positions]
+            )
+            if self.shards is not None:
+                bm25_ids.append(
+                    self.shards.search_bm25(lexical_query, candidate_k, categories)
+                )
+            else:
+                ids, _ = self.bm25.search(lexical_query, candidate_k, allowed=allowed)
+                bm25_ids.append(ids.tolist())
+        latency["bm25"] = (time.perf_counter() - start) * 1000
+
+        # 4. RRF 融合
+        start = time.perf_counter()
+        fused = [
+            reciprocal_rank_fusion([vector_row, bm25_row], k=self.rrf_k)[:top_k]
+            for vector_row, bm25_row in zip(vector_ids, bm25_ids)
+        ]
+        latency["fuse"] = (time.perf_counter() - start) * 1000
+
+        self.last_latency = latency
+        logger.info(
+            f"[KnowledgeRetriever] 检索 {len(sections)} 个段落耗时(ms): "
+            + ", ".join(f"{stage}={ms:.2f}" for stage, ms in latency.items())
+        )
+        return fused
+
+    @staticmethod
+    def _query_text(section, tech_stacks: List[str], job_positions: List[str]) -> str:
+        return (
             f"Resume section: {section.raw_text.strip()}\n"
             f"Target job positions: {', '.join(job_positions)}\n"
             f"Relevant technologies: {', '.join(tech_stacks)}\n"
             f"Please retrieve reference resume descriptions or job requirement phrases that match this content."
         )
 
-        query_embedding = self.model.encode(
-            [query_text], normalize_embeddings=True
-        )  # shape: (1, dim)
+    def _encode_queries(self, texts: List[str]) -> np.ndarray:
+        """
+        编码查询语句，按查询文本哈希缓存向量（LRU），缺失的查询合并为一次 encode。
+        """
+        keys = [hashlib.sha1(text.encode("utf-8")).hexdigest() for text in texts]
+        with self._query_lock:
+            cached = {key: self._query_cache.get(key) for key in keys}
 
-        # 2. 检索
-        distances, indices = self.index.search(
-            query_embedding.astype(np.float32), top_k
+        missing = list(
+            dict.fromkeys(key for key in keys if cached[key] is None)
         )
+        if missing:
+            texts_by_key = dict(zip(keys, texts))
+            embeddings = self.model.encode(
+                [texts_by_key[key] for key in missing], normalize_embeddings=True
+            ).astype(np.float32)
+            cached.update(zip(missing, embeddings))
+
+        with self._query_lock:
+            for key in keys:
+                self._query_cache[key] = cached[key]
+                self._query_cache.move_to_end(key)
+            while len(self._query_cache) > self.query_cache_size:
+                self._query_cache.popitem(last=False)
+        return np.stack([cached[key] for key in keys])
+
+    def _category_filter(self, categories: Optional[List[str]]):
+        # 分片模式下由 ShardedCorpus 按分片构建过滤条件
+        if not categories or self.shards is not None:
+            return None, None
 
-        # 3. 返回原始文本
-        results = []
-        for i in indices[0]:
-            if 0 <= i < len(self.data):
-                results.append(self.data[i]["text"])
-        return results
+        key = tuple(sorted(categories))
+        if key not in self._filter_cache:
+            allowed = self.bm25.category_filter(key)
+            selector = faiss.IDSelectorBitmap(
+                np.packbits(allowed, bitorder="little")
+            )
+            self._filter_cache[key] = (
+                allowed,
+                faiss.SearchParameters(sel=selector),
+            )
+        return self._filter_cache[key]
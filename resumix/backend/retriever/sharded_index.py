@@ -0,0 +1,339 @@
+"""
+Sharded FAISS indexes with an mmap-friendly text store for large RAG corpora.
+
+Layout of a shard directory::
+
+    manifest.json            shards, embedding dim, consumed input lines
+    shard-00000.faiss        vectors of the shard (IndexFlatIP)
+    shard-00000.blob         UTF-8 texts concatenated
+    shard-00000.offsets.npy  int64 byte offsets into the blob (num_docs + 1)
+    shard-00000.bm25/        BM25 index of the shard (see bm25_index.py)
+
+Global document ids are ``shard.start + local id``.
+"""
+
+import bisect
+import itertools
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import faiss
+import numpy as np
+from loguru import logger
+
+from resumix.backend.retriever.bm25_index import BM25Index, TechCategories
+from resumix.config.config import Config
+from resumix.shared.utils.faiss_utils import read_index_mmap, write_index_atomic
+
+CONFIG = Config().config
+
+MANIFEST = "manifest.json"
+
+
+def shard_name(shard_no: int) -> str:
+    return f"shard-{shard_no:05d}"
+
+
+def _atomic_path(path: Path) -> str:
+    return f"{path}.{os.getpid()}.tmp"
+
+
+class TextStore:
+    """
+    Read-only texts backed by a memory-mapped blob and an offsets array.
+    """
+
+    def __init__(self, blob_path: str, offsets_path: str):
+        self.offsets = np.load(offsets_path, mmap_mode="r")
+        if os.path.getsize(blob_path):
+            self._blob = np.memmap(blob_path, dtype=np.uint8, mode="r")
+        else:
+            self._blob = np.empty(0, dtype=np.uint8)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, doc_id: int) -> str:
+        start, end = self.offsets[doc_id], self.offsets[doc_id + 1]
+        return self._blob[start:end].tobytes().decode("utf-8")
+
+    @staticmethod
+    def write(texts: Sequence[str], blob_path: Path, offsets_path: Path):
+        offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+        tmp_blob = _atomic_path(blob_path)
+        with open(tmp_blob, "wb") as f:
+            for i, text in enumerate(texts):
+                encoded = text.encode("utf-8")
+                f.write(encoded)
+                offsets[i + 1] = offsets[i] + len(encoded)
+
+        tmp_offsets = _atomic_path(offsets_path)
+        with open(tmp_offsets, "wb") as f:
+            np.save(f, offsets)
+        os.replace(tmp_blob, blob_path)
+        os.replace(tmp_offsets, offsets_path)
+
+
+def read_manifest(directory: Path) -> Dict:
+    path = directory / MANIFEST
+    if not path.exists():
+        return {"dim": None, "shards": [], "sources": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_manifest(directory: Path, manifest: Dict):
+    path = directory / MANIFEST
+    tmp_path = _atomic_path(path)
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+class ShardedIndexBuilder:
+    """
+    Stream a JSONL corpus (one ``{"text": ...}`` per line) into shards.
+
+    Only one shard of texts is held in memory at a time and vectors are added
+    batch by batch. A shard is registered in the manifest only after all of
+    its files are written, together with the number of input lines consumed
+    per source file, so an interrupted build resumes after the last complete
+    shard and building from a new file appends to the existing corpus.
+    """
+
+    def __init__(
+        self,
+        output_dir: str = CONFIG.RAG.SHARD_DIR,
+        model=None,
+        shard_size: int = CONFIG.RAG.SHARD_SIZE,
+        batch_size: int = CONFIG.RAG.ENCODE_BATCH_SIZE,
+        tech_keywords_path: str = CONFIG.RAG.TECH_KEYWORDS_PATH,
+    ):
+        """
+        Initialize the ShardedIndexBuilder.
+
+        Args:
+            output_dir: Directory holding the manifest and shard files
+            model: Sentence encoder (default: shared SentenceTransformer)
+            shard_size: Input lines per shard
+            batch_size: Texts encoded per batch
+            tech_keywords_path: Categories tagged in each shard's BM25 index
+        """
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        if model is None:
+            from resumix.shared.utils.sentence_transformer_utils import (
+                SentenceTransformerUtils,
+            )
+
+            model = SentenceTransformerUtils.get_instance()
+        self.model = model
+        self.shard_size = shard_size
+        self.batch_size = batch_size
+        self.categories = TechCategories.from_json(tech_keywords_path)
+
+    def build(self, input_path: str) -> Dict:
+        """
+        Encode every not yet consumed line of ``input_path`` into new shards.
+
+        Returns:
+            The updated manifest
+        """
+        manifest = read_manifest(self.output_dir)
+        source = str(Path(input_path).resolve())
+        consumed = manifest["sources"].get(source, 0)
+        if consumed:
+            logger.info(f"[ShardedIndex] {source} 已处理 {consumed} 行，从断点继续")
+
+        with open(input_path, "r", encoding="utf-8") as f:
+            lines = itertools.islice(f, consumed, None)
+            while True:
+                chunk = list(itertools.islice(lines, self.shard_size))
+                if not chunk:
+                    break
+                texts = [text for text in map(self._parse_line, chunk) if text]
+                if texts:
+                    self._write_shard(manifest, texts)
+                consumed += len(chunk)
+                manifest["sources"][source] = consumed
+                write_manifest(self.output_dir, manifest)
+
+        total = sum(shard["num_docs"] for shard in manifest["shards"])
+        logger.info(
+            f"[ShardedIndex] 完成: {len(manifest['shards'])} 个分片, {total} 条文本"
+        )
+        return manifest
+
+    def _write_shard(self, manifest: Dict, texts: List[str]):
+        name = shard_name(len(manifest["shards"]))
+        index = None
+        for i in range(0, len(texts), self.batch_size):
+            embeddings = self.model.encode(
+                texts[i : i + self.batch_size], normalize_embeddings=True
+            ).astype(np.float32)
+            if index is None:
+                if manifest["dim"] not in (None, embeddings.shape[1]):
+                    raise ValueError(
+                        f"Embedding dim {embeddings.shape[1]} does not match "
+                        f"existing shards ({manifest['dim']})"
+                    )
+                manifest["dim"] = embeddings.shape[1]
+                index = faiss.IndexFlatIP(embeddings.shape[1])
+            index.add(embeddings)
+
+        write_index_atomic(index, self.output_dir / f"{name}.faiss")
+
+        TextStore.write(
+            texts,
+            self.output_dir / f"{name}.blob",
+            self.output_dir / f"{name}.offsets.npy",
+        )
+        BM25Index.build(texts, self.categories).save(
+            str(self.output_dir / f"{name}.bm25")
+        )
+
+        start = sum(shard["num_docs"] for shard in manifest["shards"])
+        manifest["shards"].append(
+            {"name": name, "start": start, "num_docs": len(texts)}
+        )
+        logger.info(f"[ShardedIndex] 写入分片 {name}: {len(texts)} 条")
+
+    @staticmethod
+    def _parse_line(line: str) -> Optional[str]:
+        line = line.strip()
+        if not line:
+            return None
+        try:
+            text = json.loads(line).get("text")
+        except (ValueError, AttributeError):
+            logger.warning(f"[ShardedIndex] 跳过无效行: {line[:80]}")
+            return None
+        return text.strip() if isinstance(text, str) and text.strip() else None
+
+
+@dataclass
+class LoadedShard:
+    index: faiss.Index
+    texts: TextStore
+    bm25: BM25Index
+    filters: Dict[Tuple[str, ...], Tuple[np.ndarray, object]] = field(
+        default_factory=dict
+    )
+
+
+class ShardedCorpus:
+    """
+    Lazily loaded view over a shard directory written by ShardedIndexBuilder.
+
+    Shards are opened on first use; vectors, texts and BM25 postings stay
+    memory mapped, so worker processes share them through the page cache.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        manifest = read_manifest(self.directory)
+        self.dim = manifest["dim"]
+        self.shards = manifest["shards"]
+        self._starts = [shard["start"] for shard in self.shards]
+        self._loaded: Dict[int, LoadedShard] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def exists(directory: str) -> bool:
+        return bool(directory) and (Path(directory) / MANIFEST).exists()
+
+    @property
+    def num_docs(self) -> int:
+        return sum(shard["num_docs"] for shard in self.shards)
+
+    def text(self, doc_id: int) -> str:
+        shard_no = bisect.bisect_right(self._starts, doc_id) - 1
+        return self._shard(shard_no).texts[doc_id - self._starts[shard_no]]
+
+    def search(
+        self,
+        query_embeddings: np.ndarray,
+        top_k: int,
+        categories: Optional[Sequence[str]] = None,
+    ) -> List[List[int]]:
+        """
+        Global ids of the ``top_k`` nearest vectors across all shards.
+
+        Every shard is searched once for the whole ``(n, dim)`` query batch;
+        one ranked id list is returned per query row.
+        """
+        hits: List[List[Tuple[float, int]]] = [[] for _ in range(len(query_embeddings))]
+        for shard_no, start in enumerate(self._starts):
+            shard = self._shard(shard_no)
+            _, params = self._filter(shard, categories)
+            distances, indices = shard.index.search(
+                query_embeddings, min(top_k, shard.index.ntotal), params=params
+            )
+            for row, (row_distances, row_indices) in enumerate(zip(distances, indices)):
+                hits[row].extend(
+                    (float(score), start + int(i))
+                    for score, i in zip(row_distances, row_indices)
+                    if i >= 0
+                )
+        results = []
+        for row_hits in hits:
+            row_hits.sort(key=lambda hit: hit[0], reverse=True)
+            results.append([doc_id for _, doc_id in row_hits[:top_k]])
+        return results
+
+    def search_bm25(
+        self,
+        query: str,
+        top_k: int,
+        categories: Optional[Sequence[str]] = None,
+    ) -> List[int]:
+        """
+        Global ids of the ``top_k`` best BM25 matches across all shards.
+
+        IDF statistics are per shard, which is a close approximation when
+        shards are large and drawn from the same corpus.
+        """
+        hits: List[Tuple[float, int]] = []
+        for shard_no, start in enumerate(self._starts):
+            shard = self._shard(shard_no)
+            allowed, _ = self._filter(shard, categories)
+            doc_ids, scores = shard.bm25.search(query, top_k, allowed=allowed)
+            hits.extend(
+                (float(score), start + int(i)) for i, score in zip(doc_ids, scores)
+            )
+        hits.sort(key=lambda hit: hit[0], reverse=True)
+        return [doc_id for _, doc_id in hits[:top_k]]
+
+    def _filter(self, shard: LoadedShard, categories: Optional[Sequence[str]]):
+        if not categories:
+            return None, None
+
+        key = tuple(sorted(categories))
+        if key not in shard.filters:
+            allowed = shard.bm25.category_filter(key)
+            selector = faiss.IDSelectorBitmap(np.packbits(allowed, bitorder="little"))
+            shard.filters[key] = (allowed, faiss.SearchParameters(sel=selector))
+        return shard.filters[key]
+
+    def _shard(self, shard_no: int) -> LoadedShard:
+        shard = self._loaded.get(shard_no)
+        if shard is not None:
+            return shard
+
+        with self._lock:
+            if shard_no not in self._loaded:
+                name = self.shards[shard_no]["name"]
+                logger.info(f"[ShardedCorpus] 加载分片 {name}")
+                self._loaded[shard_no] = LoadedShard(
+                    index=read_index_mmap(self.directory / f"{name}.faiss"),
+                    texts=TextStore(
+                        str(self.directory / f"{name}.blob"),
+                        str(self.directory / f"{name}.offsets.npy"),
+                    ),
+                    bm25=BM25Index.load(str(self.directory / f"{name}.bm25")),
+                )
+            return self._loaded[shard_no]
@@ -0,0 +1,140 @@
+"""
+Dictionary-mode keyword scoring over a cached candidate embedding matrix.
+
+KeyBERT re-embeds every candidate phrase on each ``extract_keywords`` call.
+A ``CandidateVocabulary`` embeds the phrases once; each document then costs
+one encode, a lookup of the phrases it contains and a small MMR selection
+over rows of the cached matrix.
+"""
+
+import re
+from typing import Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+_WORD = re.compile(r"\w+")
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def mmr(
+    doc_embedding: np.ndarray,
+    candidate_embeddings: np.ndarray,
+    top_n: int,
+    diversity: float = 0.5,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Maximal marginal relevance selection, as KeyBERT's ``use_mmr``.
+
+    Args:
+        doc_embedding: Normalized document vector (dim,)
+        candidate_embeddings: Normalized candidate vectors (c, dim)
+        top_n: Number of candidates to select
+        diversity: 0 ranks by relevance only, 1 by novelty only
+
+    Returns:
+        (selected row indices in selection order, their document similarity)
+    """
+    relevance = candidate_embeddings @ doc_embedding
+    if not len(relevance) or top_n <= 0:
+        return np.empty(0, dtype=np.int64), relevance[:0]
+
+    selected = [int(np.argmax(relevance))]
+    # 与已选候选的最大相似度，每选一个只需更新一列
+    redundancy = candidate_embeddings @ candidate_embeddings[selected[0]]
+    available = np.ones(len(relevance), dtype=bool)
+    available[selected[0]] = False
+    for _ in range(min(top_n, len(relevance)) - 1):
+        scores = (1 - diversity) * relevance - diversity * redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(redundancy, candidate_embeddings @ candidate_embeddings[best], out=redundancy)
+    selected = np.asarray(selected, dtype=np.int64)
+    return selected, relevance[selected]
+
+
+class CandidateVocabulary:
+    """
+    Candidate phrases with their embeddings, computed once.
+    """
+
+    def __init__(self, phrases: Iterable[str], embedder, batch_size: int = 64):
+        """
+        Initialize the CandidateVocabulary.
+
+        Args:
+            phrases: Candidate phrases (lowercased and deduplicated)
+            embedder: Encoder with a SentenceTransformer-compatible ``encode``
+            batch_size: Encoder batch size for the one-off phrase embedding
+        """
+        self.phrases: List[str] = list(self.key(phrases))
+        self.embedder = embedder
+        self.embeddings = (
+            _normalize(embedder.encode(self.phrases, batch_size=batch_size))
+            if self.phrases
+            else np.empty((0, 0), dtype=np.float32)
+        )
+        self._words = [set(_WORD.findall(p)) for p in self.phrases]
+        # 短语两侧不能紧接字母数字，"go" 不会命中 "google"，"c++" 仍可命中
+        self._patterns = [
+            re.compile(rf"(?<!\w){re.escape(p)}(?!\w)") for p in self.phrases
+        ]
+
+    @staticmethod
+    def key(phrases: Iterable[str]) -> Tuple[str, ...]:
+        """Cache key of a phrase list, independent of order and case."""
+        return tuple(sorted({p.strip().lower() for p in phrases if p.strip()}))
+
+    def __len__(self) -> int:
+        return len(self.phrases)
+
+    def matches(self, text: str) -> np.ndarray:
+        """Rows of the phrases occurring in ``text``."""
+        text = text.lower()
+        words = set(_WORD.findall(text))
+        return np.asarray(
+            [
+                row
+                for row, (required, pattern) in enumerate(zip(self._words, self._patterns))
+                if required <= words and pattern.search(text)
+            ],
+            dtype=np.int64,
+        )
+
+    def extract(
+        self, texts: Sequence[str], top_n: int = 10, diversity: float = 0.5
+    ) -> List[List[Tuple[str, float]]]:
+        """
+        Best candidate phrases of every text.
+
+        All texts are encoded in one call; each text's phrases are ranked by
+        MMR against its embedding over the cached phrase matrix.
+
+        Returns:
+            Per text, (phrase, similarity) pairs in selection order
+        """
+        if not texts:
+            return []
+        if not self.phrases:
+            return [[] for _ in texts]
+        doc_embeddings = _normalize(self.embedder.encode(list(texts)))
+        results = []
+        for text, doc_embedding in zip(texts, doc_embeddings):
+            rows = self.matches(text)
+            if not len(rows):
+                results.append([])
+                continue
+            selected, scores = mmr(doc_embedding, self.embeddings[rows], top_n, diversity)
+            results.append(
+                [
+                    (self.phrases[rows[i]], round(float(score), 4))
+                    for i, score in zip(selected, scores)
+                ]
+            )
+        return results
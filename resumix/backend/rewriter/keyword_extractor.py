@@ -1,19 +1,37 @@
 from keybert import KeyBERT
-from typing import List, Tuple, Optional
+from keybert.backend import BaseEmbedder
+from collections import OrderedDict
+from typing import Iterable, List, Tuple, Optional
 import re
 import threading
-from sentence_transformers import util
+import numpy as np
+from sentence_transformers import SentenceTransformer, util
 
+from resumix.backend.rewriter.candidate_vocabulary import CandidateVocabulary
 from resumix.shared.utils.sentence_transformer_utils import SentenceTransformerUtils
 from resumix.backend.service.job_embedding_store import JobEmbeddingStore
+from resumix.backend.service.store_registry import StoreRegistry
 from resumix.shared.utils.logger import logger
 
 
+class _EncoderBackend(BaseEmbedder):
+    """KeyBERT 后端：包装非 SentenceTransformer 的编码器（如 OnnxEncoder）。"""
+
+    def __init__(self, encoder):
+        super().__init__()
+        self.encoder = encoder
+
+    def embed(self, documents, verbose: bool = False):
+        return self.encoder.encode(documents, show_progress_bar=verbose)
+
+
 class KeywordExtractor:
     _instance = None
     _lock = threading.Lock()  # 保证线程安全
+    # 最近使用的候选词表（如 tech_keywords.json）及其嵌入矩阵
+    MAX_VOCABULARIES = 8
 
-    def __new__(cls, model_name: str = "all-MiniLM-L6-v2"):
+    def __new__(cls, model_name: Optional[str] = None):
         if cls._instance is None:
             with cls._lock:
                 if cls._instance is None:
@@ -24,10 +42,22 @@ class KeywordExtractor:
     def _init_model(self, model_name: str):
         """
         初始化 KeyBERT 模型。只会在首次创建实例时执行。
+        默认使用与 JobEmbeddingStore 相同的嵌入模型，KeyBERT 直接复用该实例的权重。
         """
-        self.model = KeyBERT(model_name)
         self.embedder = SentenceTransformerUtils.get_instance(model_name)
-        self.job_store = JobEmbeddingStore()
+        backend = (
+            self.embedder
+            if isinstance(self.embedder, SentenceTransformer)
+            else _EncoderBackend(self.embedder)
+        )
+        self.model = KeyBERT(model=backend)
+        self._vocabularies: "OrderedDict[Tuple[str, ...], CandidateVocabulary]" = OrderedDict()
+        self._vocabulary_lock = threading.Lock()
+
+    @property
+    def job_store(self) -> JobEmbeddingStore:
+        # 进程内共享的索引，首次使用时才从磁盘加载
+        return StoreRegistry.job_store()
 
     def extract_keywords(
         self,
@@ -40,36 +70,85 @@ class KeywordExtractor:
         """
         提取关键词。
         :param text: 输入文本。
+        :param candidates: 候选词（如技术词典），其嵌入只计算一次并缓存复用。
         :param top_k: 返回前 top_k 个关键词。
         :param dict_only: 是否只返回技术关键词。
         :param custom_dict: 自定义技术词汇表（用于过滤）。
         :return: List[str] 提取的关键词。
         """
 
-        if candidates:
-            candidates = [c.lower() for c in candidates]
-
-        keywords = self.model.extract_keywords(
-            text.lower(),
+        return self.extract_keywords_batch(
+            [text],
             candidates=candidates,
-            top_n=top_k,
-            use_mmr=True,
-            diversity=0.5,
-            stop_words="english",
-        )
-        keyword_list = [(kw, score) for kw, score in keywords]
+            top_k=top_k,
+            dict_only=dict_only,
+            custom_dict=custom_dict,
+        )[0]
+
+    def extract_keywords_batch(
+        self,
+        texts: List[str],
+        candidates: List[str] = [],
+        top_k: int = 10,
+        dict_only: bool = False,
+        custom_dict: List[str] = None,
+    ) -> List[List[Tuple[str, float]]]:
+        """
+        批量提取关键词，参数同 extract_keywords。
+        给定候选词时使用缓存的候选词嵌入矩阵：所有文本一次编码，候选词不再重复编码。
+        :return: 每个文本的 (关键词, 分数) 列表。
+        """
+        if not texts:
+            return []
+
+        if candidates:
+            vocabulary = self.candidate_vocabulary(candidates)
+            results = vocabulary.extract(
+                [text.lower() for text in texts], top_n=top_k, diversity=0.5
+            )
+        else:
+            keywords = self.model.extract_keywords(
+                [text.lower() for text in texts],
+                top_n=top_k,
+                use_mmr=True,
+                diversity=0.5,
+                stop_words="english",
+            )
+            # KeyBERT 对单个文档返回扁平列表
+            results = [keywords] if len(texts) == 1 else keywords
+            results = [[(kw, score) for kw, score in result] for result in results]
 
         if dict_only and custom_dict:
             custom_set = set(kw.lower() for kw in custom_dict)
-            keyword_list = [
-                (kw, score) for (kw, score) in keyword_list if kw.lower() in custom_set
+            results = [
+                [(kw, score) for (kw, score) in result if kw.lower() in custom_set]
+                for result in results
             ]
 
-        return keyword_list
+        return results
+
+    def candidate_vocabulary(self, candidates: Iterable[str]) -> CandidateVocabulary:
+        """
+        候选词表及其嵌入矩阵，按词集合缓存（与顺序、大小写无关），只在首次使用时编码。
+        """
+        key = CandidateVocabulary.key(candidates)
+        with self._vocabulary_lock:
+            vocabulary = self._vocabularies.get(key)
+            if vocabulary is not None:
+                self._vocabularies.move_to_end(key)
+                return vocabulary
+
+        vocabulary = CandidateVocabulary(key, self.embedder)
+        with self._vocabulary_lock:
+            self._vocabularies[key] = vocabulary
+            while len(self._vocabularies) > self.MAX_VOCABULARIES:
+                self._vocabularies.popitem(last=False)
+        logger.info(f"[KeywordExtractor] 缓存候选词表嵌入: {len(vocabulary)} 个候选词")
+        return vocabulary
 
     def extract_relevant_keywords_fast(self, job_id: str, resume_text: str, top_k: int = 10) -> List[Tuple[str, float]]:
         """
-        Use cached job embeddings instead of recomputing for faster processing.
+        Use the job's cached sentence embeddings instead of re-encoding the JD.
         
         Args:
             job_id: Job identifier in the embedding store
@@ -91,25 +170,20 @@ class KeywordExtractor:
                 return []
         
         try:
-            # Get cached job embedding
-            job_embedding = self.job_store.get_job_embedding(job_id)
-            if job_embedding is None:
-                logger.error(f"Failed to retrieve embedding for job {job_id}")
+            # Get cached, normalized JD sentence embeddings
+            cached = self.job_store.get_job_sentences(job_id)
+            if cached is None:
+                logger.error(f"Failed to retrieve sentence embeddings for job {job_id}")
                 return []
+            jd_sentences, jd_embeddings = cached
             
-            # Get job metadata to extract relevant sentences
-            job_metadata = self.job_store.get_job_metadata(job_id)
-            jd_text = job_metadata['jd_text']
-            
-            # Use cached embeddings for faster processing
-            jd_sentences = [s.strip() for s in jd_text.split("\n") if s.strip()]
-            resume_embedding = self.embedder.encode(resume_text, convert_to_tensor=True)
-            jd_embeddings = self.embedder.encode(jd_sentences, convert_to_tensor=True)
-            
-            cosine_scores = util.cos_sim(resume_embedding, jd_embeddings)[0]
+            # Only the resume is encoded; cosine scores are one matrix-vector product
+            resume_embedding = np.asarray(self.embedder.encode(resume_text), dtype=np.float32)
+            resume_embedding /= max(np.linalg.norm(resume_embedding), 1e-12)
+            cosine_scores = jd_embeddings @ resume_embedding
             
             k = min(top_k, len(jd_sentences))
-            top_indices = cosine_scores.topk(k).indices.tolist()
+            top_indices = np.argsort(-cosine_scores, kind="stable")[:k].tolist()
             
             selected_text = " ".join([jd_sentences[i] for i in top_indices])
             
@@ -1,8 +1,17 @@
-from typing import Dict, List
+import math
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional
 from loguru import logger
 from resumix.backend.prompt.prompt_dispatcher import PromptDispatcher, PromptMode
 from resumix.shared.section.section_base import SectionBase
 from resumix.backend.retriever.knowledge_retriever import KnowledgeRetriever
+from resumix.config.config import Config
+
+CONFIG = Config().config
+
+# 进度回调：(段落名, 段落, 异常)，改写成功时异常为 None
+ProgressCallback = Callable[[str, SectionBase, Optional[Exception]], None]
 
 
 class BaseRewriter:
@@ -12,30 +21,126 @@ class BaseRewriter:
 
 
 class ResumeRewriter(BaseRewriter):
-    def __init__(self, llm):
+    def __init__(
+        self,
+        llm,
+        max_workers: int = CONFIG.REWRITER.MAX_WORKERS,
+        section_timeout: float = CONFIG.REWRITER.SECTION_TIMEOUT,
+    ):
         super().__init__(llm)
+        self.max_workers = max_workers
+        self.section_timeout = section_timeout
+        self.last_errors: Dict[str, Exception] = {}
 
     def rewrite_section(
         self, section: SectionBase, jd_text: str = "", prompt_mode=PromptMode.DEFAULT
     ) -> str:
-        # 获取针对该 section 的 prompt
-        prompt = PromptDispatcher().get_prompt(section, prompt_mode)
-        logger.info(f"Rewriting section '{section.name}' with LLM...")
-
-        # 调用 LLM 接口
-        rewritten_text = self.llm(prompt)
+        rewritten_text = self._generate(section, jd_text, prompt_mode)
 
         # 写入回 section 对象
         section.rewritten_text = rewritten_text.strip()
         return rewritten_text
 
+    def _generate(
+        self, section: SectionBase, jd_text: str = "", prompt_mode=PromptMode.DEFAULT
+    ) -> str:
+        # 获取针对该 section 的 prompt，附带目标 JD
+        prompt = PromptDispatcher().get_prompt(section, prompt_mode, jd_text)
+        logger.info(f"Rewriting section '{section.name}' with LLM...")
+
+        # 调用 LLM 接口，不修改 section
+        return self.llm(prompt)
+
     def rewrite_all(
-        self, sections: Dict[str, SectionBase], jd_text: str = ""
+        self,
+        sections: Dict[str, SectionBase],
+        jd_text: str = "",
+        on_progress: Optional[ProgressCallback] = None,
     ) -> Dict[str, SectionBase]:
-        rewritten = {}
-        for name, section in sections.items():
-            rewritten[name] = self.rewrite_section(section, jd_text)
-        return rewritten
+        """
+        并发改写所有段落，总耗时约为最慢段落的耗时。
+
+        每个段落从开始执行起最多等待 section_timeout 秒；整体最多等待
+        section_timeout × 批次数（段落数 / 并发数，向上取整），超过后仍在排队的
+        段落被取消。失败或超时的段落保留原状（rewritten_text 不变），异常记录在
+        self.last_errors。改写结果只在调用线程中写回，超时后才返回的结果会被丢弃。
+
+        :param on_progress: 每个段落完成（或失败）时在调用线程中回调，便于界面逐段渲染
+        :return: 与 sections 顺序一致的字典
+        """
+        self.last_errors = {}
+        if not sections:
+            return {}
+
+        started: Dict[str, float] = {}
+
+        def run(name: str, section: SectionBase) -> str:
+            started[name] = time.monotonic()
+            return self._generate(section, jd_text)
+
+        workers = max(1, min(self.max_workers, len(sections)))
+        executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="rewrite"
+        )
+        # 卡住的调用会一直占用线程，排队的段落需要整体截止时间兜底
+        deadline = time.monotonic() + self.section_timeout * math.ceil(
+            len(sections) / workers
+        )
+        pending = {
+            executor.submit(run, name, section): name
+            for name, section in sections.items()
+        }
+        try:
+            while pending:
+                done, _ = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = pending.pop(future)
+                    error = future.exception()
+                    if error is not None:
+                        logger.error(f"Failed to rewrite section '{name}': {error}")
+                        self.last_errors[name] = error
+                    else:
+                        sections[name].rewritten_text = future.result().strip()
+                    self._notify(on_progress, name, sections[name], error)
+
+                now = time.monotonic()
+                for future, name in list(pending.items()):
+                    if now > deadline:
+                        # 整体超时：取消仍在排队的段落，放弃运行中的段落
+                        pending.pop(future)
+                        future.cancel()
+                        error = TimeoutError(
+                            f"Rewriting section '{name}' did not finish before the overall deadline"
+                        )
+                    elif name in started and now - started[name] > self.section_timeout:
+                        # 线程无法强制终止，放弃等待其结果
+                        pending.pop(future)
+                        error = TimeoutError(
+                            f"Rewriting section '{name}' exceeded {self.section_timeout}s"
+                        )
+                    else:
+                        continue
+                    logger.error(str(error))
+                    self.last_errors[name] = error
+                    self._notify(on_progress, name, sections[name], error)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return {name: sections[name] for name in sections}
+
+    @staticmethod
+    def _notify(
+        on_progress: Optional[ProgressCallback],
+        name: str,
+        section: SectionBase,
+        error: Optional[Exception],
+    ):
+        if on_progress is None:
+            return
+        try:
+            on_progress(name, section, error)
+        except Exception as e:
+            logger.warning(f"Progress callback failed for section '{name}': {e}")
 
 
 class TechRewriter(BaseRewriter):
@@ -60,17 +165,40 @@ class TechRewriter(BaseRewriter):
         """
         使用 RAG 模式重写简历段落
         """
+        return self.rewrite_sections_rag([section], tech_stacks, job_positions)[0]
+
+    def rewrite_sections_rag(
+        self,
+        sections: List[SectionBase],
+        tech_stacks: List[str],
+        job_positions: List[str],
+    ) -> List[SectionBase]:
+        """
+        使用 RAG 模式重写多个简历段落，所有段落的检索合并为一次编码和一次向量检索
+        """
         logger.info(
-            f"🔍 RAG rewriting section '{section.name}' using tech stacks {tech_stacks} and positions {job_positions}."
+            f"🔍 RAG rewriting {len(sections)} sections using tech stacks {tech_stacks} and positions {job_positions}."
         )
         # 1. 进行知识检索（可支持多轮/多source）
-        retrieved_contexts = self.retriever.retrieve(
-            section=section,
+        retrieved = self.retriever.retrieve_many(
+            sections=sections,
             tech_stacks=tech_stacks,
             job_positions=job_positions,
             top_k=3,  # 可调节
         )
 
+        return [
+            self._rewrite_with_context(section, tech_stacks, job_positions, contexts)
+            for section, contexts in zip(sections, retrieved)
+        ]
+
+    def _rewrite_with_context(
+        self,
+        section: SectionBase,
+        tech_stacks: List[str],
+        job_positions: List[str],
+        retrieved_contexts: List[str],
+    ) -> SectionBase:
         logger.debug(
             f"📚 Retrieved {len(retrieved_contexts)} context items for section '{section.name}'."
         )
@@ -5,6 +5,7 @@ from collections import defaultdict
 from resumix.shared.utils.logger import logger
 from resumix.config.config import Config
 from resumix.shared.utils.sentence_transformer_utils import SentenceTransformerUtils
+from resumix.shared.utils.embedding_batcher import EmbeddingBatcher
 from sentence_transformers import util
 
 
@@ -20,6 +21,8 @@ class BaseParser(ABC):
     ):
         self.section_labels = section_labels
         self.model = SentenceTransformerUtils.get_instance(model_name)
+        # 逐行分类的单条 encode 经批处理器与其他线程的请求合并
+        self.batcher = EmbeddingBatcher.get_instance(model_name)
         self.threshold = threshold
         self.label_embeddings = {
             tag: self.model.encode(labels, convert_to_tensor=True)
@@ -37,7 +40,7 @@ class BaseParser(ABC):
     def vector_classify_line(self, line: str) -> Tuple[Union[str, None], float]:
         if not line.strip():
             return None, 0.0
-        line_vec = self.model.encode(line, convert_to_tensor=True)
+        line_vec = self.batcher.encode(line)
         best_tag = None
         best_score = -1
         for tag, tag_vecs in self.label_embeddings.items():
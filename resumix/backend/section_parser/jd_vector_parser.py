@@ -4,17 +4,18 @@ from pathlib import Path
 from resumix.backend.section_parser.jd_section_labels import JDSectionLabels
 from resumix.backend.section_parser.base_parser import BaseParser
 from resumix.shared.utils.url_fetcher import UrlFetcher
+from resumix.shared.utils.http_fetcher import HttpFetcher
+from resumix.shared.utils.html_extractor import HtmlExtractor
 from concurrent.futures import ThreadPoolExecutor
 from resumix.shared.utils.llm_client import LLMClient
 from resumix.shared.section.section_base import SectionBase
 from resumix.backend.service.job_embedding_store import JobEmbeddingStore
+from resumix.backend.service.store_registry import StoreRegistry
 import os
 import sys
 import re
 import requests
-import chardet
 import traceback
-from bs4 import BeautifulSoup
 import json
 import hashlib
 
@@ -22,13 +23,20 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".
 
 
 class JDVectorParser(BaseParser):
+    # LLM 与向量解析均失败时返回的占位段落
+    UNPARSED_TEXT = "❌ 无法解析 JD 内容。"
+
     def __init__(
         self, model_name="paraphrase-multilingual-MiniLM-L12-v2", threshold=0.65
     ):
         section_labels = JDSectionLabels.get_labels(["zh", "en"])
         super().__init__(section_labels, model_name, threshold)
         self.llm_client = LLMClient()
-        self.job_store = JobEmbeddingStore()
+
+    @property
+    def job_store(self) -> JobEmbeddingStore:
+        # 进程内共享的索引，首次使用时才从磁盘加载
+        return StoreRegistry.job_store()
 
     def parse(self, jd_text: str) -> Dict[str, SectionBase]:
         """
@@ -114,7 +122,16 @@ class JDVectorParser(BaseParser):
             import traceback
             logger.error(f"[JDVectorParser] fallback 向量解析也失败: {e}")
             logger.debug(traceback.format_exc())
-            return {"overview": SectionBase(name="overview", raw_text="❌ 无法解析 JD 内容。")}
+            return {"overview": SectionBase(name="overview", raw_text=self.UNPARSED_TEXT)}
+
+    @classmethod
+    def is_unparsed(cls, sections: Dict[str, SectionBase]) -> bool:
+        """
+        Whether ``parse`` fell through to its placeholder (or found no sections).
+        """
+        return not sections or any(
+            section.raw_text == cls.UNPARSED_TEXT for section in sections.values()
+        )
 
     def parse_and_store(self, jd_text: str, job_id: str = None) -> Dict[str, SectionBase]:
         """
@@ -131,19 +148,19 @@ class JDVectorParser(BaseParser):
         sections = self.parse(jd_text)
         
         # Store embeddings if job_id provided
-        if job_id:
+        if job_id and self.is_unparsed(sections):
+            logger.warning(f"JD parsing failed, not storing job {job_id}")
+        elif job_id:
             try:
                 # Convert sections to a format suitable for storage
-                structured_data = {}
-                for section_name, section_obj in sections.items():
-                    structured_data[section_name] = {
-                        'raw_text': section_obj.raw_text,
-                        'parsed_data': getattr(section_obj, 'parsed_data', {})
-                    }
+                structured_data = self.to_structured_data(sections)
                 
-                success = self.job_store.add_job_description(job_id, jd_text, structured_data)
+                # 编码在锁外进行，只有写入与保存会短暂持有索引锁
+                job_store = self.job_store
+                success = job_store.add_job_description(job_id, jd_text, structured_data)
+                if success:
+                    job_store.save_index()
                 if success:
-                    self.job_store.save_index()
                     logger.info(f"Successfully stored job {job_id} in embedding store")
                 else:
                     logger.warning(f"Failed to store job {job_id} in embedding store")
@@ -152,6 +169,25 @@ class JDVectorParser(BaseParser):
         
         return sections
     
+    @staticmethod
+    def to_structured_data(sections: Dict[str, SectionBase]) -> Dict[str, Dict]:
+        """
+        Convert parsed sections to the plain dict stored alongside embeddings.
+        
+        Args:
+            sections: Parsed sections keyed by name
+            
+        Returns:
+            Dict mapping section name to raw text and parsed data
+        """
+        return {
+            section_name: {
+                'raw_text': section_obj.raw_text,
+                'parsed_data': getattr(section_obj, 'parsed_data', {})
+            }
+            for section_name, section_obj in sections.items()
+        }
+    
     def generate_job_id(self, jd_text: str) -> str:
         """
         Generate a unique job ID from job description text.
@@ -169,48 +205,16 @@ class JDVectorParser(BaseParser):
     def fetch_text_from_url(self, url: str) -> str:
         logger.info(f"[JD Fetcher] 开始抓取 URL: {url}")
 
-        headers = {
-            "User-Agent": (
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/115.0.0.0 Safari/537.36"
+        try:
+            response = HttpFetcher.get_instance().fetch(url, timeout=10)
+            logger.info(
+                f"[JD Fetcher] HTTP 状态码: {response.status_code}, 缓存: {response.from_cache}"
             )
-        }
+            logger.info(f"[JD Fetcher] 网页编码: {response.encoding}")
 
-        try:
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            logger.info(f"[JD Fetcher] HTTP 状态码: {response.status_code}")
-
-            # 自动检测网页编码
-            detected = chardet.detect(response.content)
-            encoding = detected["encoding"] or "utf-8"
-            logger.info(f"[JD Fetcher] 检测到网页编码: {encoding}")
-
-            html = response.content.decode(encoding, errors="replace")
-            soup = BeautifulSoup(html, "html.parser")
-
-            # 清除非正文区域
-            for tag in soup(
-                [
-                    "script",
-                    "style",
-                    "noscript",
-                    "footer",
-                    "header",
-                    "nav",
-                    "form",
-                    "meta",
-                    "aside",
-                ]
-            ):
-                tag.decompose()
-
-            # 提取正文段落
-            tags = soup.find_all(["p", "li", "div", "section"])
-            text_lines = [
-                t.get_text(strip=True) for t in tags if t.get_text(strip=True)
-            ]
+            # 清除非正文区域后按块抽取正文段落（结果按 HTML 哈希缓存）
+            text = HtmlExtractor.get_instance().extract_blocks(response.text)
+            text_lines = text.splitlines() if text else []
             logger.info(f"[JD Fetcher] 抽取文本段落数量: {len(text_lines)}")
 
             if not text_lines:
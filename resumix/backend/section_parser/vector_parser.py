@@ -18,6 +18,7 @@ from resumix.shared.section.skills_section import SkillsSection
 from resumix.shared.section.section_base import SectionBase
 from resumix.shared.utils.timeit import timeit
 from resumix.shared.utils.sentence_transformer_utils import SentenceTransformerUtils
+from resumix.shared.utils.embedding_batcher import EmbeddingBatcher
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
@@ -37,6 +38,8 @@ class VectorParser:
         self, model_name="paraphrase-multilingual-MiniLM-L12-v2", threshold=0.4
     ):
         self.model = SentenceTransformerUtils.get_instance(model_name)
+        # detect_headers 的并行线程通过批处理器合并为少量批次
+        self.batcher = EmbeddingBatcher.get_instance(model_name)
         self.threshold = threshold
         # 这里可以改为持久化设置
         self.LABEL_EMBEDDINGS = {
@@ -55,7 +58,7 @@ class VectorParser:
     def vector_classify_line(self, line: str) -> Tuple[Union[str, None], float]:
         if not line.strip():
             return None, 0.0
-        line_vec = self.model.encode(line, convert_to_tensor=True)
+        line_vec = self.batcher.encode(line)
         best_tag = None
         best_score = -1
         for tag, tag_vecs in self.LABEL_EMBEDDINGS.items():
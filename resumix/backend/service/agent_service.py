@@ -1,6 +1,6 @@
 from resumix.backend.service.base_service import BaseService
 from resumix.shared.section.section_base import SectionBase
-from typing import List
+from typing import List, Union
 from resumix.shared.utils.logger import logger
 from resumix.backend.rewriter.resume_rewriter import TechRewriter
 from resumix.shared.utils.llm_client import LLMClient
@@ -14,6 +14,14 @@ class AgentService(BaseService):
 
 
     def optimize_resume(
-        self, sections: List[SectionBase], tech_stacks: List[str], job_positions: List[str]
-    ) -> str:
-        return self.rewriter.rewrite_section_rag(sections, tech_stacks, job_positions)
+        self,
+        sections: Union[SectionBase, List[SectionBase]],
+        tech_stacks: List[str],
+        job_positions: List[str],
+    ) -> Union[SectionBase, List[SectionBase]]:
+        """
+        RAG 重写简历段落；传入多个段落时合并为一次检索
+        """
+        if isinstance(sections, SectionBase):
+            return self.rewriter.rewrite_section_rag(sections, tech_stacks, job_positions)
+        return self.rewriter.rewrite_sections_rag(sections, tech_stacks, job_positions)
@@ -0,0 +1,225 @@
+"""
+Recall, memory and speed benchmarks of the embedding stores' search options.
+
+Ground truth is exact float32 inner-product search. Every storage type is
+measured without and with exact rescoring (over-fetch + float32 re-rank),
+and the binary sign-code prefilter is compared with the flat path in
+single-query QPS and recall@k.
+
+    python -m resumix.backend.service.benchmark_embeddings
+    python -m resumix.backend.service.benchmark_embeddings --prefilter --num-vectors 200000
+    python -m resumix.backend.service.benchmark_embeddings --index resumix/backend/embeddings/resume_embeddings.faiss
+"""
+
+import argparse
+import time
+from dataclasses import asdict, dataclass
+from typing import List, Optional, Sequence
+
+import faiss
+import numpy as np
+from loguru import logger
+
+from resumix.config.config import Config
+from resumix.shared.utils.faiss_utils import (
+    STORAGE_TYPES,
+    BinaryPrefilter,
+    ExactVectors,
+    bytes_per_vector,
+    new_index,
+    rescore_exact,
+)
+
+CONFIG = Config().config
+
+
+@dataclass
+class StorageResult:
+    storage: str
+    bytes_per_vector: int
+    compression: float
+    recall: float
+    recall_rescored: float
+    search_ms: float
+    rescored_search_ms: float
+
+
+@dataclass
+class PrefilterResult:
+    mode: str
+    num_candidates: int
+    qps: float
+    recall: float
+
+
+def synthetic_embeddings(
+    num_vectors: int, dim: int = 384, num_clusters: int = 50, seed: int = 0
+) -> np.ndarray:
+    """Unit vectors drawn around random centroids, like topic-clustered texts."""
+    rng = np.random.default_rng(seed)
+    centroids = rng.standard_normal((num_clusters, dim)).astype(np.float32)
+    vectors = centroids[rng.integers(num_clusters, size=num_vectors)]
+    vectors = vectors + 0.8 * rng.standard_normal((num_vectors, dim)).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def recall_at_k(truth: np.ndarray, found: Sequence[Sequence[int]]) -> float:
+    """Mean fraction of each query's true top-k ids that were found."""
+    hits = [len(set(t) & set(f)) / len(t) for t, f in zip(truth, found)]
+    return float(np.mean(hits))
+
+
+def benchmark_storage(
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    k: int = 10,
+    storages: Sequence[str] = tuple(STORAGE_TYPES),
+    oversample: int = CONFIG.EMBEDDING_STORE.OVERSAMPLE,
+) -> List[StorageResult]:
+    """
+    Compare storage types against exact float32 search.
+
+    Args:
+        vectors: Normalized database vectors (n, dim)
+        queries: Normalized query vectors (q, dim)
+        k: Results per query
+        storages: Storage types to measure (see faiss_utils.STORAGE_TYPES)
+        oversample: Candidates fetched per result before rescoring
+
+    Returns:
+        One StorageResult per storage type
+    """
+    dim = vectors.shape[1]
+    truth_index = faiss.IndexFlatIP(dim)
+    truth_index.add(vectors)
+    _, truth = truth_index.search(queries, k)
+    flat_bytes = bytes_per_vector(truth_index)
+
+    exact = ExactVectors("<in-memory>", dim)
+    exact.append(vectors)
+
+    results = []
+    for storage in storages:
+        index = new_index(dim, storage)
+        index.add(vectors)
+
+        start = time.perf_counter()
+        _, found = index.search(queries, k)
+        search_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+        start = time.perf_counter()
+        _, candidates = index.search(queries, min(k * oversample, index.ntotal))
+        rescored = [
+            rescore_exact(query, row, exact, k)[1]
+            for query, row in zip(queries, candidates)
+        ]
+        rescored_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+        code_size = bytes_per_vector(index)
+        results.append(
+            StorageResult(
+                storage=storage,
+                bytes_per_vector=code_size,
+                compression=flat_bytes / code_size,
+                recall=recall_at_k(truth, found),
+                recall_rescored=recall_at_k(truth, rescored),
+                search_ms=search_ms,
+                rescored_search_ms=rescored_ms,
+            )
+        )
+    return results
+
+
+def benchmark_prefilter(
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    k: int = 10,
+    candidate_counts: Sequence[int] = (500, 2000, 5000),
+    kinds: Sequence[str] = ("flat", "hnsw"),
+) -> List[PrefilterResult]:
+    """
+    Single-query QPS and recall@k of the binary prefilter versus flat search.
+
+    Args:
+        vectors: Normalized database vectors (n, dim)
+        queries: Normalized query vectors (q, dim)
+        k: Results per query
+        candidate_counts: Prefilter sizes to measure
+        kinds: Binary index types (``flat`` Hamming scan, ``hnsw``)
+
+    Returns:
+        The flat baseline followed by one PrefilterResult per kind and size
+    """
+    dim = vectors.shape[1]
+    flat = faiss.IndexFlatIP(dim)
+    flat.add(vectors)
+
+    def timed(search):
+        start = time.perf_counter()
+        found = [search(query[None]) for query in queries]
+        return found, len(queries) / (time.perf_counter() - start)
+
+    truth, flat_qps = timed(lambda query: flat.search(query, k)[1][0])
+    results = [PrefilterResult("flat", len(vectors), flat_qps, 1.0)]
+
+    for kind in kinds:
+        prefilter = BinaryPrefilter(dim, kind=kind)
+        prefilter.add(vectors)
+        for num_candidates in candidate_counts:
+            found, qps = timed(
+                lambda query: prefilter.search(
+                    query, k, num_candidates, lambda ids: vectors[ids]
+                )[1]
+            )
+            results.append(
+                PrefilterResult(f"binary-{kind}", num_candidates, qps, recall_at_k(truth, found))
+            )
+    return results
+
+
+def load_vectors(index_file: str) -> np.ndarray:
+    """All vectors of a saved store index."""
+    index = faiss.read_index(index_file)
+    return index.reconstruct_n(0, index.ntotal)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        description="Recall@k and bytes per vector of flat / fp16 / sq8 storage"
+    )
+    arg_parser.add_argument("--index", help="Store index to take vectors from (default: synthetic)")
+    arg_parser.add_argument("--num-vectors", type=int, default=20000)
+    arg_parser.add_argument("--num-queries", type=int, default=200)
+    arg_parser.add_argument("--k", type=int, default=10)
+    arg_parser.add_argument(
+        "--prefilter", action="store_true", help="Benchmark the binary prefilter instead"
+    )
+    args = arg_parser.parse_args()
+
+    if args.index:
+        vectors = load_vectors(args.index)
+    else:
+        vectors = synthetic_embeddings(args.num_vectors)
+
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.choice(len(vectors), size=min(args.num_queries, len(vectors)), replace=False)]
+    queries = queries + 0.05 * rng.standard_normal(queries.shape).astype(np.float32)
+    faiss.normalize_L2(queries)
+
+    logger.info(f"[Benchmark] {len(vectors)} 个向量, {len(queries)} 个查询, k={args.k}")
+    if args.prefilter:
+        for result in benchmark_prefilter(vectors, queries, k=args.k):
+            logger.info(
+                f"[Benchmark] {result.mode} (候选 {result.num_candidates}): "
+                f"{result.qps:.0f} QPS, recall@{args.k} {result.recall:.4f}"
+            )
+        raise SystemExit(0)
+
+    for result in benchmark_storage(vectors, queries, k=args.k):
+        logger.info(
+            f"[Benchmark] {result.storage}: {result.bytes_per_vector} B/向量 "
+            f"({result.compression:.1f}x), recall@{args.k} {result.recall:.4f}, "
+            f"精排后 {result.recall_rescored:.4f}, "
+            f"{result.search_ms:.2f} / {result.rescored_search_ms:.2f} ms/查询"
+        )
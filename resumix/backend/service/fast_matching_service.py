@@ -2,13 +2,27 @@
 Fast Matching Service using FAISS-based embedding stores for efficient job-resume matching.
 """
 
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Tuple, Any
 import numpy as np
 from loguru import logger
 
+from resumix.config.config import Config
+from resumix.backend.prompt.prompt_templates import SCORE_PROMPT_MAP
 from resumix.backend.service.job_embedding_store import JobEmbeddingStore
 from resumix.backend.service.resume_embedding_store import ResumeEmbeddingStore
+from resumix.backend.service.section_index import section_text
+from resumix.backend.service.store_registry import StoreRegistry
+from resumix.shared.section.section_base import SectionBase
+from resumix.shared.utils.cross_encoder_utils import CrossEncoderUtils
 from resumix.shared.utils.sentence_transformer_utils import SentenceTransformerUtils
+from resumix.shared.utils.embedding_batcher import EmbeddingBatcher
+from resumix.shared.utils.token_budget import split_sentences
+
+CONFIG = Config().config
+
+SEARCH_MODES = ("flat", "binary", "sections")
 
 
 class FastMatchingService:
@@ -20,24 +34,84 @@ class FastMatchingService:
     """
     
     def __init__(self):
-        """Initialize the FastMatchingService with embedding stores."""
-        self.job_store = JobEmbeddingStore()
-        self.resume_store = ResumeEmbeddingStore()
+        """Initialize the FastMatchingService; stores are loaded on first use."""
+        self._job_store: Optional[JobEmbeddingStore] = None
+        self._resume_store: Optional[ResumeEmbeddingStore] = None
+        # Rerank / LLM stages of shortlist_candidates, loaded on first use
+        self._cross_encoder = None
+        self._score_service = None
         self.sentence_transformer = SentenceTransformerUtils.get_instance()
+        # Ad-hoc query texts from concurrent sessions are encoded in shared micro-batches
+        self.batcher = EmbeddingBatcher.get_instance()
         
-        logger.info(f"FastMatchingService initialized with {self.job_store.get_job_count()} jobs and {self.resume_store.get_resume_count()} resumes")
+        logger.info("FastMatchingService initialized")
+    
+    @property
+    def job_store(self) -> JobEmbeddingStore:
+        """Shared job store from the StoreRegistry unless overridden."""
+        if self._job_store is None:
+            self._job_store = StoreRegistry.job_store()
+        return self._job_store
+    
+    @job_store.setter
+    def job_store(self, store: JobEmbeddingStore):
+        self._job_store = store
+    
+    @property
+    def resume_store(self) -> ResumeEmbeddingStore:
+        """Shared resume store from the StoreRegistry unless overridden."""
+        if self._resume_store is None:
+            self._resume_store = StoreRegistry.resume_store()
+        return self._resume_store
+    
+    @resume_store.setter
+    def resume_store(self, store: ResumeEmbeddingStore):
+        self._resume_store = store
+    
+    @property
+    def cross_encoder(self):
+        """Shared CrossEncoder from CrossEncoderUtils unless overridden."""
+        if self._cross_encoder is None:
+            self._cross_encoder = CrossEncoderUtils.get_instance()
+        return self._cross_encoder
+    
+    @cross_encoder.setter
+    def cross_encoder(self, model):
+        self._cross_encoder = model
+    
+    @property
+    def score_service(self):
+        """LLM ScoreService, created on first use unless overridden."""
+        if self._score_service is None:
+            # 延迟导入：LLM 客户端依赖较重，只有走到 LLM 阶段才需要
+            from resumix.backend.service.score_service import ScoreService
+            
+            self._score_service = ScoreService()
+        return self._score_service
     
-    def find_best_candidates(self, job_id: str, k: int = 10) -> List[Dict]:
+    @score_service.setter
+    def score_service(self, service):
+        self._score_service = service
+    
+    def find_best_candidates(
+        self, job_id: str, k: int = 10, search_mode: str = "flat"
+    ) -> List[Dict]:
         """
         Find best resume candidates for a job using cached embeddings.
         
         Args:
             job_id: Job identifier
             k: Number of top candidates to return
+            search_mode: "flat" scans the float index; "binary" prefilters by
+                Hamming distance over sign codes and rescores the candidates,
+                which is much faster on very large resume pools; "sections"
+                matches against per-section chunk vectors of each resume
             
         Returns:
             List of candidate dictionaries with resume details and scores
         """
+        self._check_search_mode(search_mode)
+        
         if job_id not in self.job_store.job_metadata:
             logger.warning(f"Job {job_id} not found in job embedding store")
             return []
@@ -54,7 +128,9 @@ class FastMatchingService:
                 return []
             
             # Find similar resumes
-            similar_resumes = self.resume_store.search_similar_resumes(job_embedding, k=k)
+            similar_resumes = self.resume_store.search_similar_resumes(
+                job_embedding, k=k, mode=search_mode
+            )
             
             # Build candidate list with detailed information
             candidates = []
@@ -80,6 +156,145 @@ class FastMatchingService:
             logger.error(f"Error finding candidates for job {job_id}: {e}")
             return []
     
+    def shortlist_candidates(
+        self,
+        job_id: str,
+        recall_k: Optional[int] = None,
+        rerank_k: Optional[int] = None,
+        llm_k: Optional[int] = None,
+        search_mode: str = "flat",
+    ) -> Dict[str, Any]:
+        """
+        Shortlist candidates for a job with a recall -> rerank -> LLM cascade.
+        
+        Each stage narrows the pool for the next, more expensive one: the
+        embedding store recalls ``recall_k`` resumes, the cross-encoder scores
+        the best ``rerank_k`` of them against the JD in one batched call, and
+        only the final ``llm_k`` are scored section by section by the LLM.
+        
+        Args:
+            job_id: Job identifier
+            recall_k: Resumes recalled by vector search (default: shortlist.recall_k)
+            rerank_k: Recalled resumes reranked by the cross-encoder; 0 keeps
+                the vector order (default: shortlist.rerank_k)
+            llm_k: Reranked resumes scored by the LLM; 0 skips the LLM
+                (default: shortlist.llm_k)
+            search_mode: Recall mode, see find_best_candidates
+            
+        Returns:
+            Dict with 'candidates' (reranked order; the first llm_k carry
+            'llm_scores' per section), 'stages' (name, input/output counts and
+            latency in ms of each stage) and 'llm_calls'
+        """
+        settings = CONFIG.SHORTLIST
+        recall_k = settings.RECALL_K if recall_k is None else recall_k
+        rerank_k = settings.RERANK_K if rerank_k is None else rerank_k
+        llm_k = settings.LLM_K if llm_k is None else llm_k
+        self._check_search_mode(search_mode)
+        
+        result = {'job_id': job_id, 'candidates': [], 'stages': [], 'llm_calls': 0}
+        job_metadata = self.job_store.get_job_metadata(job_id)
+        if job_metadata is None:
+            logger.warning(f"Job {job_id} not found in job embedding store")
+            return result
+        
+        # Stage 1: vector recall
+        started = time.perf_counter()
+        job_embedding = self.job_store.get_job_embedding(job_id)
+        recalled = self.resume_store.search_similar_resumes(
+            job_embedding, k=recall_k, mode=search_mode
+        )
+        candidates = []
+        for resume_id, similarity_score in recalled:
+            resume_metadata = self.resume_store.get_resume_metadata(resume_id)
+            if resume_metadata:
+                candidates.append({
+                    'resume_id': resume_id,
+                    'user_id': resume_metadata.get('user_id'),
+                    'similarity_score': similarity_score,
+                    'sections': resume_metadata.get('sections', {}),
+                    'created_at': resume_metadata.get('created_at'),
+                })
+        self._record_stage(result, "recall", self.resume_store.get_resume_count(), len(candidates), started)
+        
+        # Stage 2: batched cross-encoder rerank of the top rerank_k
+        if rerank_k > 0 and candidates:
+            started = time.perf_counter()
+            reranked = candidates[:rerank_k]
+            jd_text = job_metadata.get('jd_text', '')
+            pairs = [
+                (jd_text, self.resume_store.get_resume_metadata(c['resume_id'])['resume_text'])
+                for c in reranked
+            ]
+            scores = self.cross_encoder.predict(
+                pairs, batch_size=CONFIG.CROSS_ENCODER.BATCH_SIZE, convert_to_numpy=True
+            )
+            for candidate, score in zip(reranked, np.asarray(scores, dtype=np.float32).reshape(-1)):
+                candidate['rerank_score'] = float(score)
+            candidates = sorted(reranked, key=lambda c: c['rerank_score'], reverse=True)
+            self._record_stage(result, "rerank", len(pairs), len(candidates), started)
+        
+        # Stage 3: LLM section scores for the final llm_k
+        if llm_k > 0 and candidates:
+            started = time.perf_counter()
+            finalists = candidates[:llm_k]
+            jd_basic, jd_preferred = self._jd_score_sections(job_metadata)
+            with ThreadPoolExecutor(max_workers=settings.LLM_WORKERS) as pool:
+                scored = list(pool.map(
+                    lambda c: self._llm_section_scores(c['sections'], jd_basic, jd_preferred),
+                    finalists,
+                ))
+            for candidate, llm_scores in zip(finalists, scored):
+                candidate['llm_scores'] = llm_scores
+                result['llm_calls'] += len(llm_scores)
+            self._record_stage(result, "llm", len(finalists), len(finalists), started)
+        
+        result['candidates'] = candidates
+        logger.info(
+            f"Shortlisted {min(llm_k, len(candidates))} of {len(recalled)} candidates "
+            f"for job {job_id}: "
+            + ", ".join(f"{s['stage']} {s['latency_ms']:.1f} ms" for s in result['stages'])
+        )
+        return result
+    
+    @staticmethod
+    def _record_stage(result: Dict, stage: str, inputs: int, outputs: int, started: float):
+        result['stages'].append({
+            'stage': stage,
+            'input': inputs,
+            'output': outputs,
+            'latency_ms': (time.perf_counter() - started) * 1000,
+        })
+    
+    @staticmethod
+    def _jd_score_sections(job_metadata: Dict) -> Tuple[SectionBase, SectionBase]:
+        """Basic / preferred requirement sections of a stored job for the score prompt."""
+        structured = job_metadata.get('structured_data') or {}
+        basic = section_text(structured.get('requirements_basic', {}).get('raw_text'))
+        preferred = section_text(structured.get('requirements_preferred', {}).get('raw_text'))
+        return (
+            SectionBase(name="basic", raw_text=basic or job_metadata.get('jd_text', '')),
+            SectionBase(name="preferred", raw_text=preferred),
+        )
+    
+    def _llm_section_scores(
+        self, sections: Dict, jd_basic: SectionBase, jd_preferred: SectionBase
+    ) -> Dict[str, Dict]:
+        """Score every resume section that has a score prompt."""
+        scores = {}
+        for name, value in (sections or {}).items():
+            text = section_text(value)
+            if name not in SCORE_PROMPT_MAP or not text.strip():
+                continue
+            try:
+                scores[name] = self.score_service.score_resume(
+                    SectionBase(name=name, raw_text=text), jd_basic, jd_preferred
+                )
+            except Exception as e:
+                logger.warning(f"[Shortlist] LLM 评分失败 ({name}): {e}")
+                scores[name] = {"error": str(e)}
+        return scores
+    
     def find_best_jobs(self, resume_id: str, k: int = 10) -> List[Dict]:
         """
         Find best job matches for a resume using cached embeddings.
@@ -228,28 +443,45 @@ class FastMatchingService:
             }
         }
     
-    def find_similar_candidates(self, job_text: str, k: int = 10) -> List[Dict]:
+    def find_similar_candidates(
+        self, job_text: str, k: int = 10, search_mode: str = "flat"
+    ) -> List[Dict]:
         """
         Find similar resume candidates using raw job text (not cached).
         
         Args:
             job_text: Job description text
             k: Number of candidates to return
+            search_mode: "flat" or "binary" match one JD vector against one
+                vector per resume; "sections" embeds every JD sentence and
+                scores resumes by late interaction over their section chunks
             
         Returns:
             List of candidate dictionaries
         """
+        self._check_search_mode(search_mode)
+        
         if self.resume_store.get_resume_count() == 0:
             logger.warning("No resumes in resume embedding store")
             return []
         
         try:
-            # Generate embedding for job text
-            job_embedding = self.sentence_transformer.encode(job_text, convert_to_tensor=False)
-            job_embedding = job_embedding / np.linalg.norm(job_embedding)
-            
-            # Find similar resumes
-            similar_resumes = self.resume_store.search_similar_resumes(job_embedding, k=k)
+            if search_mode == "sections":
+                # One query vector per JD sentence
+                sentences = split_sentences(job_text) or [job_text]
+                job_embeddings = self.batcher.encode(sentences, normalize_embeddings=True)
+                similar_resumes = self.resume_store.search_resumes_by_sections(
+                    job_embeddings, k=k
+                )
+            else:
+                # Generate embedding for job text
+                job_embedding = self.batcher.encode(job_text)
+                job_embedding = job_embedding / np.linalg.norm(job_embedding)
+                
+                # Find similar resumes
+                similar_resumes = self.resume_store.search_similar_resumes(
+                    job_embedding, k=k, mode=search_mode
+                )
             
             # Build candidate list
             candidates = []
@@ -288,7 +520,7 @@ class FastMatchingService:
         
         try:
             # Generate embedding for resume text
-            resume_embedding = self.sentence_transformer.encode(resume_text, convert_to_tensor=False)
+            resume_embedding = self.batcher.encode(resume_text)
             resume_embedding = resume_embedding / np.linalg.norm(resume_embedding)
             
             # Find similar jobs
@@ -313,6 +545,13 @@ class FastMatchingService:
             logger.error(f"Error finding jobs for resume text: {e}")
             return []
     
+    @staticmethod
+    def _check_search_mode(search_mode: str):
+        if search_mode not in SEARCH_MODES:
+            raise ValueError(
+                f"Unknown search mode {search_mode!r}, expected one of {', '.join(SEARCH_MODES)}"
+            )
+    
     def _calculate_similarity(self, embedding1: np.ndarray, embedding2: np.ndarray) -> float:
         """
         Calculate cosine similarity between two embeddings.
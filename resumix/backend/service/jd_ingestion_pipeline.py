@@ -0,0 +1,366 @@
+"""
+Concurrent, resumable ingestion of job description URLs into the job store.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+from loguru import logger
+
+from resumix.config.config import Config
+from resumix.shared.utils.http_fetcher import HttpFetcher
+from resumix.shared.utils.html_extractor import HtmlExtractor
+from resumix.shared.utils.url_fetcher import UrlFetcher
+
+CONFIG = Config().config
+
+# 队列结束标记
+_DONE = object()
+
+
+def url_job_id(url: str) -> str:
+    """Stable job id derived from the JD URL."""
+    return f"job_{hashlib.sha256(url.strip().encode('utf-8')).hexdigest()[:16]}"
+
+
+@dataclass
+class IngestionStats:
+    submitted: int = 0
+    skipped: int = 0
+    resumed: int = 0
+    fetched: int = 0
+    extracted: int = 0
+    parsed: int = 0
+    embedded: int = 0
+    failed: int = 0
+    elapsed: float = 0.0
+
+
+class HostRateLimiter:
+    """
+    Per-host concurrency cap plus a minimum interval between request starts.
+    """
+
+    def __init__(self, concurrency: int, min_interval: float):
+        self.concurrency = concurrency
+        self.min_interval = min_interval
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._next_slot: Dict[str, float] = {}
+
+    @asynccontextmanager
+    async def limit(self, host: str):
+        semaphore = self._semaphores.setdefault(
+            host, asyncio.Semaphore(self.concurrency)
+        )
+        async with semaphore:
+            # 单事件循环内执行，无需额外加锁
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            slot = max(now, self._next_slot.get(host, 0.0))
+            self._next_slot[host] = slot + self.min_interval
+            if slot > now:
+                await asyncio.sleep(slot - now)
+            yield
+
+
+class JDIngestionPipeline:
+    """
+    Fetch -> extract -> LLM parse -> embed, as concurrent stages.
+
+    Stages are connected by bounded queues, so a slow stage (usually the LLM)
+    applies backpressure instead of letting fetched pages pile up in memory.
+    Fetches are rate limited per host and run on a thread pool; readability
+    extraction is CPU bound and runs in a process pool; LLM parsing is capped
+    at ``llm_concurrency`` calls in flight; embeddings are encoded in batches
+    and the FAISS index is saved once at the end.
+
+    Every parsed JD is appended to a JSONL journal before it is embedded. A
+    rerun skips URLs whose job id is already in the store and re-embeds
+    journaled results without fetching or calling the LLM again.
+    """
+
+    def __init__(
+        self,
+        parser=None,
+        job_store=None,
+        fetcher: Optional[HttpFetcher] = None,
+        fetch_concurrency: Optional[int] = None,
+        per_host_concurrency: Optional[int] = None,
+        per_host_interval: Optional[float] = None,
+        extract_workers: Optional[int] = None,
+        llm_concurrency: Optional[int] = None,
+        embed_batch_size: Optional[int] = None,
+        embed_flush_interval: Optional[float] = None,
+        queue_size: Optional[int] = None,
+        journal_path: Optional[str] = None,
+    ):
+        """
+        Initialize the JDIngestionPipeline.
+
+        Args:
+            parser: JD parser exposing ``parse``, ``is_unparsed`` and
+                ``to_structured_data`` (default: JDVectorParser)
+            job_store: Store exposing ``add_job_descriptions``,
+                ``backfill_sentences`` and ``save_index``
+            fetcher: HTTP fetcher (default: shared HttpFetcher)
+            fetch_concurrency: Maximum fetches in flight across all hosts
+            per_host_concurrency: Maximum fetches in flight per host
+            per_host_interval: Minimum seconds between request starts per host
+            extract_workers: Processes used for readability extraction
+            llm_concurrency: Maximum LLM parse calls in flight
+            embed_batch_size: Jobs encoded per embedding batch
+            embed_flush_interval: Seconds to wait for a batch to fill up
+            queue_size: Capacity of each inter-stage queue
+            journal_path: JSONL file recording parsed results for resume
+        """
+        settings = CONFIG.INGESTION
+        if parser is None:
+            from resumix.backend.section_parser.jd_vector_parser import (
+                JDVectorParser,
+            )
+
+            parser = JDVectorParser()
+        self.parser = parser
+        self.job_store = job_store or parser.job_store
+        self.fetcher = fetcher or HttpFetcher.get_instance()
+        self.extractor = HtmlExtractor.get_instance()
+
+        self.fetch_concurrency = fetch_concurrency or settings.FETCH_CONCURRENCY
+        self.per_host_concurrency = (
+            per_host_concurrency or settings.PER_HOST_CONCURRENCY
+        )
+        self.per_host_interval = (
+            settings.PER_HOST_INTERVAL
+            if per_host_interval is None
+            else per_host_interval
+        )
+        self.extract_workers = extract_workers or settings.EXTRACT_WORKERS
+        self.llm_concurrency = llm_concurrency or settings.LLM_CONCURRENCY
+        self.embed_batch_size = embed_batch_size or settings.EMBED_BATCH_SIZE
+        self.embed_flush_interval = (
+            embed_flush_interval or settings.EMBED_FLUSH_INTERVAL
+        )
+        self.queue_size = queue_size or settings.QUEUE_SIZE
+        self.journal_path = Path(journal_path or settings.JOURNAL_PATH)
+        self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+
+    def run(self, urls: Iterable[str]) -> IngestionStats:
+        """Ingest URLs and block until every stage has drained."""
+        return asyncio.run(self.arun(urls))
+
+    async def arun(self, urls: Iterable[str]) -> IngestionStats:
+        """
+        Ingest URLs inside a running event loop.
+
+        Args:
+            urls: JD page URLs; duplicates and already stored jobs are skipped
+
+        Returns:
+            IngestionStats for this run
+        """
+        start = time.perf_counter()
+        stats = IngestionStats()
+        journal = self._read_journal()
+        stored = set(self.job_store.list_all_jobs())
+
+        fetch_queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        extract_queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        parse_queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        embed_queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+
+        limiter = HostRateLimiter(self.per_host_concurrency, self.per_host_interval)
+        io_executor = ThreadPoolExecutor(
+            max_workers=self.fetch_concurrency + self.llm_concurrency,
+            thread_name_prefix="jd-ingest",
+        )
+        cpu_executor = ProcessPoolExecutor(max_workers=self.extract_workers)
+
+        async def produce():
+            seen = set()
+            for url in urls:
+                url = url.strip()
+                if not url or url in seen:
+                    continue
+                seen.add(url)
+                stats.submitted += 1
+                job_id = url_job_id(url)
+                if job_id in stored:
+                    stats.skipped += 1
+                elif job_id in journal:
+                    # 已解析但尚未写入索引：跳过抓取和 LLM
+                    stats.resumed += 1
+                    await embed_queue.put(journal[job_id])
+                else:
+                    await fetch_queue.put((job_id, url))
+
+        async def fetch_worker():
+            loop = asyncio.get_running_loop()
+            while (item := await fetch_queue.get()) is not _DONE:
+                job_id, url = item
+                try:
+                    async with limiter.limit(urlsplit(url).netloc):
+                        response = await loop.run_in_executor(
+                            io_executor, self.fetcher.fetch, url
+                        )
+                    stats.fetched += 1
+                    await extract_queue.put((job_id, url, response.text))
+                except Exception as e:
+                    stats.failed += 1
+                    logger.warning(f"[JDIngestion] 抓取失败 {url}: {e}")
+
+        async def extract_worker():
+            loop = asyncio.get_running_loop()
+            while (item := await extract_queue.get()) is not _DONE:
+                job_id, url, html = item
+                try:
+                    # 未变化的页面直接命中提取缓存，不再占用进程池
+                    text = self.extractor.lookup(html)
+                    if text is None:
+                        text = await loop.run_in_executor(
+                            cpu_executor, UrlFetcher.extract_text, html
+                        )
+                except Exception as e:
+                    text = ""
+                    logger.warning(f"[JDIngestion] 正文提取异常 {url}: {e}")
+                if not text:
+                    stats.failed += 1
+                    continue
+                stats.extracted += 1
+                await parse_queue.put((job_id, url, text))
+
+        async def parse_worker():
+            loop = asyncio.get_running_loop()
+            while (item := await parse_queue.get()) is not _DONE:
+                job_id, url, text = item
+                try:
+                    sections = await loop.run_in_executor(
+                        io_executor, self.parser.parse, text
+                    )
+                    # 解析器兜底返回的占位内容不入日志，重跑时会再次解析
+                    if self.parser.is_unparsed(sections):
+                        raise ValueError("解析结果为空或为兜底占位内容")
+                    record = {
+                        "job_id": job_id,
+                        "url": url,
+                        "jd_text": text,
+                        "structured_data": self.parser.to_structured_data(sections),
+                    }
+                except Exception as e:
+                    stats.failed += 1
+                    logger.warning(f"[JDIngestion] LLM 解析失败 {url}: {e}")
+                    continue
+                self._append_journal(record)
+                stats.parsed += 1
+                await embed_queue.put(record)
+
+        async def embed_worker():
+            batch: List[Dict] = []
+            while True:
+                try:
+                    if batch:
+                        # 凑批等待有上限，避免尾部任务长时间滞留
+                        item = await asyncio.wait_for(
+                            embed_queue.get(), timeout=self.embed_flush_interval
+                        )
+                    else:
+                        item = await embed_queue.get()
+                except asyncio.TimeoutError:
+                    item = None
+
+                if item is not None and item is not _DONE:
+                    batch.append(item)
+                if batch and (
+                    item is None
+                    or item is _DONE
+                    or len(batch) >= self.embed_batch_size
+                ):
+                    stats.embedded += await asyncio.to_thread(
+                        self.job_store.add_job_descriptions,
+                        [
+                            (r["job_id"], r["jd_text"], r["structured_data"])
+                            for r in batch
+                        ],
+                        self.embed_batch_size,
+                    )
+                    batch = []
+                if item is _DONE:
+                    return
+
+        async def stage(worker, count: int, downstream: asyncio.Queue, fan_out: int):
+            await asyncio.gather(*(worker() for _ in range(count)))
+            for _ in range(fan_out):
+                await downstream.put(_DONE)
+
+        try:
+            await asyncio.gather(
+                stage(produce, 1, fetch_queue, self.fetch_concurrency),
+                stage(
+                    fetch_worker,
+                    self.fetch_concurrency,
+                    extract_queue,
+                    self.extract_workers,
+                ),
+                stage(
+                    extract_worker,
+                    self.extract_workers,
+                    parse_queue,
+                    self.llm_concurrency,
+                ),
+                stage(parse_worker, self.llm_concurrency, embed_queue, 1),
+                embed_worker(),
+            )
+        finally:
+            io_executor.shutdown(wait=False)
+            cpu_executor.shutdown(wait=False)
+
+        if stats.embedded:
+            # 旧索引缺少 JD 句向量时在构建阶段一次性回填，避免查询时全量编码
+            await asyncio.to_thread(self.job_store.backfill_sentences, self.embed_batch_size)
+            await asyncio.to_thread(self.job_store.save_index)
+
+        stats.elapsed = time.perf_counter() - start
+        logger.info(f"[JDIngestion] 完成: {asdict(stats)}")
+        return stats
+
+    def _read_journal(self) -> Dict[str, Dict]:
+        records = {}
+        if not self.journal_path.exists():
+            return records
+        with open(self.journal_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # 崩溃时可能留下半行记录
+                    continue
+                records[record["job_id"]] = record
+        logger.info(f"[JDIngestion] 从日志恢复 {len(records)} 条解析结果")
+        return records
+
+    def _append_journal(self, record: Dict):
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Ingest JD URLs into the job store")
+    arg_parser.add_argument("url_file", help="Text file with one JD URL per line")
+    args = arg_parser.parse_args()
+
+    with open(args.url_file, "r", encoding="utf-8") as f:
+        result = JDIngestionPipeline().run(f.read().splitlines())
+
+    for name, value in asdict(result).items():
+        logger.info(f"{name}: {value}")
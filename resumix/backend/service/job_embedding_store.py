@@ -4,6 +4,7 @@ Job Embedding Store using FAISS for efficient similarity search and caching.
 
 import os
 import pickle
+import threading
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Any
 from datetime import datetime
@@ -11,7 +12,30 @@ import numpy as np
 import faiss
 from loguru import logger
 
+from resumix.config.config import Config
 from resumix.shared.utils.sentence_transformer_utils import SentenceTransformerUtils
+from resumix.shared.utils.async_utils import synchronized
+from resumix.shared.utils.faiss_utils import (
+    ExactVectors,
+    IndexDimensionError,
+    SegmentedVectors,
+    bytes_per_vector,
+    exact_path,
+    index_storage,
+    new_index,
+    read_index_mmap,
+    rescore_exact,
+    sentences_path,
+    to_writable,
+    write_index_atomic,
+)
+
+CONFIG = Config().config
+
+
+def jd_sentences(jd_text: str) -> List[str]:
+    """Non-empty lines of a job description, the units of keyword matching."""
+    return [s.strip() for s in jd_text.split("\n") if s.strip()]
 
 
 class JobEmbeddingStore:
@@ -22,27 +46,45 @@ class JobEmbeddingStore:
     using FAISS (Facebook AI Similarity Search) with caching capabilities.
     """
     
-    def __init__(self, embedding_dim: int = 384, index_file: str = "job_embeddings.faiss"):
+    def __init__(
+        self,
+        embedding_dim: int = 384,
+        index_file: str = "job_embeddings.faiss",
+        storage: Optional[str] = None,
+    ):
         """
         Initialize the JobEmbeddingStore.
         
         Args:
             embedding_dim: Dimension of the embedding vectors (default: 384 for MiniLM)
             index_file: Name of the FAISS index file to store/load
+            storage: Vector storage of a new index: flat, fp16 or sq8
+                (default: embedding_store.storage; a loaded index keeps its own)
         """
         self.embedding_dim = embedding_dim
         self.base_dir = Path(__file__).parent.parent / "embeddings"
         self.base_dir.mkdir(parents=True, exist_ok=True)
         
         self.index_file = self.base_dir / index_file
-        self.metadata_file = self.base_dir / (Path(index_file).stem + "_metadata.pkl")
+        self.metadata_file = self.index_file.with_name(self.index_file.stem + "_metadata.pkl")
         
         # Initialize FAISS index with Inner Product (cosine similarity)
-        self.index = faiss.IndexFlatIP(embedding_dim)
+        self.storage = storage or CONFIG.EMBEDDING_STORE.STORAGE
+        self.index = new_index(embedding_dim, self.storage)
+        # Float32 copies of compact (fp16/sq8) vectors for exact rescoring
+        self.exact: Optional[ExactVectors] = None
+        # One vector per JD sentence (see jd_sentences), group i = index id i;
+        # None until backfilled for stores saved without them
+        self.sentences: Optional[SegmentedVectors] = None
+        # Loaded indexes are memory-mapped read-only until the first write
+        self._index_writable = True
+        # Shared by every component using this store (see StoreRegistry)
+        self.lock = threading.RLock()
         self.job_metadata = {}
         
         # Get sentence transformer instance
         self.sentence_transformer = SentenceTransformerUtils.get_instance()
+        self._validate_model_dim()
         
         # Load existing index if available
         self._load_index()
@@ -53,6 +95,9 @@ class JobEmbeddingStore:
         """
         Add job description with embeddings to FAISS index.
         
+        The text is encoded before the store lock is taken; the lock only
+        guards the index, side-file and metadata updates.
+        
         Args:
             job_id: Unique identifier for the job
             jd_text: Full job description text
@@ -62,49 +107,139 @@ class JobEmbeddingStore:
             bool: True if successfully added, False otherwise
         """
         try:
-            # Check if job already exists
+            # Check if job already exists (before paying for the encode)
             if job_id in self.job_metadata:
                 logger.warning(f"Job {job_id} already exists in index")
                 return False
             
-            # Generate embedding for the job description
-            embedding = self.sentence_transformer.encode(jd_text, convert_to_tensor=False)
+            # Embed the job description and its sentences in one call
+            sentences = jd_sentences(jd_text)
+            embeddings = self._encode([jd_text] + sentences)
+            embedding = embeddings[:1]
             
-            # Normalize for cosine similarity
-            embedding = embedding / np.linalg.norm(embedding)
-            embedding = embedding.reshape(1, -1).astype(np.float32)
-            
-            # Add to FAISS index
-            faiss_index = self.index.ntotal
-            self.index.add(embedding)
-            
-            # Store metadata
-            self.job_metadata[job_id] = {
-                'faiss_index': faiss_index,
-                'jd_text': jd_text,
-                'structured_data': structured_data,
-                'created_at': datetime.now().isoformat(),
-                'embedding_version': 'paraphrase-multilingual-MiniLM-L12-v2'
-            }
-            
-            logger.info(f"Successfully added job {job_id} to index (total: {self.get_job_count()})")
+            with self.lock:
+                # Another thread may have added the job while we were encoding
+                if job_id in self.job_metadata:
+                    logger.warning(f"Job {job_id} already exists in index")
+                    return False
+                
+                # Add to FAISS index
+                self._ensure_writable()
+                faiss_index = self.index.ntotal
+                self.index.add(embedding)
+                if self.exact is not None:
+                    self.exact.append(embedding)
+                if self.sentences is not None:
+                    self.sentences.append(embeddings[1:])
+                
+                # Store metadata
+                self.job_metadata[job_id] = {
+                    'faiss_index': faiss_index,
+                    'jd_text': jd_text,
+                    'structured_data': structured_data,
+                    'created_at': datetime.now().isoformat(),
+                    'embedding_version': 'paraphrase-multilingual-MiniLM-L12-v2'
+                }
+                
+                logger.info(f"Successfully added job {job_id} to index (total: {self.get_job_count()})")
             return True
             
         except Exception as e:
             logger.error(f"Error adding job {job_id} to index: {e}")
             return False
     
+    def add_job_descriptions(
+        self, jobs: List[Tuple[str, str, Dict]], batch_size: int = 64
+    ) -> int:
+        """
+        Add many job descriptions with a single batched encode and index add.
+        
+        As in ``add_job_description``, encoding happens outside the store lock.
+        
+        Args:
+            jobs: (job_id, jd_text, structured_data) tuples
+            batch_size: Encoder batch size
+            
+        Returns:
+            int: Number of jobs added (existing and duplicate ids are skipped)
+        """
+        new_jobs = []
+        seen = set()
+        for job_id, jd_text, structured_data in jobs:
+            if job_id in self.job_metadata or job_id in seen:
+                logger.warning(f"Job {job_id} already exists in index")
+                continue
+            seen.add(job_id)
+            new_jobs.append((job_id, jd_text, structured_data))
+        
+        if not new_jobs:
+            return 0
+        
+        try:
+            # Whole JDs first, then every JD's sentences, in one batched encode
+            sentences = [jd_sentences(jd_text) for _, jd_text, _ in new_jobs]
+            encoded = self._encode(
+                [jd_text for _, jd_text, _ in new_jobs]
+                + [sentence for group in sentences for sentence in group],
+                batch_size=batch_size,
+            )
+            bounds = np.cumsum([len(new_jobs)] + [len(group) for group in sentences])
+            
+            with self.lock:
+                # Drop jobs another thread added while we were encoding
+                keep = []
+                for row, (job_id, _, _) in enumerate(new_jobs):
+                    if job_id in self.job_metadata:
+                        logger.warning(f"Job {job_id} already exists in index")
+                    else:
+                        keep.append(row)
+                if not keep:
+                    return 0
+                embeddings = encoded[keep]
+                
+                self._ensure_writable()
+                first_index = self.index.ntotal
+                self.index.add(embeddings)
+                if self.exact is not None:
+                    self.exact.append(embeddings)
+                if self.sentences is not None:
+                    for row in keep:
+                        self.sentences.append(encoded[bounds[row]:bounds[row + 1]])
+                
+                created_at = datetime.now().isoformat()
+                for offset, row in enumerate(keep):
+                    job_id, jd_text, structured_data = new_jobs[row]
+                    self.job_metadata[job_id] = {
+                        'faiss_index': first_index + offset,
+                        'jd_text': jd_text,
+                        'structured_data': structured_data,
+                        'created_at': created_at,
+                        'embedding_version': 'paraphrase-multilingual-MiniLM-L12-v2'
+                    }
+                
+                logger.info(f"Successfully added {len(keep)} jobs to index (total: {self.get_job_count()})")
+            return len(keep)
+            
+        except Exception as e:
+            logger.error(f"Error adding {len(new_jobs)} jobs to index: {e}")
+            return 0
+    
     def get_job_count(self) -> int:
         """Return total number of jobs in index."""
         return self.index.ntotal
     
-    def search_similar_jobs(self, query_embedding: np.ndarray, k: int = 10) -> List[Tuple[str, float]]:
+    @synchronized
+    def search_similar_jobs(
+        self, query_embedding: np.ndarray, k: int = 10, rescore: Optional[bool] = None
+    ) -> List[Tuple[str, float]]:
         """
         Find similar jobs to query embedding.
         
         Args:
             query_embedding: Query embedding vector
             k: Number of similar jobs to return
+            rescore: Over-fetch from a compact index and re-rank with exact
+                float32 scores (default: embedding_store.rescore)
             
         Returns:
             List of (job_id, similarity_score) tuples
@@ -124,7 +259,15 @@ class JobEmbeddingStore:
             
             # Search in FAISS index
             k = min(k, self.get_job_count())
-            similarities, indices = self.index.search(query_embedding, k)
+            if self._use_rescore(rescore):
+                fetch = min(k * CONFIG.EMBEDDING_STORE.OVERSAMPLE, self.get_job_count())
+                _, candidates = self.index.search(query_embedding, fetch)
+                similarities, indices = rescore_exact(
+                    query_embedding, candidates[0], self.exact, k
+                )
+                similarities, indices = similarities[None], indices[None]
+            else:
+                similarities, indices = self.index.search(query_embedding, k)
             
             # Map indices back to job IDs
             results = []
@@ -148,6 +291,7 @@ class JobEmbeddingStore:
             logger.error(f"Error searching similar jobs: {e}")
             return []
     
+    @synchronized
     def get_job_embedding(self, job_id: str) -> Optional[np.ndarray]:
         """
         Retrieve cached embedding for a job.
@@ -164,6 +308,10 @@ class JobEmbeddingStore:
         try:
             faiss_idx = self.job_metadata[job_id]['faiss_index']
             
+            # Exact float32 copy when the index stores compact codes
+            if self.exact is not None:
+                return self.exact.rows([faiss_idx])[0]
+            
             # Get embedding from FAISS index
             embedding = self.index.reconstruct(faiss_idx)
             return embedding
@@ -172,6 +320,76 @@ class JobEmbeddingStore:
             logger.error(f"Error retrieving embedding for job {job_id}: {e}")
             return None
     
+    def get_job_sentences(self, job_id: str) -> Optional[Tuple[List[str], np.ndarray]]:
+        """
+        Cached per-sentence embeddings of a job description.
+        
+        Stores saved without sentence vectors encode only the requested job's
+        sentences until ``backfill_sentences`` has run.
+        
+        Args:
+            job_id: Job identifier
+            
+        Returns:
+            (sentences, normalized float32 matrix of shape (len(sentences), dim))
+            or None if the job is unknown
+        """
+        with self.lock:
+            metadata = self.job_metadata.get(job_id)
+            if metadata is None:
+                return None
+            
+            sentences = jd_sentences(metadata['jd_text'])
+            if self.sentences is not None:
+                return sentences, self.sentences.group(metadata['faiss_index'])
+        
+        return sentences, self._encode(sentences)
+    
+    def backfill_sentences(self, batch_size: int = 64) -> int:
+        """
+        Encode the JD sentence vectors of a store saved without them.
+        
+        Meant for migrations and index builds; the stored texts are encoded
+        outside the store lock. Does nothing when the vectors already exist.
+        
+        Args:
+            batch_size: Encoder batch size
+            
+        Returns:
+            int: Number of sentence vectors encoded
+        """
+        with self.lock:
+            if self.sentences is not None:
+                return 0
+            jobs = sorted((m['faiss_index'], m['jd_text']) for m in self.job_metadata.values())
+        
+        groups = [jd_sentences(jd_text) for _, jd_text in jobs]
+        encoded = self._encode([s for group in groups for s in group], batch_size=batch_size)
+        
+        with self.lock:
+            if self.sentences is not None:
+                # Rebuilt (with sentence vectors) while we were encoding
+                return 0
+            current = sorted((m['faiss_index'], m['jd_text']) for m in self.job_metadata.values())
+            if current[:len(jobs)] != jobs:
+                logger.warning("Jobs changed during sentence backfill; skipped")
+                return 0
+            # Jobs added while encoding are few; encode them here
+            late = [jd_sentences(jd_text) for _, jd_text in current[len(jobs):]]
+            late_encoded = self._encode([s for group in late for s in group])
+            
+            sentences = SegmentedVectors(sentences_path(self.index_file), self.embedding_dim)
+            sentences.reset()
+            for group_list, matrix in ((groups, encoded), (late, late_encoded)):
+                start = 0
+                for group in group_list:
+                    sentences.append(matrix[start:start + len(group)])
+                    start += len(group)
+            self.sentences = sentences
+            logger.info(f"Built {sentences.num_rows} JD sentence vectors for {len(sentences)} jobs")
+            return sentences.num_rows
+    
+    @synchronized
     def remove_job(self, job_id: str) -> bool:
         """
         Remove job from index (requires rebuild).
@@ -201,6 +419,7 @@ class JobEmbeddingStore:
             logger.error(f"Error removing job {job_id}: {e}")
             return False
     
+    @synchronized
     def save_index(self) -> bool:
         """
         Persist index and metadata to disk.
@@ -210,7 +429,13 @@ class JobEmbeddingStore:
         """
         try:
             # Save FAISS index
-            faiss.write_index(self.index, str(self.index_file))
+            write_index_atomic(self.index, self.index_file)
+            if self.exact is not None:
+                self.exact.save()
+            if self.sentences is not None:
+                self.sentences.save()
+            else:
+                SegmentedVectors(sentences_path(self.index_file), self.embedding_dim).delete()
             
             # Save metadata
             with open(self.metadata_file, 'wb') as f:
@@ -223,6 +448,67 @@ class JobEmbeddingStore:
             logger.error(f"Error saving index: {e}")
             return False
     
+    def _ensure_writable(self):
+        """Copy a memory-mapped index into memory before mutating it."""
+        if not self._index_writable:
+            self.index = to_writable(self.index)
+            self._index_writable = True
+    
+    def _encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """Normalized float32 embeddings of texts, shape (len(texts), dim)."""
+        if not texts:
+            return np.empty((0, self.embedding_dim), dtype=np.float32)
+        embeddings = np.asarray(
+            self.sentence_transformer.encode(
+                texts, batch_size=batch_size, convert_to_tensor=False
+            ),
+            dtype=np.float32,
+        ).reshape(len(texts), -1)
+        return embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+    
+    def _open_sentences(self, reset: bool = False):
+        """Attach the saved JD sentence vectors if they match the index."""
+        sentences = SegmentedVectors(sentences_path(self.index_file), self.embedding_dim)
+        if reset:
+            sentences.reset()
+        if len(sentences) != self.index.ntotal or not sentences.consistent():
+            # 旧版本保存的索引没有句向量，由 backfill_sentences 回填
+            sentences = None
+        self.sentences = sentences
+    
+    def _use_rescore(self, rescore: Optional[bool]) -> bool:
+        if rescore is None:
+            rescore = CONFIG.EMBEDDING_STORE.RESCORE
+        return rescore and self.exact is not None
+    
+    def _open_exact(self, reset: bool = False):
+        """Attach the float32 side file of a compact index (flat indexes need none)."""
+        self.exact = None
+        if self.storage == "flat":
+            return
+        exact = ExactVectors(exact_path(self.index_file), self.embedding_dim)
+        if reset:
+            exact.reset()
+        if len(exact) != self.index.ntotal:
+            logger.warning(
+                f"{exact.path} holds {len(exact)} vectors but the index has "
+                f"{self.index.ntotal}; exact rescoring disabled until the index is rebuilt"
+            )
+            return
+        self.exact = exact
+    
+    def _validate_model_dim(self):
+        """Fail fast when the encoder does not produce ``embedding_dim`` vectors."""
+        get_dim = getattr(
+            self.sentence_transformer, "get_sentence_embedding_dimension", None
+        )
+        model_dim = get_dim() if callable(get_dim) else None
+        if model_dim is not None and model_dim != self.embedding_dim:
+            raise ValueError(
+                f"Embedding model produces {model_dim}-dim vectors, "
+                f"but the store expects {self.embedding_dim}"
+            )
+    
     def _load_index(self) -> bool:
         """
         Load existing index from disk.
@@ -233,7 +519,17 @@ class JobEmbeddingStore:
         try:
             if self.index_file.exists() and self.metadata_file.exists():
                 # Load FAISS index
-                self.index = faiss.read_index(str(self.index_file))
+                index = read_index_mmap(self.index_file)
+                if index.d != self.embedding_dim:
+                    raise IndexDimensionError(
+                        f"{self.index_file} holds {index.d}-dim vectors, "
+                        f"but the store expects {self.embedding_dim}"
+                    )
+                self.index = index
+                self._index_writable = False
+                self.storage = index_storage(index)
+                self._open_exact()
+                self._open_sentences()
                 
                 # Load metadata
                 with open(self.metadata_file, 'rb') as f:
@@ -243,12 +539,20 @@ class JobEmbeddingStore:
                 return True
             else:
                 logger.info("No existing index found, starting fresh")
+                self._open_exact(reset=True)
+                self._open_sentences(reset=True)
                 return False
                 
+        except IndexDimensionError:
+            # 不回退为空索引，避免下次 save_index 覆盖由其他模型构建的数据
+            raise
         except Exception as e:
             logger.error(f"Error loading index: {e}")
             # Reset to empty state on error
-            self.index = faiss.IndexFlatIP(self.embedding_dim)
+            self.index = new_index(self.embedding_dim, self.storage)
+            self._index_writable = True
+            self._open_exact(reset=True)
+            self._open_sentences(reset=True)
             self.job_metadata = {}
             return False
     
@@ -256,23 +560,33 @@ class JobEmbeddingStore:
         """Rebuild the FAISS index from current metadata."""
         try:
             # Create new index
-            new_index = faiss.IndexFlatIP(self.embedding_dim)
+            rebuilt = new_index(self.embedding_dim, self.storage)
+            exact = None
+            if self.storage != "flat":
+                exact = ExactVectors(exact_path(self.index_file), self.embedding_dim)
+                exact.reset()
+            sentences = SegmentedVectors(sentences_path(self.index_file), self.embedding_dim)
+            sentences.reset()
             
             # Re-add all jobs
             for job_id, metadata in self.job_metadata.items():
-                # Re-generate embedding from text
-                embedding = self.sentence_transformer.encode(
-                    metadata['jd_text'], convert_to_tensor=False
-                )
-                embedding = embedding / np.linalg.norm(embedding)
-                embedding = embedding.reshape(1, -1).astype(np.float32)
+                # Re-generate embeddings from text
+                group = jd_sentences(metadata['jd_text'])
+                embeddings = self._encode([metadata['jd_text']] + group)
+                embedding = embeddings[:1]
                 
                 # Update faiss_index in metadata
-                metadata['faiss_index'] = new_index.ntotal
-                new_index.add(embedding)
+                metadata['faiss_index'] = rebuilt.ntotal
+                rebuilt.add(embedding)
+                if exact is not None:
+                    exact.append(embedding)
+                sentences.append(embeddings[1:])
             
             # Replace old index
-            self.index = new_index
+            self.index = rebuilt
+            self._index_writable = True
+            self.exact = exact
+            self.sentences = sentences
             
             logger.info(f"Successfully rebuilt index with {self.get_job_count()} jobs")
             
@@ -292,6 +606,10 @@ class JobEmbeddingStore:
             'index_size_mb': self._get_index_size(),
             'last_updated': self._get_last_updated(),
             'embedding_dim': self.embedding_dim,
+            'storage': self.storage,
+            'bytes_per_vector': bytes_per_vector(self.index),
+            'exact_rescoring': self.exact is not None,
+            'jd_sentence_vectors': self.sentences.num_rows if self.sentences is not None else None,
             'index_file': str(self.index_file),
             'metadata_file': str(self.metadata_file)
         }
@@ -339,6 +657,7 @@ class JobEmbeddingStore:
         """
         return list(self.job_metadata.keys())
     
+    @synchronized
     def clear_index(self) -> bool:
         """
         Clear all jobs from the index.
@@ -347,7 +666,10 @@ class JobEmbeddingStore:
             bool: True if successfully cleared
         """
         try:
-            self.index = faiss.IndexFlatIP(self.embedding_dim)
+            self.index = new_index(self.embedding_dim, self.storage)
+            self._index_writable = True
+            self._open_exact(reset=True)
+            self._open_sentences(reset=True)
             self.job_metadata = {}
             
             # Remove files if they exist
@@ -355,6 +677,8 @@ class JobEmbeddingStore:
                 self.index_file.unlink()
             if self.metadata_file.exists():
                 self.metadata_file.unlink()
+            exact_path(self.index_file).unlink(missing_ok=True)
+            self.sentences.delete()
             
             logger.info("Successfully cleared job embedding index")
             return True
@@ -4,6 +4,7 @@ Resume Embedding Store using FAISS for efficient similarity search and caching.
 
 import os
 import pickle
+import threading
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Any
 from datetime import datetime
@@ -11,7 +12,26 @@ import numpy as np
 import faiss
 from loguru import logger
 
+from resumix.config.config import Config
+from resumix.backend.service.section_index import SectionIndex, chunks_path, section_chunks
 from resumix.shared.utils.sentence_transformer_utils import SentenceTransformerUtils
+from resumix.shared.utils.async_utils import synchronized
+from resumix.shared.utils.faiss_utils import (
+    BinaryPrefilter,
+    ExactVectors,
+    IndexDimensionError,
+    binary_path,
+    bytes_per_vector,
+    exact_path,
+    index_storage,
+    new_index,
+    read_index_mmap,
+    rescore_exact,
+    to_writable,
+    write_index_atomic,
+)
+
+CONFIG = Config().config
 
 
 class ResumeEmbeddingStore:
@@ -23,23 +43,42 @@ class ResumeEmbeddingStore:
     Includes user-based resume counting and analytics.
     """
     
-    def __init__(self, embedding_dim: int = 384, index_file: str = "resume_embeddings.faiss"):
+    def __init__(
+        self,
+        embedding_dim: int = 384,
+        index_file: str = "resume_embeddings.faiss",
+        storage: Optional[str] = None,
+    ):
         """
         Initialize the ResumeEmbeddingStore.
         
         Args:
             embedding_dim: Dimension of the embedding vectors (default: 384 for MiniLM)
             index_file: Name of the FAISS index file to store/load
+            storage: Vector storage of a new index: flat, fp16 or sq8
+                (default: embedding_store.storage; a loaded index keeps its own)
         """
         self.embedding_dim = embedding_dim
         self.base_dir = Path(__file__).parent.parent / "embeddings"
         self.base_dir.mkdir(parents=True, exist_ok=True)
         
         self.index_file = self.base_dir / index_file
-        self.metadata_file = self.base_dir / (Path(index_file).stem + "_metadata.pkl")
+        self.metadata_file = self.index_file.with_name(self.index_file.stem + "_metadata.pkl")
         
         # Initialize FAISS index with Inner Product (cosine similarity)
-        self.index = faiss.IndexFlatIP(embedding_dim)
+        self.storage = storage or CONFIG.EMBEDDING_STORE.STORAGE
+        self.index = new_index(embedding_dim, self.storage)
+        # Float32 copies of compact (fp16/sq8) vectors for exact rescoring
+        self.exact: Optional[ExactVectors] = None
+        # Sign-code prefilter for mode="binary", built on first use
+        self.binary: Optional[BinaryPrefilter] = None
+        self._ids_by_index: Optional[Dict[int, str]] = None
+        # Per-section chunk vectors for mode="sections"; None until backfilled
+        self.sections: Optional[SectionIndex] = SectionIndex(embedding_dim)
+        # Loaded indexes are memory-mapped read-only until the first write
+        self._index_writable = True
+        # Shared by every component using this store (see StoreRegistry)
+        self.lock = threading.RLock()
         self.resume_metadata = {}
         
         # Resume counting and tracking
@@ -48,6 +87,7 @@ class ResumeEmbeddingStore:
         
         # Get sentence transformer instance
         self.sentence_transformer = SentenceTransformerUtils.get_instance()
+        self._validate_model_dim()
         
         # Load existing index if available
         self._load_index()
@@ -58,6 +98,9 @@ class ResumeEmbeddingStore:
         """
         Add resume with embeddings to FAISS index.
         
+        The text is encoded before the store lock is taken; the lock only
+        guards the index, side-file and metadata updates.
+        
         Args:
             resume_id: Unique identifier for the resume
             resume_text: Full resume text
@@ -68,37 +111,51 @@ class ResumeEmbeddingStore:
             bool: True if successfully added, False otherwise
         """
         try:
-            # Check if resume already exists
+            # Check if resume already exists (before paying for the encode)
             if resume_id in self.resume_metadata:
                 logger.warning(f"Resume {resume_id} already exists in index")
                 return False
             
-            # Generate embedding for the resume
-            embedding = self.sentence_transformer.encode(resume_text, convert_to_tensor=False)
-            
-            # Normalize for cosine similarity
-            embedding = embedding / np.linalg.norm(embedding)
-            embedding = embedding.reshape(1, -1).astype(np.float32)
-            
-            # Add to FAISS index
-            faiss_index = self.index.ntotal
-            self.index.add(embedding)
-            
-            # Store metadata
-            self.resume_metadata[resume_id] = {
-                'faiss_index': faiss_index,
-                'resume_text': resume_text,
-                'sections': sections,
-                'user_id': user_id,
-                'created_at': datetime.now().isoformat(),
-                'embedding_version': 'paraphrase-multilingual-MiniLM-L12-v2'
-            }
+            # Embed the full resume and its section chunks in one call
+            chunks = section_chunks(sections, resume_text)
+            embeddings = self._encode([resume_text] + [text for _, text in chunks])
+            embedding = embeddings[:1]
             
-            # Update counters
-            self.resume_count = self.index.ntotal
-            self.last_added_timestamp = datetime.now().isoformat()
-            
-            logger.info(f"Successfully added resume {resume_id} to index (total: {self.get_resume_count()})")
+            with self.lock:
+                # Another thread may have added the resume while we were encoding
+                if resume_id in self.resume_metadata:
+                    logger.warning(f"Resume {resume_id} already exists in index")
+                    return False
+                
+                # Add to FAISS index
+                self._ensure_writable()
+                faiss_index = self.index.ntotal
+                self.index.add(embedding)
+                if self.exact is not None:
+                    self.exact.append(embedding)
+                if self.binary is not None:
+                    self.binary.add(embedding)
+                if self.sections is not None:
+                    self.sections.add(faiss_index, [name for name, _ in chunks], embeddings[1:])
+                self._ids_by_index = None
+                
+                # Store metadata
+                self.resume_metadata[resume_id] = {
+                    'faiss_index': faiss_index,
+                    'resume_text': resume_text,
+                    'sections': sections,
+                    'user_id': user_id,
+                    'created_at': datetime.now().isoformat(),
+                    'embedding_version': 'paraphrase-multilingual-MiniLM-L12-v2'
+                }
+                if self.sections is not None:
+                    self.resume_metadata[resume_id]['section_chunks'] = len(chunks)
+                
+                # Update counters
+                self.resume_count = self.index.ntotal
+                self.last_added_timestamp = datetime.now().isoformat()
+                
+                logger.info(f"Successfully added resume {resume_id} to index (total: {self.get_resume_count()})")
             return True
             
         except Exception as e:
@@ -109,6 +166,7 @@ class ResumeEmbeddingStore:
         """Return total number of resumes in index."""
         return self.index.ntotal
     
+    @synchronized
     def get_resume_count_by_user(self, user_id: str) -> int:
         """
         Return number of resumes for specific user.
@@ -125,21 +183,45 @@ class ResumeEmbeddingStore:
                 count += 1
         return count
     
-    def search_similar_resumes(self, query_embedding: np.ndarray, k: int = 10) -> List[Tuple[str, float]]:
+    @synchronized
+    def search_similar_resumes(
+        self,
+        query_embedding: np.ndarray,
+        k: int = 10,
+        rescore: Optional[bool] = None,
+        mode: str = "flat",
+        num_candidates: Optional[int] = None,
+    ) -> List[Tuple[str, float]]:
         """
         Find k most similar resumes.
         
         Args:
             query_embedding: Query embedding vector
             k: Number of similar resumes to return
+            rescore: Over-fetch from a compact index and re-rank with exact
+                float32 scores (default: embedding_store.rescore)
+            mode: "flat" searches the float index; "binary" takes the
+                num_candidates nearest sign codes by Hamming distance and
+                rescores them with the float vectors; "sections" scores
+                resumes by their section chunks (see search_resumes_by_sections)
+            num_candidates: Prefilter size of "binary"
+                (default: embedding_store.binary_candidates)
             
         Returns:
             List of (resume_id, similarity_score) tuples
         """
+        if mode not in ("flat", "binary", "sections"):
+            raise ValueError(
+                f"Unknown search mode {mode!r}, expected flat, binary or sections"
+            )
+        
         if self.get_resume_count() == 0:
             logger.warning("No resumes in index for similarity search")
             return []
         
+        if mode == "sections":
+            return self.search_resumes_by_sections(query_embedding, k)
+        
         try:
             # Ensure query is properly formatted
             if query_embedding.ndim == 1:
@@ -151,7 +233,23 @@ class ResumeEmbeddingStore:
             
             # Search in FAISS index
             k = min(k, self.get_resume_count())
-            similarities, indices = self.index.search(query_embedding, k)
+            if mode == "binary":
+                similarities, indices = self._prefilter().search(
+                    query_embedding,
+                    k,
+                    num_candidates or CONFIG.EMBEDDING_STORE.BINARY_CANDIDATES,
+                    self._vectors,
+                )
+                similarities, indices = similarities[None], indices[None]
+            elif self._use_rescore(rescore):
+                fetch = min(k * CONFIG.EMBEDDING_STORE.OVERSAMPLE, self.get_resume_count())
+                _, candidates = self.index.search(query_embedding, fetch)
+                similarities, indices = rescore_exact(
+                    query_embedding, candidates[0], self.exact, k
+                )
+                similarities, indices = similarities[None], indices[None]
+            else:
+                similarities, indices = self.index.search(query_embedding, k)
             
             # Map indices back to resume IDs
             results = []
@@ -160,11 +258,7 @@ class ResumeEmbeddingStore:
                     continue
                     
                 # Find resume_id by faiss_index
-                resume_id = None
-                for rid, metadata in self.resume_metadata.items():
-                    if metadata['faiss_index'] == faiss_idx:
-                        resume_id = rid
-                        break
+                resume_id = self._resume_id_at(int(faiss_idx))
                 
                 if resume_id:
                     results.append((resume_id, float(similarity)))
@@ -175,6 +269,46 @@ class ResumeEmbeddingStore:
             logger.error(f"Error searching similar resumes: {e}")
             return []
     
+    @synchronized
+    def search_resumes_by_sections(
+        self,
+        query_embeddings: np.ndarray,
+        k: int = 10,
+        aggregation: Optional[str] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Find k best resumes by late interaction over their section chunks.
+        
+        Args:
+            query_embeddings: One JD vector (dim,) or one per JD sentence (q, dim)
+            k: Number of resumes to return
+            aggregation: "max" (best chunk) or "weighted" (section-weighted
+                best chunks), default resume_sections.aggregation
+            
+        Returns:
+            List of (resume_id, score) tuples
+        """
+        if self.get_resume_count() == 0:
+            logger.warning("No resumes in index for similarity search")
+            return []
+        
+        try:
+            query = np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32))
+            query = query / np.maximum(np.linalg.norm(query, axis=1, keepdims=True), 1e-12)
+            owners, scores = self._section_index().search(
+                query, k, aggregation=aggregation or CONFIG.RESUME_SECTIONS.AGGREGATION
+            )
+            return [
+                (self._resume_id_at(int(owner)), float(score))
+                for owner, score in zip(owners, scores)
+                if self._resume_id_at(int(owner))
+            ]
+            
+        except Exception as e:
+            logger.error(f"Error searching resumes by sections: {e}")
+            return []
+    
+    @synchronized
     def get_resume_embedding(self, resume_id: str) -> Optional[np.ndarray]:
         """
         Retrieve cached embedding for a resume.
@@ -191,6 +325,10 @@ class ResumeEmbeddingStore:
         try:
             faiss_idx = self.resume_metadata[resume_id]['faiss_index']
             
+            # Exact float32 copy when the index stores compact codes
+            if self.exact is not None:
+                return self.exact.rows([faiss_idx])[0]
+            
             # Get embedding from FAISS index
             embedding = self.index.reconstruct(faiss_idx)
             return embedding
@@ -199,6 +337,7 @@ class ResumeEmbeddingStore:
             logger.error(f"Error retrieving embedding for resume {resume_id}: {e}")
             return None
     
+    @synchronized
     def remove_resume(self, resume_id: str) -> bool:
         """
         Remove resume from index.
@@ -231,6 +370,7 @@ class ResumeEmbeddingStore:
             logger.error(f"Error removing resume {resume_id}: {e}")
             return False
     
+    @synchronized
     def save_index(self) -> bool:
         """
         Persist index and metadata to disk.
@@ -240,7 +380,17 @@ class ResumeEmbeddingStore:
         """
         try:
             # Save FAISS index
-            faiss.write_index(self.index, str(self.index_file))
+            write_index_atomic(self.index, self.index_file)
+            if self.exact is not None:
+                self.exact.save()
+            if self.binary is not None:
+                self.binary.save(binary_path(self.index_file))
+            else:
+                binary_path(self.index_file).unlink(missing_ok=True)
+            if self.sections is not None:
+                self.sections.save(chunks_path(self.index_file))
+            else:
+                SectionIndex.delete(chunks_path(self.index_file))
             
             # Save metadata
             with open(self.metadata_file, 'wb') as f:
@@ -253,6 +403,117 @@ class ResumeEmbeddingStore:
             logger.error(f"Error saving index: {e}")
             return False
     
+    def _ensure_writable(self):
+        """Copy a memory-mapped index into memory before mutating it."""
+        if not self._index_writable:
+            self.index = to_writable(self.index)
+            self._index_writable = True
+    
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Normalized float32 embeddings of texts, shape (len(texts), dim)."""
+        embeddings = np.asarray(
+            self.sentence_transformer.encode(texts, convert_to_tensor=False),
+            dtype=np.float32,
+        ).reshape(len(texts), -1)
+        return embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+    
+    def _resume_id_at(self, faiss_idx: int) -> Optional[str]:
+        if self._ids_by_index is None:
+            self._ids_by_index = {
+                metadata['faiss_index']: rid
+                for rid, metadata in self.resume_metadata.items()
+            }
+        return self._ids_by_index.get(faiss_idx)
+    
+    def _vectors(self, ids: np.ndarray) -> np.ndarray:
+        """Float vectors of the given index ids (exact copies when available)."""
+        if self.exact is not None:
+            return self.exact.rows(ids)
+        return self.index.reconstruct_batch(np.asarray(ids, dtype=np.int64))
+    
+    def _prefilter(self) -> BinaryPrefilter:
+        """The sign-code prefilter, built from the stored vectors if missing."""
+        if self.binary is None:
+            binary = BinaryPrefilter(self.embedding_dim)
+            total = self.index.ntotal
+            for start in range(0, total, 65536):
+                binary.add(self._vectors(np.arange(start, min(start + 65536, total))))
+            self.binary = binary
+            logger.info(f"Built binary prefilter over {total} resumes")
+        return self.binary
+    
+    def _section_index(self) -> SectionIndex:
+        """The chunk index, backfilled from stored texts and sections if missing."""
+        if self.sections is None:
+            sections = SectionIndex(self.embedding_dim)
+            ordered = sorted(self.resume_metadata.values(), key=lambda m: m['faiss_index'])
+            for metadata in ordered:
+                chunks = section_chunks(metadata.get('sections'), metadata.get('resume_text', ''))
+                metadata['section_chunks'] = len(chunks)
+                if chunks:
+                    sections.add(
+                        metadata['faiss_index'],
+                        [name for name, _ in chunks],
+                        self._encode([text for _, text in chunks]),
+                    )
+            self.sections = sections
+            logger.info(f"Built section index with {sections.ntotal} chunks over {len(ordered)} resumes")
+        return self.sections
+    
+    def _load_sections(self):
+        """Map the saved chunk index if it covers exactly the stored resumes."""
+        sections = SectionIndex.load(chunks_path(self.index_file), self.embedding_dim)
+        # 旧版本保存的简历没有 section_chunks 记录，需整体重建
+        chunked = [m.get('section_chunks') for m in self.resume_metadata.values()]
+        indexed = {
+            m['faiss_index'] for m in self.resume_metadata.values() if m.get('section_chunks')
+        }
+        if sections is not None and (None in chunked or sections.documents() != indexed):
+            sections = None
+        self.sections = sections
+    
+    def _load_binary(self):
+        """Map a saved prefilter if it still matches the index."""
+        self.binary = None
+        path = binary_path(self.index_file)
+        if path.exists():
+            binary = BinaryPrefilter.load(path, self.embedding_dim)
+            if binary.ntotal == self.index.ntotal:
+                self.binary = binary
+    
+    def _use_rescore(self, rescore: Optional[bool]) -> bool:
+        if rescore is None:
+            rescore = CONFIG.EMBEDDING_STORE.RESCORE
+        return rescore and self.exact is not None
+    
+    def _open_exact(self, reset: bool = False):
+        """Attach the float32 side file of a compact index (flat indexes need none)."""
+        self.exact = None
+        if self.storage == "flat":
+            return
+        exact = ExactVectors(exact_path(self.index_file), self.embedding_dim)
+        if reset:
+            exact.reset()
+        if len(exact) != self.index.ntotal:
+            logger.warning(
+                f"{exact.path} holds {len(exact)} vectors but the index has "
+                f"{self.index.ntotal}; exact rescoring disabled until the index is rebuilt"
+            )
+            return
+        self.exact = exact
+    
+    def _validate_model_dim(self):
+        """Fail fast when the encoder does not produce ``embedding_dim`` vectors."""
+        get_dim = getattr(
+            self.sentence_transformer, "get_sentence_embedding_dimension", None
+        )
+        model_dim = get_dim() if callable(get_dim) else None
+        if model_dim is not None and model_dim != self.embedding_dim:
+            raise ValueError(
+                f"Embedding model produces {model_dim}-dim vectors, "
+                f"but the store expects {self.embedding_dim}"
+            )
+    
     def _load_index(self) -> bool:
         """
         Load existing index from disk.
@@ -263,11 +524,23 @@ class ResumeEmbeddingStore:
         try:
             if self.index_file.exists() and self.metadata_file.exists():
                 # Load FAISS index
-                self.index = faiss.read_index(str(self.index_file))
+                index = read_index_mmap(self.index_file)
+                if index.d != self.embedding_dim:
+                    raise IndexDimensionError(
+                        f"{self.index_file} holds {index.d}-dim vectors, "
+                        f"but the store expects {self.embedding_dim}"
+                    )
+                self.index = index
+                self._index_writable = False
+                self.storage = index_storage(index)
+                self._open_exact()
+                self._load_binary()
+                self._ids_by_index = None
                 
                 # Load metadata
                 with open(self.metadata_file, 'rb') as f:
                     self.resume_metadata = pickle.load(f)
+                self._load_sections()
                 
                 # Update counters
                 self.resume_count = self.index.ntotal
@@ -283,12 +556,20 @@ class ResumeEmbeddingStore:
                 return True
             else:
                 logger.info("No existing index found, starting fresh")
+                self._open_exact(reset=True)
                 return False
                 
+        except IndexDimensionError:
+            # 不回退为空索引，避免下次 save_index 覆盖由其他模型构建的数据
+            raise
         except Exception as e:
             logger.error(f"Error loading index: {e}")
             # Reset to empty state on error
-            self.index = faiss.IndexFlatIP(self.embedding_dim)
+            self.index = new_index(self.embedding_dim, self.storage)
+            self._index_writable = True
+            self._open_exact(reset=True)
+            self.binary = None
+            self.sections = SectionIndex(self.embedding_dim)
             self.resume_metadata = {}
             self.resume_count = 0
             self.last_added_timestamp = None
@@ -298,23 +579,38 @@ class ResumeEmbeddingStore:
         """Rebuild the FAISS index from current metadata."""
         try:
             # Create new index
-            new_index = faiss.IndexFlatIP(self.embedding_dim)
+            rebuilt = new_index(self.embedding_dim, self.storage)
+            exact = None
+            if self.storage != "flat":
+                exact = ExactVectors(exact_path(self.index_file), self.embedding_dim)
+                exact.reset()
+            
+            sections = SectionIndex(self.embedding_dim)
             
             # Re-add all resumes
             for resume_id, metadata in self.resume_metadata.items():
-                # Re-generate embedding from text
-                embedding = self.sentence_transformer.encode(
-                    metadata['resume_text'], convert_to_tensor=False
+                # Re-generate embeddings from text and sections
+                chunks = section_chunks(metadata.get('sections'), metadata['resume_text'])
+                embeddings = self._encode(
+                    [metadata['resume_text']] + [text for _, text in chunks]
                 )
-                embedding = embedding / np.linalg.norm(embedding)
-                embedding = embedding.reshape(1, -1).astype(np.float32)
+                embedding = embeddings[:1]
                 
                 # Update faiss_index in metadata
-                metadata['faiss_index'] = new_index.ntotal
-                new_index.add(embedding)
+                metadata['faiss_index'] = rebuilt.ntotal
+                rebuilt.add(embedding)
+                if exact is not None:
+                    exact.append(embedding)
+                sections.add(metadata['faiss_index'], [name for name, _ in chunks], embeddings[1:])
+                metadata['section_chunks'] = len(chunks)
             
             # Replace old index
-            self.index = new_index
+            self.index = rebuilt
+            self._index_writable = True
+            self.exact = exact
+            self.binary = None
+            self.sections = sections
+            self._ids_by_index = None
             
             logger.info(f"Successfully rebuilt index with {self.get_resume_count()} resumes")
             
@@ -334,6 +630,10 @@ class ResumeEmbeddingStore:
             'index_size_mb': self._get_index_size(),
             'last_added': self.last_added_timestamp,
             'embedding_dim': self.embedding_dim,
+            'storage': self.storage,
+            'bytes_per_vector': bytes_per_vector(self.index),
+            'exact_rescoring': self.exact is not None,
+            'section_chunks': self.sections.ntotal if self.sections is not None else None,
             'users_with_resumes': len(set(
                 m.get('user_id') for m in self.resume_metadata.values() 
                 if m.get('user_id')
@@ -417,6 +717,7 @@ class ResumeEmbeddingStore:
         """
         return list(self.resume_metadata.keys())
     
+    @synchronized
     def clear_index(self) -> bool:
         """
         Clear all resumes from the index.
@@ -425,7 +726,12 @@ class ResumeEmbeddingStore:
             bool: True if successfully cleared
         """
         try:
-            self.index = faiss.IndexFlatIP(self.embedding_dim)
+            self.index = new_index(self.embedding_dim, self.storage)
+            self._index_writable = True
+            self._open_exact(reset=True)
+            self.binary = None
+            self.sections = SectionIndex(self.embedding_dim)
+            self._ids_by_index = None
             self.resume_metadata = {}
             self.resume_count = 0
             self.last_added_timestamp = None
@@ -435,6 +741,9 @@ class ResumeEmbeddingStore:
                 self.index_file.unlink()
             if self.metadata_file.exists():
                 self.metadata_file.unlink()
+            exact_path(self.index_file).unlink(missing_ok=True)
+            binary_path(self.index_file).unlink(missing_ok=True)
+            SectionIndex.delete(chunks_path(self.index_file))
             
             logger.info("Successfully cleared resume embedding index")
             return True
@@ -443,6 +752,7 @@ class ResumeEmbeddingStore:
             logger.error(f"Error clearing index: {e}")
             return False
     
+    @synchronized
     def search_resumes_by_user(self, user_id: str, query_embedding: np.ndarray, k: int = 10) -> List[Tuple[str, float]]:
         """
         Find similar resumes for a specific user.
@@ -0,0 +1,263 @@
+"""
+Section-level multi-vector index of resumes with late-interaction scoring.
+
+A whole-resume embedding only sees the first ~128 tokens the encoder keeps.
+Here every parsed section is split into encoder-sized chunks and each chunk
+gets its own vector; a resume is scored against a JD by the best matching
+chunks (max-sim) or by a weighted fusion of its per-section best matches.
+
+Chunks of one resume are stored contiguously, and within a resume the
+chunks of one section are contiguous, so per-resume and per-section maxima
+are single ``np.maximum.reduceat`` calls.
+"""
+
+import os
+import pickle
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import faiss
+import numpy as np
+from loguru import logger
+
+from resumix.config.config import Config
+from resumix.shared.utils.faiss_utils import read_index_mmap, to_writable, write_index_atomic
+from resumix.shared.utils.token_budget import heuristic_tokens, split_sentences
+
+CONFIG = Config().config
+
+FULL_TEXT = "full_text"
+
+
+def section_weights() -> Dict[str, float]:
+    """Configured section weights of the ``weighted`` aggregation."""
+    return {
+        name.lower(): float(weight)
+        for name, weight in vars(CONFIG.RESUME_SECTIONS.WEIGHTS).items()
+    }
+
+
+def section_text(value: Any) -> str:
+    """Plain text of a parsed section (str, list, dict or SectionBase)."""
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, dict):
+        return "\n".join(section_text(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return "\n".join(section_text(v) for v in value)
+    raw_text = getattr(value, "raw_text", None)
+    return raw_text if isinstance(raw_text, str) else str(value)
+
+
+def chunk_text(text: str, chunk_tokens: int) -> List[str]:
+    """Group consecutive sentences into chunks of at most ``chunk_tokens``."""
+    chunks, current, used = [], [], 0
+    for sentence in split_sentences(text):
+        tokens = heuristic_tokens(sentence)
+        if current and used + tokens > chunk_tokens:
+            chunks.append("\n".join(current))
+            current, used = [], 0
+        current.append(sentence)
+        used += tokens
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def section_chunks(
+    sections: Optional[Dict],
+    resume_text: str = "",
+    chunk_tokens: int = CONFIG.RESUME_SECTIONS.CHUNK_TOKENS,
+) -> List[Tuple[str, str]]:
+    """
+    (section name, chunk text) pairs of a resume, section by section.
+
+    Falls back to chunking ``resume_text`` when no section has text.
+    """
+    pairs = [
+        (str(name).lower(), chunk)
+        for name, value in (sections or {}).items()
+        for chunk in chunk_text(section_text(value), chunk_tokens)
+    ]
+    if not pairs:
+        pairs = [(FULL_TEXT, chunk) for chunk in chunk_text(resume_text, chunk_tokens)]
+    return pairs
+
+
+def late_interaction_scores(
+    query_vectors: np.ndarray,
+    chunk_vectors: np.ndarray,
+    owners: np.ndarray,
+    chunk_sections: Optional[Sequence[str]] = None,
+    aggregation: str = "max",
+    weights: Optional[Dict[str, float]] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Score documents from their chunk vectors.
+
+    Every query vector (one for a whole JD, several for JD sentences) takes
+    its best similarity within each group of chunks; scores are averaged
+    over the query vectors.
+
+    Args:
+        query_vectors: Normalized (dim,) or (q, dim) query
+        chunk_vectors: Normalized (c, dim) chunk vectors
+        owners: Document id of each chunk; a document's chunks are contiguous
+        chunk_sections: Section name of each chunk (needed for ``weighted``)
+        aggregation: ``max`` takes the best chunk of the document;
+            ``weighted`` averages the best chunk of each section with the
+            section weights, over the sections the document has
+        weights: Section weights of ``weighted``; ``default`` covers others
+
+    Returns:
+        (document ids in order of first appearance, scores)
+    """
+    query = np.atleast_2d(np.asarray(query_vectors, dtype=np.float32))
+    owners = np.asarray(owners)
+    if not len(owners):
+        return owners, np.empty(0, dtype=np.float32)
+
+    sims = np.asarray(chunk_vectors, dtype=np.float32) @ query.T
+    doc_starts = np.flatnonzero(np.r_[True, owners[1:] != owners[:-1]])
+    docs = owners[doc_starts]
+    if aggregation == "max":
+        return docs, np.maximum.reduceat(sims, doc_starts, axis=0).mean(axis=1)
+    if aggregation != "weighted":
+        raise ValueError(f"Unknown aggregation {aggregation!r}, expected max or weighted")
+
+    weights = section_weights() if weights is None else weights
+    sections = np.asarray(chunk_sections)
+    boundary = (owners[1:] != owners[:-1]) | (sections[1:] != sections[:-1])
+    seg_starts = np.flatnonzero(np.r_[True, boundary])
+    seg_best = np.maximum.reduceat(sims, seg_starts, axis=0).mean(axis=1)
+    seg_weights = np.array(
+        [weights.get(name, weights.get("default", 0.0)) for name in sections[seg_starts]],
+        dtype=np.float32,
+    )
+    seg_docs = np.searchsorted(doc_starts, seg_starts, side="right") - 1
+
+    weighted = np.bincount(seg_docs, seg_best * seg_weights, minlength=len(docs))
+    total = np.bincount(seg_docs, seg_weights, minlength=len(docs))
+    # 所有段落权重为 0 时退回 max-sim
+    best = np.maximum.reduceat(seg_best, np.searchsorted(seg_starts, doc_starts))
+    scores = np.where(total > 0, weighted / np.where(total > 0, total, 1.0), best)
+    return docs, scores.astype(np.float32)
+
+
+def chunks_path(index_file: Union[str, Path]) -> Path:
+    """Chunk index of a store: ``<stem>.chunks.faiss`` next to it."""
+    index_file = Path(index_file)
+    return index_file.with_name(index_file.stem + ".chunks.faiss")
+
+
+class SectionIndex:
+    """
+    Chunk vectors of many documents with their owner ids and section names.
+    """
+
+    def __init__(self, dim: int, index=None):
+        self.dim = dim
+        self.index = faiss.IndexFlatIP(dim) if index is None else index
+        self._writable = index is None
+        self.owners: List[int] = []
+        self.sections: List[str] = []
+        self._ranges: Optional[Dict[int, Tuple[int, int]]] = None
+
+    @property
+    def ntotal(self) -> int:
+        return self.index.ntotal
+
+    def documents(self) -> set:
+        return set(self.owners)
+
+    def add(self, owner: int, sections: Sequence[str], vectors: np.ndarray):
+        """Append the chunks of one document."""
+        if not self._writable:
+            self.index = to_writable(self.index)
+            self._writable = True
+        self.index.add(np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim))
+        self.owners.extend([owner] * len(sections))
+        self.sections.extend(sections)
+        self._ranges = None
+
+    def search(
+        self,
+        query_vectors: np.ndarray,
+        k: int,
+        aggregation: str = CONFIG.RESUME_SECTIONS.AGGREGATION,
+        weights: Optional[Dict[str, float]] = None,
+        oversample: int = CONFIG.RESUME_SECTIONS.CHUNK_OVERSAMPLE,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Best ``k`` documents for a (multi-vector) query.
+
+        The chunk index proposes candidate documents (owners of the
+        ``k * oversample`` nearest chunks per query vector); each candidate
+        is then scored over all of its chunks with ``late_interaction_scores``.
+
+        Returns:
+            (owner ids, scores), best first
+        """
+        query = np.atleast_2d(np.asarray(query_vectors, dtype=np.float32))
+        if not self.ntotal:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        _, hits = self.index.search(query, min(self.ntotal, k * oversample))
+        owners = np.asarray(self.owners)
+        candidates = np.unique(owners[hits[hits >= 0]])
+        ranges = self._owner_ranges()
+        rows = np.concatenate(
+            [np.arange(*ranges[owner]) for owner in candidates]
+        )
+        docs, scores = late_interaction_scores(
+            query,
+            self.index.reconstruct_batch(rows),
+            owners[rows],
+            [self.sections[row] for row in rows],
+            aggregation=aggregation,
+            weights=weights,
+        )
+        order = np.argsort(-scores, kind="stable")[:k]
+        return docs[order], scores[order]
+
+    def save(self, path: Union[str, Path]):
+        path = Path(path)
+        write_index_atomic(self.index, path)
+        layout_path = path.with_suffix(".pkl")
+        tmp_path = f"{layout_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump({"owners": self.owners, "sections": self.sections}, f)
+        os.replace(tmp_path, layout_path)
+
+    @classmethod
+    def load(cls, path: Union[str, Path], dim: int) -> Optional["SectionIndex"]:
+        """Load a saved index; None when its files are missing or inconsistent."""
+        path = Path(path)
+        layout_path = path.with_suffix(".pkl")
+        if not path.exists() or not layout_path.exists():
+            return None
+        with open(layout_path, "rb") as f:
+            layout = pickle.load(f)
+        index = SectionIndex(dim, index=read_index_mmap(path))
+        index.owners, index.sections = layout["owners"], layout["sections"]
+        if not (index.ntotal == len(index.owners) == len(index.sections)):
+            logger.warning(f"[SectionIndex] {path} 与分块布局不一致，将重建")
+            return None
+        return index
+
+    @staticmethod
+    def delete(path: Union[str, Path]):
+        path = Path(path)
+        path.unlink(missing_ok=True)
+        path.with_suffix(".pkl").unlink(missing_ok=True)
+
+    def _owner_ranges(self) -> Dict[int, Tuple[int, int]]:
+        if self._ranges is None:
+            ranges: Dict[int, Tuple[int, int]] = {}
+            for row, owner in enumerate(self.owners):
+                start, _ = ranges.get(owner, (row, row))
+                ranges[owner] = (start, row + 1)
+            self._ranges = ranges
+        return self._ranges
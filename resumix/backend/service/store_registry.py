@@ -0,0 +1,71 @@
+"""
+Process-wide registry of embedding stores, one instance per index file.
+"""
+
+import threading
+from pathlib import Path
+from typing import Any, Dict, Tuple, Type, TypeVar
+
+from loguru import logger
+
+from resumix.backend.service.job_embedding_store import JobEmbeddingStore
+from resumix.backend.service.resume_embedding_store import ResumeEmbeddingStore
+
+# 与各 store 的 base_dir 一致：相对路径的 index_file 位于 backend/embeddings 下
+EMBEDDINGS_DIR = Path(__file__).parent.parent / "embeddings"
+
+StoreT = TypeVar("StoreT")
+
+
+class StoreRegistry:
+    """
+    Hand out one shared, lazily loaded store per (store class, index path).
+
+    Every component asking for the same index gets the same object, so the
+    index is read from disk once per process, lives in memory once, and all
+    writers go through the store's own lock instead of overwriting each
+    other's ``save_index``.
+    """
+
+    _stores: Dict[Tuple[type, str], Any] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls, store_cls: Type[StoreT], index_file: str, **kwargs) -> StoreT:
+        """
+        Return the shared store for ``index_file``, loading it on first use.
+
+        Args:
+            store_cls: JobEmbeddingStore, ResumeEmbeddingStore or compatible class
+            index_file: Index file name (relative to backend/embeddings) or path
+            **kwargs: Extra constructor arguments used on first creation
+
+        Returns:
+            The shared store instance
+        """
+        key = (store_cls, str((EMBEDDINGS_DIR / index_file).resolve()))
+        store = cls._stores.get(key)
+        if store is not None:
+            return store
+
+        with cls._lock:
+            if key not in cls._stores:
+                logger.info(f"[StoreRegistry] 加载 {store_cls.__name__}: {key[1]}")
+                cls._stores[key] = store_cls(index_file=index_file, **kwargs)
+            return cls._stores[key]
+
+    @classmethod
+    def job_store(cls, index_file: str = "job_embeddings.faiss") -> JobEmbeddingStore:
+        return cls.get(JobEmbeddingStore, index_file)
+
+    @classmethod
+    def resume_store(
+        cls, index_file: str = "resume_embeddings.faiss"
+    ) -> ResumeEmbeddingStore:
+        return cls.get(ResumeEmbeddingStore, index_file)
+
+    @classmethod
+    def clear(cls):
+        """Drop all registered stores (the next ``get`` reloads from disk)."""
+        with cls._lock:
+            cls._stores.clear()
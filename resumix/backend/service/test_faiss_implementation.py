@@ -71,6 +71,19 @@ class TestJobEmbeddingStore(unittest.TestCase):
         job_ids = [job_id for job_id, _ in similar_jobs]
         self.assertIn("job1", job_ids)
         self.assertIn("job3", job_ids)
+    
+    def test_add_after_mmap_reload(self):
+        """Test that a memory-mapped index is copied before new jobs are added."""
+        self.job_store.add_job_description("job1", "Python developer", {})
+        self.job_store.save_index()
+        
+        reloaded = JobEmbeddingStore(
+            index_file=str(Path(self.temp_dir) / "test_job_embeddings.faiss")
+        )
+        self.assertEqual(reloaded.get_job_count(), 1)
+        self.assertTrue(reloaded.add_job_description("job2", "Java developer", {}))
+        self.assertEqual(reloaded.get_job_count(), 2)
+        self.assertTrue(reloaded.save_index())
 
 
 class TestResumeEmbeddingStore(unittest.TestCase):
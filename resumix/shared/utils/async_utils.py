@@ -1,4 +1,5 @@
 # utils/async_utils.py
+import functools
 from concurrent.futures import ThreadPoolExecutor
 from threading import Lock
 
@@ -10,3 +11,16 @@ def run_async(func, *args, **kwargs):
     with _lock:
         future = _executor.submit(func, *args, **kwargs)
         return future
+
+
+def synchronized(method):
+    """
+    在实例的 ``self.lock``（可重入锁）下执行方法，供被多个组件共享的对象使用。
+    """
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+
+    return wrapper
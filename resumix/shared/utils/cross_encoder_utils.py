@@ -0,0 +1,73 @@
+from pathlib import Path
+from sentence_transformers import CrossEncoder
+import threading
+from typing import Dict, Optional
+from resumix.config.config import Config
+from resumix.shared.utils.logger import logger
+from resumix.shared.utils.sentence_transformer_utils import model_memory_bytes
+
+CONFIG = Config().config
+
+
+class CrossEncoderUtils:
+    """
+    按模型 id 缓存的 CrossEncoder 注册表，用于候选人精排（JD, 简历）成对打分。
+    """
+
+    _models: Dict[str, CrossEncoder] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_instance(
+        cls,
+        model_name: Optional[str] = None,
+        model_path: Optional[str] = None,
+    ):
+        """
+        获取（必要时加载）指定的 CrossEncoder。
+
+        参数：
+            model_name: 模型 id，默认使用 cross_encoder.use_model
+            model_path: 加载来源；默认模型在 cross_encoder.directory 存在时从本地加载，
+                否则交给 CrossEncoder（本地缓存或 HuggingFace）
+
+        返回：
+            共享的 CrossEncoder 实例
+        """
+        model_name = model_name or CONFIG.CROSS_ENCODER.USE_MODEL
+
+        model = cls._models.get(model_name)
+        if model is not None:
+            return model
+
+        with cls._lock:  # 确保线程安全
+            if model_name not in cls._models:
+                if model_path is None:
+                    directory = CONFIG.CROSS_ENCODER.DIRECTORY
+                    model_path = (
+                        directory
+                        if model_name == CONFIG.CROSS_ENCODER.USE_MODEL
+                        and Path(directory).exists()
+                        else model_name
+                    )
+                model = CrossEncoder(model_path, max_length=CONFIG.CROSS_ENCODER.MAX_LENGTH)
+                cls._models[model_name] = model
+                logger.info(
+                    f"[CrossEncoder] 加载模型 {model_name} (来源 {model_path}): "
+                    f"{model_memory_bytes(model) / 2**20:.1f} MB"
+                )
+            return cls._models[model_name]
+
+    @classmethod
+    def register(cls, model_name: str, model):
+        """注册已构建的模型（如量化模型或测试替身）。"""
+        with cls._lock:
+            cls._models[model_name] = model
+
+    @classmethod
+    def unload(cls, model_name: Optional[str] = None):
+        """卸载指定模型；不指定时卸载全部。"""
+        with cls._lock:
+            names = [model_name] if model_name else list(cls._models)
+            for name in names:
+                cls._models.pop(name, None)
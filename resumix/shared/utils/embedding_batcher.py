@@ -0,0 +1,230 @@
+"""
+In-process micro-batching of concurrent ``encode`` calls.
+
+Parser threads, Streamlit sessions and API workers mostly embed one string
+at a time. Each such call is a separate forward pass with a batch of one;
+the batcher queues them, and a single worker thread encodes whatever
+arrived within ``max_latency_ms`` (up to ``max_batch_size`` texts) in one
+call, resolving one future per request.
+"""
+
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+from loguru import logger
+
+from resumix.config.config import Config
+from resumix.shared.utils.sentence_transformer_utils import SentenceTransformerUtils
+
+CONFIG = Config().config
+
+
+@dataclass
+class _Request:
+    text: str
+    future: Future
+    enqueued: float
+
+
+def _bucket(size: int) -> str:
+    """Power-of-two histogram bucket: 1, 2-3, 4-7, 8-15, ..."""
+    low = 1 << (size.bit_length() - 1)
+    return str(low) if low == 1 else f"{low}-{2 * low - 1}"
+
+
+class EmbeddingBatcher:
+    """
+    Coalesce concurrent single-text ``encode`` calls into micro-batches.
+
+    One batcher exists per model id (see ``get_instance``). With
+    ``enabled=False`` calls are encoded directly in the calling thread.
+    """
+
+    _instances: Dict[str, "EmbeddingBatcher"] = {}
+    _lock = threading.Lock()
+
+    def __init__(
+        self,
+        model,
+        max_batch_size: int = CONFIG.EMBEDDING_BATCHER.MAX_BATCH_SIZE,
+        max_latency_ms: float = CONFIG.EMBEDDING_BATCHER.MAX_LATENCY_MS,
+        enabled: bool = CONFIG.EMBEDDING_BATCHER.ENABLED,
+    ):
+        """
+        Initialize the EmbeddingBatcher.
+
+        Args:
+            model: Encoder with a SentenceTransformer-compatible ``encode``
+            max_batch_size: Most texts encoded in one call
+            max_latency_ms: Longest a request waits for others to join its batch
+            enabled: Batch across threads; False encodes in the caller
+        """
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency_ms / 1000
+        self.enabled = enabled
+
+        self._queue: "queue.Queue[_Request]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._batch_sizes: Counter = Counter()
+        self._queue_depths: Counter = Counter()
+        self._requests = 0
+        self._wait_seconds = 0.0
+
+    @classmethod
+    def get_instance(cls, model_name: Optional[str] = None) -> "EmbeddingBatcher":
+        """
+        Return the shared batcher of a model (see SentenceTransformerUtils).
+
+        Args:
+            model_name: Model id, default sentence_transformer.use_model
+        """
+        model_name = model_name or CONFIG.SENTENCE_TRANSFORMER.USE_MODEL
+        batcher = cls._instances.get(model_name)
+        if batcher is not None:
+            return batcher
+
+        with cls._lock:
+            if model_name not in cls._instances:
+                cls._instances[model_name] = cls(
+                    SentenceTransformerUtils.get_instance(model_name)
+                )
+            return cls._instances[model_name]
+
+    def submit(self, text: str) -> Future:
+        """
+        Queue one text for the next micro-batch.
+
+        Returns:
+            Future resolving to its float32 embedding of shape (dim,)
+        """
+        if not self.enabled:
+            future = Future()
+            try:
+                future.set_result(self._encode([text])[0])
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        self._ensure_worker()
+        future = Future()
+        self._queue.put(_Request(text, future, time.perf_counter()))
+        return future
+
+    def encode(
+        self,
+        sentences: Union[str, Sequence[str]],
+        normalize_embeddings: bool = False,
+        timeout: Optional[float] = None,
+    ) -> np.ndarray:
+        """
+        Encode through the batcher and wait for the result.
+
+        Args:
+            sentences: One text or a list of texts
+            normalize_embeddings: L2-normalize the embeddings
+            timeout: Seconds to wait per text (None: no limit)
+
+        Returns:
+            float32 array of shape (dim,) for one text, (n, dim) for a list
+        """
+        single = isinstance(sentences, str)
+        futures = [self.submit(text) for text in ([sentences] if single else sentences)]
+        embeddings = np.stack([future.result(timeout) for future in futures])
+        if normalize_embeddings:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.maximum(norms, 1e-12)
+        return embeddings[0] if single else embeddings
+
+    def stats(self) -> Dict:
+        """
+        Snapshot of the batcher's load.
+
+        Returns:
+            Dict with the current queue depth, request/batch counts, mean
+            batch size, mean queue wait and histograms of batch sizes and of
+            the queue depth seen when each batch started
+        """
+        with self._stats_lock:
+            batches = sum(self._batch_sizes.values())
+            return {
+                "queue_depth": self._queue.qsize(),
+                "requests": self._requests,
+                "batches": batches,
+                "mean_batch_size": self._requests / batches if batches else 0.0,
+                "mean_wait_ms": (
+                    self._wait_seconds * 1000 / self._requests if self._requests else 0.0
+                ),
+                "batch_size_histogram": self._histogram(self._batch_sizes),
+                "queue_depth_histogram": self._histogram(self._queue_depths),
+            }
+
+    @staticmethod
+    def _histogram(counts: Counter) -> Dict[str, int]:
+        histogram: Counter = Counter()
+        for size, count in counts.items():
+            histogram[_bucket(size)] += count
+        return dict(sorted(histogram.items(), key=lambda item: int(item[0].split("-")[0])))
+
+    def _ensure_worker(self):
+        if self._worker is not None:
+            return
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run, name="embedding-batcher", daemon=True
+                )
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            depth = self._queue.qsize() + 1
+            deadline = batch[0].enqueued + self.max_latency
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    batch.append(
+                        self._queue.get(timeout=remaining)
+                        if remaining > 0
+                        else self._queue.get_nowait()
+                    )
+                except queue.Empty:
+                    break
+            self._process(batch, depth)
+
+    def _process(self, batch: List[_Request], depth: int):
+        started = time.perf_counter()
+        with self._stats_lock:
+            self._batch_sizes[len(batch)] += 1
+            self._queue_depths[depth] += 1
+            self._requests += len(batch)
+            self._wait_seconds += sum(started - r.enqueued for r in batch)
+
+        # 同一批内的重复文本只编码一次
+        unique = list(dict.fromkeys(r.text for r in batch))
+        try:
+            embeddings = self._encode(unique)
+        except Exception as e:
+            logger.warning(f"[EmbeddingBatcher] 批量编码失败 ({len(batch)} 条): {e}")
+            for request in batch:
+                request.future.set_exception(e)
+            return
+
+        rows = {text: row for row, text in enumerate(unique)}
+        for request in batch:
+            request.future.set_result(embeddings[rows[request.text]])
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        return np.asarray(
+            self.model.encode(texts, batch_size=len(texts), convert_to_numpy=True),
+            dtype=np.float32,
+        )
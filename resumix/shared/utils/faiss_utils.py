@@ -0,0 +1,388 @@
+"""
+Memory-mapped FAISS index loading shared by the retriever and embedding stores,
+plus compact (float16 / 8-bit) vector storage with exact float32 rescoring.
+"""
+
+import os
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence, Tuple, Union
+
+import faiss
+import numpy as np
+from loguru import logger
+
+from resumix.config.config import Config
+
+CONFIG = Config().config
+
+# IO_FLAG_MMAP_IFC 直接映射 Flat 类索引的向量；旧版 faiss 只对倒排表生效
+MMAP_FLAGS = (
+    getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+)
+
+
+class IndexDimensionError(ValueError):
+    """An index on disk was built with a different embedding dimension."""
+
+
+def read_index_mmap(
+    path: Union[str, Path], binary: bool = False, mmap: bool = CONFIG.FAISS.MMAP
+):
+    """
+    Load an index with its vectors memory-mapped from disk.
+
+    Mapped pages live in the OS page cache, so every worker process loading
+    the same file shares one copy and loading does not read the vectors.
+    The returned index is read-only: adding to it aborts the process, so
+    callers must go through ``to_writable`` before any mutation.
+
+    Args:
+        path: Index file
+        binary: Read with ``read_index_binary``
+        mmap: Map the file; False reads it into the heap
+
+    Returns:
+        faiss index (heap copy if mapping is unsupported for this index type)
+    """
+    reader = faiss.read_index_binary if binary else faiss.read_index
+    if not mmap:
+        return reader(str(path))
+    try:
+        return reader(str(path), MMAP_FLAGS)
+    except RuntimeError as e:
+        logger.warning(f"[FAISS] mmap 加载失败，改为读入内存: {path} ({e})")
+        return reader(str(path))
+
+
+def to_writable(index, binary: bool = False):
+    """Heap copy of an index that may be backed by a read-only mapping."""
+    if binary:
+        return faiss.deserialize_index_binary(faiss.serialize_index_binary(index))
+    return faiss.deserialize_index(faiss.serialize_index(index))
+
+
+def write_index_atomic(index, path: Union[str, Path], binary: bool = False):
+    """
+    Write to a temporary file and rename it over ``path``.
+
+    Processes that still map the old file keep a valid view of its inode
+    instead of reading a file truncated underneath them.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    writer = faiss.write_index_binary if binary else faiss.write_index
+    writer(index, tmp_path)
+    os.replace(tmp_path, str(path))
+
+
+# 每个向量的存储方式：flat 为 float32 原值，fp16 / sq8 为 IndexScalarQuantizer 编码
+STORAGE_TYPES = {
+    "flat": None,
+    "fp16": faiss.ScalarQuantizer.QT_fp16,
+    "sq8": faiss.ScalarQuantizer.QT_8bit,
+}
+
+
+def new_index(
+    dim: int,
+    storage: str = "flat",
+    sq8_range: float = CONFIG.EMBEDDING_STORE.SQ8_RANGE,
+):
+    """
+    Empty inner-product index with the requested vector storage.
+
+    ``sq8`` is trained on the fixed range ``[-sq8_range, sq8_range]`` per
+    dimension rather than on data, so an empty store can accept vectors
+    immediately. Components of unit-normalized embeddings of a few hundred
+    dimensions stay well inside ±0.5; larger values are clipped.
+
+    Args:
+        dim: Vector dimension
+        storage: ``flat`` (float32), ``fp16`` or ``sq8``
+        sq8_range: Quantization range of ``sq8``
+
+    Returns:
+        IndexFlatIP or IndexScalarQuantizer
+    """
+    if storage not in STORAGE_TYPES:
+        raise ValueError(f"Unknown vector storage {storage!r}, expected one of {list(STORAGE_TYPES)}")
+    if storage == "flat":
+        return faiss.IndexFlatIP(dim)
+
+    index = faiss.IndexScalarQuantizer(
+        dim, STORAGE_TYPES[storage], faiss.METRIC_INNER_PRODUCT
+    )
+    if not index.is_trained:
+        bounds = np.array([[-sq8_range] * dim, [sq8_range] * dim], dtype=np.float32)
+        index.train(bounds)
+    return index
+
+
+def index_storage(index) -> str:
+    """Storage name of an index created by ``new_index`` (``flat`` otherwise)."""
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexScalarQuantizer):
+        for name, qtype in STORAGE_TYPES.items():
+            if qtype == index.sq.qtype:
+                return name
+    return "flat"
+
+
+def bytes_per_vector(index) -> int:
+    """Stored bytes per vector (code size), e.g. 1536 for 384-d float32."""
+    return int(getattr(faiss.downcast_index(index), "code_size", 4 * index.d))
+
+
+def exact_path(index_file: Union[str, Path]) -> Path:
+    """Float32 side file of a compact index: ``<stem>.f32.npy`` next to it."""
+    index_file = Path(index_file)
+    return index_file.with_name(index_file.stem + ".f32.npy")
+
+
+class ExactVectors:
+    """
+    Float32 copies of a compact index's vectors, row i = index id i.
+
+    The saved rows are memory mapped from a ``.npy`` side file, so they cost
+    no heap and are only paged in for the candidates being rescored; rows
+    added since the last ``save`` are kept in memory.
+    """
+
+    def __init__(self, path: Union[str, Path], dim: int):
+        self.path = Path(path)
+        self.dim = dim
+        self._pending: List[np.ndarray] = []
+        self._pending_rows: Optional[np.ndarray] = None
+        self._mapped = self._open()
+        self._dirty = False
+
+    def __len__(self) -> int:
+        return len(self._mapped) + sum(len(rows) for rows in self._pending)
+
+    def append(self, vectors: np.ndarray):
+        self._pending.append(np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim))
+        self._pending_rows = None
+        self._dirty = True
+
+    def reset(self):
+        """Drop all rows (the side file is replaced on the next ``save``)."""
+        self._mapped = np.empty((0, self.dim), dtype=np.float32)
+        self._pending = []
+        self._pending_rows = None
+        self._dirty = True
+
+    def rows(self, ids: Sequence[int]) -> np.ndarray:
+        ids = np.asarray(ids, dtype=np.int64)
+        saved = len(self._mapped)
+        out = np.empty((len(ids), self.dim), dtype=np.float32)
+        in_file = ids < saved
+        out[in_file] = self._mapped[ids[in_file]]
+        if not in_file.all():
+            if self._pending_rows is None:
+                self._pending_rows = np.concatenate(self._pending)
+            out[~in_file] = self._pending_rows[ids[~in_file] - saved]
+        return out
+
+    def save(self):
+        """Write all rows atomically and map the new file."""
+        if not self._dirty:
+            return
+        rows = np.concatenate([self._mapped, *self._pending])
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, rows)
+        os.replace(tmp_path, self.path)
+        self._pending = []
+        self._pending_rows = None
+        self._mapped = self._open()
+        self._dirty = False
+
+    def _open(self) -> np.ndarray:
+        if not self.path.exists():
+            return np.empty((0, self.dim), dtype=np.float32)
+        return np.load(self.path, mmap_mode="r")
+
+
+def sentences_path(index_file: Union[str, Path]) -> Path:
+    """Per-sentence vectors of an index: ``<stem>.sentences.npy`` next to it."""
+    index_file = Path(index_file)
+    return index_file.with_name(index_file.stem + ".sentences.npy")
+
+
+class SegmentedVectors:
+    """
+    Variable-length groups of float32 vectors, group i = index id i.
+
+    Rows are kept in a memory-mapped ``ExactVectors`` file; the int64 offsets
+    table (``offsets[i]:offsets[i + 1]`` are the rows of group i) is saved
+    next to it as ``<name>.offsets.npy``.
+    """
+
+    def __init__(self, path: Union[str, Path], dim: int):
+        self.vectors = ExactVectors(path, dim)
+        self.offsets_path = Path(path).with_suffix(".offsets.npy")
+        self.offsets: List[int] = (
+            np.load(self.offsets_path).tolist() if self.offsets_path.exists() else [0]
+        )
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def num_rows(self) -> int:
+        return self.offsets[-1]
+
+    def consistent(self) -> bool:
+        """Whether the offsets table describes exactly the stored rows."""
+        return self.offsets[-1] == len(self.vectors)
+
+    def append(self, vectors: np.ndarray):
+        """Add one group (possibly empty)."""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.vectors.dim)
+        self.vectors.append(vectors)
+        self.offsets.append(self.offsets[-1] + len(vectors))
+
+    def group(self, i: int) -> np.ndarray:
+        return self.vectors.rows(np.arange(self.offsets[i], self.offsets[i + 1]))
+
+    def reset(self):
+        self.vectors.reset()
+        self.offsets = [0]
+
+    def save(self):
+        self.vectors.save()
+        tmp_path = f"{self.offsets_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, np.asarray(self.offsets, dtype=np.int64))
+        os.replace(tmp_path, self.offsets_path)
+
+    def delete(self):
+        self.vectors.path.unlink(missing_ok=True)
+        self.offsets_path.unlink(missing_ok=True)
+
+
+def rescore_exact(
+    query: np.ndarray, ids: Sequence[int], exact: ExactVectors, k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Re-rank candidate ids by exact float32 inner product with ``query``.
+
+    Args:
+        query: Normalized query vector of shape (dim,) or (1, dim)
+        ids: Candidate ids from the compact index (-1 entries are ignored)
+        exact: Float32 vectors of the index
+        k: Number of results to keep
+
+    Returns:
+        (scores, ids) of the best ``k`` candidates, best first
+    """
+    ids = np.asarray(ids, dtype=np.int64)
+    return _rank(query, ids[ids >= 0], exact.rows, k)
+
+
+def _rank(query: np.ndarray, ids: np.ndarray, vectors, k: int):
+    if not len(ids):
+        return np.empty(0, dtype=np.float32), ids
+    scores = vectors(ids) @ np.asarray(query, dtype=np.float32).reshape(-1)
+    order = np.argsort(-scores, kind="stable")[:k]
+    return scores[order], ids[order]
+
+
+def sign_codes(vectors: np.ndarray) -> np.ndarray:
+    """Pack the sign bit of every dimension: (n, dim) float -> (n, dim / 8) uint8."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return np.packbits(vectors.reshape(-1, vectors.shape[-1]) > 0, axis=1)
+
+
+def binary_path(index_file: Union[str, Path]) -> Path:
+    """Sign-code prefilter file of an index: ``<stem>.binary.faiss`` next to it."""
+    index_file = Path(index_file)
+    return index_file.with_name(index_file.stem + ".binary.faiss")
+
+
+class BinaryPrefilter:
+    """
+    First-stage candidate generation over sign-quantized vectors.
+
+    Each vector is reduced to one bit per dimension (48 bytes for 384-d) and
+    searched by Hamming distance with IndexBinaryFlat or IndexBinaryHNSW.
+    The candidates are then rescored with the float vectors, so only a few
+    thousand float rows are touched per query instead of the whole pool.
+    """
+
+    def __init__(
+        self,
+        dim: int,
+        kind: str = CONFIG.EMBEDDING_STORE.BINARY_INDEX,
+        hnsw_m: int = CONFIG.EMBEDDING_STORE.BINARY_HNSW_M,
+        index=None,
+    ):
+        """
+        Initialize the BinaryPrefilter.
+
+        Args:
+            dim: Float vector dimension (multiple of 8)
+            kind: ``flat`` (exhaustive Hamming scan) or ``hnsw``
+            hnsw_m: Graph degree of ``hnsw``
+            index: Existing binary index, e.g. loaded with ``load``
+        """
+        if dim % 8:
+            raise ValueError(f"Binary codes need a dimension divisible by 8, got {dim}")
+        if index is None:
+            if kind == "hnsw":
+                index = faiss.IndexBinaryHNSW(dim, hnsw_m)
+            elif kind == "flat":
+                index = faiss.IndexBinaryFlat(dim)
+            else:
+                raise ValueError(f"Unknown binary index {kind!r}, expected flat or hnsw")
+        self.index = index
+        self._writable = True
+
+    @classmethod
+    def load(cls, path: Union[str, Path], dim: int) -> "BinaryPrefilter":
+        prefilter = cls(dim, index=read_index_mmap(path, binary=True))
+        prefilter._writable = False
+        return prefilter
+
+    @property
+    def ntotal(self) -> int:
+        return self.index.ntotal
+
+    def add(self, vectors: np.ndarray):
+        if not self._writable:
+            self.index = to_writable(self.index, binary=True)
+            self._writable = True
+        self.index.add(sign_codes(vectors))
+
+    def save(self, path: Union[str, Path]):
+        write_index_atomic(self.index, path, binary=True)
+
+    def candidates(self, query: np.ndarray, n: int) -> np.ndarray:
+        """Ids of the ``n`` codes nearest to ``query`` in Hamming distance."""
+        n = min(n, self.ntotal)
+        hnsw = getattr(self.index, "hnsw", None)
+        if hnsw is not None and hnsw.efSearch < n:
+            # efSearch bounds how many results the graph search can return
+            hnsw.efSearch = n
+        _, ids = self.index.search(sign_codes(query), n)
+        return ids[0][ids[0] >= 0]
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int,
+        num_candidates: int,
+        vectors: Callable[[np.ndarray], np.ndarray],
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Hamming prefilter followed by exact inner-product rescoring.
+
+        Args:
+            query: Normalized float query (dim,) or (1, dim)
+            k: Number of results
+            num_candidates: Codes kept by the prefilter
+            vectors: Returns the float vectors of the given ids
+
+        Returns:
+            (scores, ids) of the best ``k`` candidates, best first
+        """
+        return _rank(query, self.candidates(query, num_candidates), vectors, k)
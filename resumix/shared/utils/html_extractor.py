@@ -0,0 +1,195 @@
+"""
+HTML -> text extraction on lxml, memoized by a hash of the HTML body.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional
+
+import lxml.html
+from loguru import logger
+from readability import Document
+
+from resumix.config.config import Config
+
+CONFIG = Config().config
+
+# 非正文区域，按块抽取时整体丢弃
+NOISE_TAGS = (
+    "script",
+    "style",
+    "noscript",
+    "footer",
+    "header",
+    "nav",
+    "form",
+    "meta",
+    "aside",
+)
+BLOCK_TAGS = ("p", "li", "div", "section")
+
+
+def _join_text(element, separator: str) -> str:
+    return separator.join(s.strip() for s in element.itertext() if s.strip())
+
+
+class HtmlExtractor:
+    """
+    Extract readable text from HTML, parsing with lxml only once per mode.
+
+    Results are memoized by ``sha256(mode + html)``: an in-memory LRU serves
+    repeated calls within a process and an optional on-disk cache is shared
+    across processes and runs, so re-crawling an unchanged posting skips
+    extraction entirely.
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls) -> "HtmlExtractor":
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        memory_cache_size: Optional[int] = None,
+        min_words: Optional[int] = None,
+    ):
+        """
+        Initialize the HtmlExtractor.
+
+        Args:
+            cache_dir: Directory for extracted text; empty string disables it
+            memory_cache_size: Entries kept in the in-memory LRU
+            min_words: Readability output shorter than this is discarded
+        """
+        settings = CONFIG.HTML_EXTRACTOR
+        cache_dir = settings.CACHE_DIR if cache_dir is None else cache_dir
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.memory_cache_size = memory_cache_size or settings.MEMORY_CACHE_SIZE
+        self.min_words = settings.MIN_WORDS if min_words is None else min_words
+
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._memory_lock = threading.Lock()
+
+    def extract(self, html: str) -> str:
+        """
+        Main article text via readability, one text line per text node.
+
+        Returns:
+            Extracted text, or an empty string if it is missing or too short
+        """
+        return self._memoized("readability", html, self._extract_readability)
+
+    def extract_blocks(self, html: str) -> str:
+        """
+        Text of every ``p``/``li``/``div``/``section`` block after noise removal.
+
+        Returns:
+            Newline-joined block texts
+        """
+        return self._memoized("blocks", html, self._extract_blocks)
+
+    def lookup(self, html: str, mode: str = "readability") -> Optional[str]:
+        """Cached result for this HTML, or None if it was never extracted."""
+        return self._get(self._key(mode, html))
+
+    def clear_cache(self):
+        with self._memory_lock:
+            self._memory.clear()
+        if self.cache_dir:
+            for path in self.cache_dir.glob("*.txt"):
+                path.unlink(missing_ok=True)
+
+    def _memoized(self, mode: str, html: str, extractor) -> str:
+        key = self._key(mode, html)
+        text = self._get(key)
+        if text is not None:
+            logger.info(f"[HtmlExtractor] 命中提取缓存: {key[:12]}")
+            return text
+
+        text = extractor(html)
+        self._put(key, text)
+        return text
+
+    def _extract_readability(self, html: str) -> str:
+        try:
+            summary_html = Document(html).summary(html_partial=True)
+            root = lxml.html.fragment_fromstring(summary_html, create_parent="div")
+            text = _join_text(root, "\n")
+        except Exception as e:
+            logger.warning(f"[HtmlExtractor] readability 提取失败: {e}")
+            return ""
+
+        if text and len(text.split()) > self.min_words:
+            return text
+        logger.warning("[HtmlExtractor] readability 提取内容为空或过短")
+        return ""
+
+    def _extract_blocks(self, html: str) -> str:
+        try:
+            root = lxml.html.document_fromstring(html)
+        except Exception as e:
+            logger.warning(f"[HtmlExtractor] HTML 解析失败: {e}")
+            return ""
+
+        for element in list(root.iter(*NOISE_TAGS)):
+            element.drop_tree()
+
+        text_lines: List[str] = []
+        for element in root.iter(*BLOCK_TAGS):
+            text = _join_text(element, "")
+            if text:
+                text_lines.append(text)
+        return "\n".join(text_lines)
+
+    def _key(self, mode: str, html: str) -> str:
+        digest = hashlib.sha256(mode.encode("utf-8"))
+        digest.update(html.encode("utf-8", errors="surrogatepass"))
+        return digest.hexdigest()
+
+    def _get(self, key: str) -> Optional[str]:
+        with self._memory_lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+
+        if not self.cache_dir:
+            return None
+        path = self.cache_dir / f"{key}.txt"
+        try:
+            text = path.read_text(encoding="utf-8")
+        except OSError:
+            return None
+        self._remember(key, text)
+        return text
+
+    def _put(self, key: str, text: str):
+        self._remember(key, text)
+        if not self.cache_dir:
+            return
+        path = self.cache_dir / f"{key}.txt"
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"[HtmlExtractor] 写入缓存失败: {e}")
+
+    def _remember(self, key: str, text: str):
+        with self._memory_lock:
+            self._memory[key] = text
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_cache_size:
+                self._memory.popitem(last=False)
@@ -0,0 +1,295 @@
+"""
+Pooled HTTP fetcher with an on-disk cache honoring validators and max-age.
+"""
+
+import codecs
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+import chardet
+import requests
+from requests.adapters import HTTPAdapter
+from loguru import logger
+
+from resumix.config.config import Config
+
+CONFIG = Config().config
+
+DEFAULT_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/115.0.0.0 Safari/537.36"
+    )
+}
+
+_CHARSET_RE = re.compile(r"charset=[\"']?([\w.:-]+)", re.IGNORECASE)
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)", re.IGNORECASE)
+
+
+@dataclass
+class HttpResponse:
+    url: str
+    status_code: int
+    content: bytes
+    headers: Dict[str, str] = field(default_factory=dict)
+    encoding: str = "utf-8"
+    from_cache: bool = False
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding, errors="replace")
+
+
+class HttpFetcher:
+    """
+    HTTP GET with a shared connection pool and a validator-aware disk cache.
+
+    Responses are stored per URL. A fresh entry (``Cache-Control: max-age`` or
+    the configured default TTL) is served without any network round-trip; a
+    stale entry with an ``ETag``/``Last-Modified`` is revalidated with a
+    conditional GET and reused on ``304 Not Modified``. The cache keeps at
+    most ``max_entries`` responses, evicting the least recently used ones.
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls) -> "HttpFetcher":
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        pool_size: Optional[int] = None,
+        timeout: Optional[int] = None,
+        default_max_age: Optional[int] = None,
+        chardet_sample_bytes: Optional[int] = None,
+        max_entries: Optional[int] = None,
+    ):
+        """
+        Initialize the HttpFetcher.
+
+        Args:
+            cache_dir: Directory for cached responses
+            pool_size: Connections kept alive per host
+            timeout: Request timeout in seconds
+            default_max_age: Freshness (seconds) when the server sends none
+            chardet_sample_bytes: Bytes sampled when charset detection is needed
+            max_entries: Maximum number of cached responses; least recently
+                used ones are evicted beyond it
+        """
+        settings = CONFIG.HTTP
+        self.cache_dir = Path(cache_dir or settings.CACHE_DIR)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.timeout = timeout or settings.TIMEOUT
+        self.default_max_age = (
+            settings.DEFAULT_MAX_AGE if default_max_age is None else default_max_age
+        )
+        self.chardet_sample_bytes = (
+            chardet_sample_bytes or settings.CHARDET_SAMPLE_BYTES
+        )
+        self.max_entries = max_entries or settings.CACHE_MAX_ENTRIES
+        self._prune_lock = threading.Lock()
+
+        pool_size = pool_size or settings.POOL_SIZE
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update(DEFAULT_HEADERS)
+
+    def fetch(self, url: str, timeout: Optional[int] = None) -> HttpResponse:
+        """
+        Fetch a URL, serving from or revalidating against the disk cache.
+
+        Raises:
+            requests.RequestException: On network errors or non-2xx responses
+        """
+        entry = self._read_entry(url)
+        if entry and self._is_fresh(entry):
+            logger.info(f"[HttpFetcher] 命中缓存(未过期): {url}")
+            return self._from_entry(url, entry)
+
+        conditional_headers = {}
+        if entry:
+            if entry.get("etag"):
+                conditional_headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                conditional_headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = self.session.get(
+            url, headers=conditional_headers, timeout=timeout or self.timeout
+        )
+
+        if response.status_code == 304 and entry:
+            logger.info(f"[HttpFetcher] 304 Not Modified，复用缓存: {url}")
+            entry.update(self._freshness(response.headers))
+            entry["fetched_at"] = time.time()
+            self._write_meta(url, entry)
+            return self._from_entry(url, entry)
+
+        response.raise_for_status()
+
+        encoding = self.detect_encoding(response.headers, response.content)
+        result = HttpResponse(
+            url=url,
+            status_code=response.status_code,
+            content=response.content,
+            headers=dict(response.headers),
+            encoding=encoding,
+        )
+        self._store(url, response, encoding)
+        return result
+
+    def fetch_text(self, url: str, timeout: Optional[int] = None) -> str:
+        return self.fetch(url, timeout=timeout).text
+
+    def detect_encoding(self, headers, content: bytes) -> str:
+        """
+        Charset from ``Content-Type`` first, then chardet over a bounded sample.
+
+        Unknown charset labels in the header are ignored.
+        """
+        match = _CHARSET_RE.search(headers.get("Content-Type", ""))
+        if match:
+            try:
+                codecs.lookup(match.group(1))
+                return match.group(1)
+            except LookupError:
+                logger.warning(
+                    f"[HttpFetcher] 未知的字符集 {match.group(1)}，改用 chardet 检测"
+                )
+
+        detected = chardet.detect(content[: self.chardet_sample_bytes])
+        return detected["encoding"] or "utf-8"
+
+    def clear_cache(self):
+        for path in self.cache_dir.glob("*"):
+            path.unlink(missing_ok=True)
+
+    def _is_fresh(self, entry: Dict) -> bool:
+        if entry.get("no_cache"):
+            return False
+        return time.time() - entry.get("fetched_at", 0) < entry.get("max_age", 0)
+
+    def _freshness(self, headers) -> Dict:
+        cache_control = headers.get("Cache-Control", "").lower()
+        # must-revalidate 只约束过期后的行为，未过期时仍可直接使用缓存
+        no_cache = "no-cache" in cache_control
+
+        match = _MAX_AGE_RE.search(cache_control)
+        if match:
+            max_age = int(match.group(1))
+        elif headers.get("Expires"):
+            try:
+                expires = parsedate_to_datetime(headers["Expires"]).timestamp()
+                max_age = max(0, int(expires - time.time()))
+            except (TypeError, ValueError):
+                max_age = 0
+        else:
+            max_age = self.default_max_age
+
+        return {"max_age": max_age, "no_cache": no_cache}
+
+    def _store(self, url: str, response: requests.Response, encoding: str):
+        if "no-store" in response.headers.get("Cache-Control", "").lower():
+            return
+
+        entry = {
+            "url": url,
+            "status_code": response.status_code,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "content_type": response.headers.get("Content-Type", ""),
+            "encoding": encoding,
+            "fetched_at": time.time(),
+        }
+        entry.update(self._freshness(response.headers))
+
+        try:
+            body_path = self._body_path(url)
+            tmp_path = f"{body_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(response.content)
+            os.replace(tmp_path, body_path)
+            self._write_meta(url, entry)
+        except OSError as e:
+            logger.warning(f"[HttpFetcher] 写入缓存失败: {e}")
+            return
+        self._prune_cache()
+
+    def _prune_cache(self):
+        """Evict the least recently used responses beyond ``max_entries``."""
+        with self._prune_lock:
+            entries = []
+            for meta_path in self.cache_dir.glob("*.json"):
+                try:
+                    entries.append((meta_path.stat().st_mtime, meta_path))
+                except FileNotFoundError:
+                    continue
+            excess = len(entries) - self.max_entries
+            if excess <= 0:
+                return
+            entries.sort()
+            for _, meta_path in entries[:excess]:
+                meta_path.unlink(missing_ok=True)
+                meta_path.with_suffix(".body").unlink(missing_ok=True)
+            logger.info(f"[HttpFetcher] 缓存超出上限，淘汰 {excess} 条响应")
+
+    def _read_entry(self, url: str) -> Optional[Dict]:
+        meta_path = self._meta_path(url)
+        if not meta_path.exists() or not self._body_path(url).exists():
+            return None
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"[HttpFetcher] 读取缓存失败: {e}")
+            return None
+
+    def _write_meta(self, url: str, entry: Dict):
+        meta_path = self._meta_path(url)
+        tmp_path = f"{meta_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, meta_path)
+
+    def _from_entry(self, url: str, entry: Dict) -> HttpResponse:
+        with open(self._body_path(url), "rb") as f:
+            content = f.read()
+        # 命中时刷新 mtime，淘汰按最近使用顺序进行
+        try:
+            os.utime(self._meta_path(url))
+        except FileNotFoundError:
+            pass
+        return HttpResponse(
+            url=url,
+            status_code=entry.get("status_code", 200),
+            content=content,
+            headers={"Content-Type": entry.get("content_type", "")},
+            encoding=entry.get("encoding") or "utf-8",
+            from_cache=True,
+        )
+
+    def _key(self, url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def _meta_path(self, url: str) -> Path:
+        return self.cache_dir / f"{self._key(url)}.json"
+
+    def _body_path(self, url: str) -> Path:
+        return self.cache_dir / f"{self._key(url)}.body"
@@ -7,13 +7,18 @@ from loguru import logger
 from dotenv import load_dotenv
 import hashlib
 import base64
+import threading
 import time
 
+from resumix.config.config import Config
 from resumix.config.llm_config import LLMConfig
+from resumix.shared.utils.ollama_driver import OllamaDriver
+from resumix.shared.utils.token_budget import heuristic_tokens
 
 # Load environment variables
 load_dotenv()
 
+CONFIG = Config().config
 LLM_CONFIG = LLMConfig.get_config()
 
 
@@ -86,6 +91,23 @@ class LLMClient:
         self.model_name = LLM_CONFIG.get("model", "local_llm")
         self.api_key = LLM_CONFIG.get("api_key", None)
         self.timeout = timeout
+        self._usage_lock = threading.Lock()
+        self.last_usage: Dict[str, int] = {}
+        self.usage_stats: Dict[str, int] = {
+            "calls": 0,
+            "prompt_tokens": 0,
+            "cached_tokens": 0,
+            "completion_tokens": 0,
+        }
+        self.ollama = None
+        if LLM_CONFIG.get("type") == "local":
+            self.ollama = OllamaDriver(
+                url=self.base_url, model=self.model_name, timeout=self.timeout
+            )
+            if CONFIG.LLM.OLLAMA.WARM_ON_START:
+                # 后台预加载模型，首个请求无需等待模型载入
+                threading.Thread(target=self.ollama.warm, daemon=True).start()
+        self._initialized = True
 
     def __call__(self, prompt: str) -> str:
         """
@@ -124,9 +146,10 @@ class LLMClient:
             timeout=self.timeout,
         )
 
+        data = res.json()
+        self._record_usage(data.get("usage"))
         return (
-            res.json()
-            .get("choices", [{}])[0]
+            data.get("choices", [{}])[0]
             .get("message", {})
             .get("content", "⚠️ Model did not return a result.")
         )
@@ -141,19 +164,14 @@ class LLMClient:
         返回：
             LLM 生成的字符串或错误信息。
         """
-        payload = {
-            "model": self.model_name,
-            "prompt": prompt,
-            "stream": False,
-        }
-
-        res = requests.post(
-            self.base_url,
-            json=payload,
-            timeout=self.timeout,
-        )
-
-        return res.json().get("response", "⚠️ Model did not return a result.")
+        if self.ollama is None:
+            self.ollama = OllamaDriver(
+                url=self.base_url, model=self.model_name, timeout=self.timeout
+            )
+        data = self.ollama.generate(prompt)
+        # Ollama 在响应顶层返回 prompt_eval_count / eval_count
+        self._record_usage(data)
+        return data.get("response", "⚠️ Model did not return a result.")
 
     def _call_teleai_api(self, prompt: str) -> str:
 
@@ -192,9 +210,10 @@ class LLMClient:
         if not res.ok:
             return f"❌ Error: {res.status_code} - {res.text}"
 
+        data = res.json()
+        self._record_usage(data.get("usage"))
         return (
-            res.json()
-            .get("choices", [{}])[0]
+            data.get("choices", [{}])[0]
             .get("message", {})
             .get("content", "⚠️ Model did not return a result.")
         )
@@ -222,13 +241,71 @@ class LLMClient:
         if not res.ok:
             return f"❌ Error: {res.status_code} - {res.text}"
 
+        data = res.json()
+        self._record_usage(data.get("usage"))
         return (
-            res.json()
-            .get("choices", [{}])[0]
+            data.get("choices", [{}])[0]
             .get("message", {})
             .get("content", "⚠️ Model did not return a result.")
         )
 
+    @staticmethod
+    def parse_usage(usage: Optional[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        统一各服务商的用量字段。
+
+        参数：
+            usage: OpenAI 兼容接口的 usage 字段，或 Ollama 的完整响应
+
+        返回：
+            包含 prompt_tokens / cached_tokens / completion_tokens 的字典，无用量信息时为空
+        """
+        if not isinstance(usage, dict):
+            return {}
+        prompt_tokens = usage.get("prompt_tokens", usage.get("prompt_eval_count"))
+        completion_tokens = usage.get("completion_tokens", usage.get("eval_count"))
+        if prompt_tokens is None and completion_tokens is None:
+            return {}
+
+        # DeepSeek: prompt_cache_hit_tokens；OpenAI 兼容接口: prompt_tokens_details.cached_tokens
+        cached_tokens = usage.get("prompt_cache_hit_tokens")
+        if cached_tokens is None:
+            cached_tokens = (usage.get("prompt_tokens_details") or {}).get(
+                "cached_tokens", 0
+            )
+        return {
+            "prompt_tokens": int(prompt_tokens or 0),
+            "cached_tokens": int(cached_tokens or 0),
+            "completion_tokens": int(completion_tokens or 0),
+        }
+
+    def _record_usage(self, usage: Optional[Dict[str, Any]]):
+        parsed = self.parse_usage(usage)
+        if not parsed:
+            return
+        with self._usage_lock:
+            self.last_usage = parsed
+            self.usage_stats["calls"] += 1
+            for key, value in parsed.items():
+                self.usage_stats[key] += value
+        logger.info(
+            f"[LLMClient] tokens: prompt={parsed['prompt_tokens']} "
+            f"(cached={parsed['cached_tokens']}), completion={parsed['completion_tokens']}"
+        )
+
+    def get_usage_stats(self) -> Dict[str, float]:
+        """
+        返回累计用量及前缀缓存命中率（cached_tokens / prompt_tokens）。
+        """
+        with self._usage_lock:
+            stats = dict(self.usage_stats)
+        stats["cache_hit_rate"] = (
+            stats["cached_tokens"] / stats["prompt_tokens"]
+            if stats["prompt_tokens"]
+            else 0.0
+        )
+        return stats
+
     def generate(self, prompt: str) -> str:
         """
         调用 LLM 生成文本。
@@ -243,7 +320,10 @@ class LLMClient:
                 logger.info()                logger.info("Using Local LLM")。
         """
         try:
-            logger.info(f"Prompt Length: {len(prompt)}")
+            # 仅用于日志，用启发式估算，避免为此加载编码器
+            logger.info(
+                f"Prompt Length: {len(prompt)} chars, ~{heuristic_tokens(prompt)} tokens"
+            )
 
             if LLM_CONFIG.get("type") == "deepseek":
                 logger.info("Using DeepSeek API")
@@ -0,0 +1,209 @@
+"""
+Ollama /api/generate driver with keep-alive, runtime options and a bounded
+in-flight window.
+"""
+
+import hashlib
+import json
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from loguru import logger
+
+from resumix.config.config import Config
+
+CONFIG = Config().config
+
+
+@dataclass
+class GenerationStats:
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    prompt_tokens_per_sec: float = 0.0
+    tokens_per_sec: float = 0.0
+    load_ms: float = 0.0
+    total_ms: float = 0.0
+
+    @classmethod
+    def from_response(cls, data: Dict[str, Any]) -> "GenerationStats":
+        """Build from Ollama's counters (durations are in nanoseconds)."""
+
+        def rate(count, duration_ns):
+            return count / (duration_ns / 1e9) if count and duration_ns else 0.0
+
+        prompt_tokens = data.get("prompt_eval_count") or 0
+        completion_tokens = data.get("eval_count") or 0
+        return cls(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            prompt_tokens_per_sec=rate(
+                prompt_tokens, data.get("prompt_eval_duration")
+            ),
+            tokens_per_sec=rate(completion_tokens, data.get("eval_duration")),
+            load_ms=(data.get("load_duration") or 0) / 1e6,
+            total_ms=(data.get("total_duration") or 0) / 1e6,
+        )
+
+
+class OllamaDriver:
+    """
+    Send prompts to a local Ollama server.
+
+    The model is pinned in memory with ``keep_alive`` so it does not unload
+    between requests. At most ``max_in_flight`` requests are sent at once;
+    this should match ``OLLAMA_NUM_PARALLEL`` so extra callers wait here
+    (for at most ``timeout`` seconds) instead of timing out in Ollama's queue.
+    Identical concurrent prompts share a single request.
+    """
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        model: Optional[str] = None,
+        keep_alive: Optional[str] = None,
+        num_ctx: Optional[int] = None,
+        num_predict: Optional[int] = None,
+        num_thread: Optional[int] = None,
+        max_in_flight: Optional[int] = None,
+        timeout: Optional[int] = None,
+        session: Optional[requests.Session] = None,
+    ):
+        """
+        Initialize the OllamaDriver.
+
+        Args:
+            url: ``/api/generate`` endpoint
+            model: Model tag, e.g. ``gemma3:4b``
+            keep_alive: How long Ollama keeps the model loaded (``"30m"``, ``-1``)
+            num_ctx: Context window in tokens (0: model default)
+            num_predict: Maximum generated tokens (0: model default)
+            num_thread: CPU threads used by Ollama (0: Ollama decides)
+            max_in_flight: Requests sent concurrently
+            timeout: Request timeout in seconds, also the longest wait for a
+                free in-flight slot
+            session: HTTP session (default: pooled session sized to max_in_flight)
+        """
+        settings = CONFIG.LLM.OLLAMA
+        self.url = url or CONFIG.LLM.LOCAL.URL
+        self.model = model or CONFIG.LLM.LOCAL.MODEL
+        self.keep_alive = settings.KEEP_ALIVE if keep_alive is None else keep_alive
+        self.options = {
+            key: value
+            for key, value in (
+                ("num_ctx", settings.NUM_CTX if num_ctx is None else num_ctx),
+                (
+                    "num_predict",
+                    settings.NUM_PREDICT if num_predict is None else num_predict,
+                ),
+                ("num_thread", settings.NUM_THREAD if num_thread is None else num_thread),
+            )
+            if value
+        }
+        self.max_in_flight = max_in_flight or settings.MAX_IN_FLIGHT
+        self.timeout = timeout or settings.TIMEOUT
+
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=1, pool_maxsize=self.max_in_flight
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        self.session = session
+
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self._in_flight: Dict[str, Future] = {}
+        self._in_flight_lock = threading.Lock()
+        self.last_stats = GenerationStats()
+
+    def generate(self, prompt: str, **options) -> Dict[str, Any]:
+        """
+        Generate a completion, sharing the request with identical concurrent calls.
+
+        Args:
+            prompt: Prompt text
+            **options: Per-call overrides of the Ollama ``options``
+
+        Returns:
+            Ollama's JSON response (``response``, eval counters, ...)
+
+        Raises:
+            requests.RequestException: On network errors or non-2xx responses,
+                or ``requests.Timeout`` when no in-flight slot frees up in time
+        """
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": False,
+            "keep_alive": self.keep_alive,
+            "options": {**self.options, **options},
+        }
+        key = hashlib.sha256(
+            json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        ).hexdigest()
+
+        with self._in_flight_lock:
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+
+        if not owner:
+            logger.info("[Ollama] 相同请求进行中，复用结果")
+            return future.result()
+
+        try:
+            # 排队等待同样受 timeout 约束，避免卡住的请求让后续调用无限等待
+            if not self._slots.acquire(timeout=self.timeout):
+                raise requests.Timeout(
+                    f"Waited {self.timeout}s for one of {self.max_in_flight} Ollama slots"
+                )
+            try:
+                data = self._post(payload)
+            finally:
+                self._slots.release()
+            future.set_result(data)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._in_flight_lock:
+                self._in_flight.pop(key, None)
+        return data
+
+    def warm(self) -> bool:
+        """
+        Load the model into memory ahead of the first request.
+
+        Returns:
+            True when Ollama acknowledged the load
+        """
+        try:
+            self._post(
+                {"model": self.model, "keep_alive": self.keep_alive, "stream": False}
+            )
+            logger.info(f"[Ollama] 模型已预热: {self.model} (keep_alive={self.keep_alive})")
+            return True
+        except requests.RequestException as e:
+            logger.warning(f"[Ollama] 预热失败: {e}")
+            return False
+
+    def _post(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        res = self.session.post(self.url, json=payload, timeout=self.timeout)
+        res.raise_for_status()
+        data = res.json()
+
+        if payload.get("prompt") is not None:
+            stats = GenerationStats.from_response(data)
+            self.last_stats = stats
+            logger.info(
+                f"[Ollama] prompt {stats.prompt_tokens} tokens @ {stats.prompt_tokens_per_sec:.1f} tok/s, "
+                f"生成 {stats.completion_tokens} tokens @ {stats.tokens_per_sec:.1f} tok/s, "
+                f"加载 {stats.load_ms:.0f} ms, 总计 {stats.total_ms:.0f} ms"
+            )
+        return data
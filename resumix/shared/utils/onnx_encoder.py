@@ -0,0 +1,353 @@
+"""
+ONNX Runtime backend for sentence embeddings, optionally int8 quantized.
+
+The configured SentenceTransformer is exported once to ``onnx_dir``::
+
+    model.onnx        transformer graph (fp32)
+    model.int8.onnx   dynamically quantized weights (when quantize is on)
+    encoder.json      pooling, dimension and agreement with the torch model
+    tokenizer files   saved from the SentenceTransformer tokenizer
+
+``OnnxEncoder.encode`` mirrors ``SentenceTransformer.encode`` for the
+arguments used in this repo, so it can be registered in
+SentenceTransformerUtils in place of the torch model.
+"""
+
+import argparse
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import onnxruntime as ort
+from loguru import logger
+
+from resumix.config.config import Config
+
+CONFIG = Config().config
+
+FP32_FILE = "model.onnx"
+INT8_FILE = "model.int8.onnx"
+META_FILE = "encoder.json"
+
+# 导出时用于比对 torch 与 ONNX 结果的样例（中英混合，覆盖简历与 JD 常见句式）
+AGREEMENT_SAMPLES = [
+    "Experienced Python developer with five years of backend work.",
+    "负责推荐系统的特征工程与模型上线",
+    "Built data pipelines with Spark, Kafka and Airflow.",
+    "熟悉 Docker、Kubernetes 以及 CI/CD 流程",
+    "Bachelor of Science in Computer Science, 2019",
+    "岗位职责：参与大模型应用开发，优化检索增强生成效果",
+    "Led a team of four engineers to migrate services to AWS.",
+    "Skills: SQL, PyTorch, FAISS, REST APIs",
+    "具备良好的沟通能力和团队合作精神",
+    "Responsible for A/B testing and metric design.",
+]
+
+
+@dataclass
+class AgreementReport:
+    mean_cosine: float
+    min_cosine: float
+    reference_per_sec: float
+    candidate_per_sec: float
+
+    @property
+    def speedup(self) -> float:
+        if not self.reference_per_sec:
+            return 0.0
+        return self.candidate_per_sec / self.reference_per_sec
+
+
+def agreement_report(
+    reference, candidate, sentences: Sequence[str] = AGREEMENT_SAMPLES, repeats: int = 3
+) -> AgreementReport:
+    """
+    Compare two encoders on the same sentences.
+
+    Args:
+        reference: Encoder treated as ground truth (the torch model)
+        candidate: Encoder under test (e.g. OnnxEncoder)
+        sentences: Texts encoded by both
+        repeats: Timed passes per encoder (after one warm-up pass)
+
+    Returns:
+        AgreementReport with per-sentence cosine agreement and throughput
+    """
+    sentences = list(sentences)
+
+    def run(encoder):
+        encoder.encode(sentences, normalize_embeddings=True)
+        start = time.perf_counter()
+        for _ in range(repeats):
+            embeddings = encoder.encode(sentences, normalize_embeddings=True)
+        elapsed = time.perf_counter() - start
+        rate = len(sentences) * repeats / elapsed if elapsed else 0.0
+        return np.asarray(embeddings, dtype=np.float32), rate
+
+    ref_embeddings, ref_rate = run(reference)
+    cand_embeddings, cand_rate = run(candidate)
+    cosines = np.sum(ref_embeddings * cand_embeddings, axis=1)
+    return AgreementReport(
+        mean_cosine=float(cosines.mean()),
+        min_cosine=float(cosines.min()),
+        reference_per_sec=ref_rate,
+        candidate_per_sec=cand_rate,
+    )
+
+
+class OnnxEncoder:
+    """
+    Run an exported sentence encoder with onnxruntime on CPU.
+    """
+
+    def __init__(
+        self,
+        onnx_path: Union[str, Path],
+        tokenizer,
+        pooling: str = "mean",
+        normalize: bool = False,
+        max_seq_length: int = 128,
+        num_threads: int = 0,
+    ):
+        """
+        Initialize the OnnxEncoder.
+
+        Args:
+            onnx_path: Exported transformer graph
+            tokenizer: HuggingFace tokenizer of the exported model
+            pooling: ``mean`` or ``cls`` token pooling
+            normalize: Always L2-normalize (model ends with a Normalize module)
+            max_seq_length: Truncation length in tokens
+            num_threads: Intra-op threads (0: onnxruntime decides)
+        """
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(
+            str(onnx_path), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = tokenizer
+        self.pooling = pooling
+        self.normalize = normalize
+        self.max_seq_length = max_seq_length
+        self._dim: Optional[int] = None
+
+    @classmethod
+    def from_pretrained(
+        cls,
+        model_path: str = CONFIG.SENTENCE_TRANSFORMER.DIRECTORY,
+        onnx_dir: str = CONFIG.SENTENCE_TRANSFORMER.ONNX.DIRECTORY,
+        quantize: bool = CONFIG.SENTENCE_TRANSFORMER.ONNX.QUANTIZE,
+        num_threads: int = CONFIG.SENTENCE_TRANSFORMER.ONNX.NUM_THREADS,
+    ) -> "OnnxEncoder":
+        """
+        Load the exported encoder, exporting ``model_path`` first if needed.
+
+        Args:
+            model_path: SentenceTransformer directory or model id
+            onnx_dir: Directory holding the exported files
+            quantize: Use the int8 graph
+            num_threads: Intra-op threads (0: onnxruntime decides)
+
+        Returns:
+            OnnxEncoder ready to encode
+        """
+        from transformers import AutoTokenizer
+
+        onnx_dir = Path(onnx_dir)
+        graph = onnx_dir / (INT8_FILE if quantize else FP32_FILE)
+        if not graph.exists() or not (onnx_dir / META_FILE).exists():
+            export_onnx(model_path, onnx_dir, quantize=quantize)
+
+        with open(onnx_dir / META_FILE, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        agreement = meta.get("agreement", {}).get(graph.name)
+        if agreement:
+            logger.info(
+                f"[OnnxEncoder] {graph.name} 与 torch 一致性: "
+                f"mean cos {agreement['mean_cosine']:.4f}, min cos {agreement['min_cosine']:.4f}"
+            )
+
+        encoder = cls(
+            graph,
+            AutoTokenizer.from_pretrained(str(onnx_dir)),
+            pooling=meta["pooling"],
+            normalize=meta["normalize"],
+            max_seq_length=meta["max_seq_length"],
+            num_threads=num_threads,
+        )
+        encoder._dim = meta["dim"]
+        return encoder
+
+    def get_sentence_embedding_dimension(self) -> int:
+        if self._dim is None:
+            self._dim = int(self.encode(["dim"]).shape[1])
+        return self._dim
+
+    def encode(
+        self,
+        sentences: Union[str, Sequence[str]],
+        batch_size: int = 32,
+        normalize_embeddings: bool = False,
+        convert_to_numpy: bool = True,
+        show_progress_bar: bool = False,
+        **kwargs,
+    ) -> np.ndarray:
+        """
+        Encode sentences like ``SentenceTransformer.encode``.
+
+        Args:
+            sentences: One text or a list of texts
+            batch_size: Texts per onnxruntime call
+            normalize_embeddings: L2-normalize the embeddings
+
+        Returns:
+            float32 array of shape (n, dim), or (dim,) for a single text
+        """
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.zeros((0, self._dim or 0), dtype=np.float32)
+
+        # 按长度排序后分批，减少 padding
+        order = np.argsort([-len(t) for t in texts], kind="stable")
+        embeddings = np.empty((len(texts), 0), dtype=np.float32)
+        for start in range(0, len(texts), batch_size):
+            rows = order[start : start + batch_size]
+            batch = self._encode_batch([texts[i] for i in rows])
+            if embeddings.shape[1] == 0:
+                embeddings = np.empty((len(texts), batch.shape[1]), dtype=np.float32)
+            embeddings[rows] = batch
+
+        if normalize_embeddings or self.normalize:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.maximum(norms, 1e-12)
+        return embeddings[0] if single else embeddings
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        features = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=self.max_seq_length,
+            return_tensors="np",
+        )
+        inputs = {
+            name: np.asarray(value, dtype=np.int64)
+            for name, value in features.items()
+            if name in self.input_names
+        }
+        hidden = self.session.run(None, inputs)[0]
+
+        if self.pooling == "cls":
+            return hidden[:, 0].astype(np.float32)
+        mask = features["attention_mask"][..., None].astype(np.float32)
+        summed = (hidden * mask).sum(axis=1)
+        return (summed / np.maximum(mask.sum(axis=1), 1e-9)).astype(np.float32)
+
+
+def export_onnx(
+    model_path: str,
+    onnx_dir: Union[str, Path],
+    quantize: bool = True,
+    opset: int = 14,
+) -> Dict:
+    """
+    Export a SentenceTransformer to ONNX and record its agreement with torch.
+
+    Args:
+        model_path: SentenceTransformer directory or model id
+        onnx_dir: Output directory
+        quantize: Also write the dynamically quantized int8 graph
+        opset: ONNX opset version
+
+    Returns:
+        The metadata written to ``encoder.json``
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    onnx_dir = Path(onnx_dir)
+    onnx_dir.mkdir(parents=True, exist_ok=True)
+    model = SentenceTransformer(model_path, device="cpu")
+    transformer = model[0].auto_model.eval()
+    tokenizer = model.tokenizer
+
+    modules = [type(module).__name__ for module in model]
+    pooling_config = model[1].get_config_dict() if len(model) > 1 else {}
+    meta = {
+        "source": str(model_path),
+        "dim": model.get_sentence_embedding_dimension(),
+        "max_seq_length": model.max_seq_length,
+        "pooling": "cls" if pooling_config.get("pooling_mode_cls_token") else "mean",
+        "normalize": "Normalize" in modules,
+        "agreement": {},
+    }
+
+    dummy = tokenizer(["resumix onnx export"], return_tensors="pt")
+    names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in dummy]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    fp32_path = onnx_dir / FP32_FILE
+    tmp_path = f"{fp32_path}.{os.getpid()}.tmp"
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(dummy[name] for name in names),
+            tmp_path,
+            input_names=names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+        )
+    os.replace(tmp_path, fp32_path)
+    tokenizer.save_pretrained(str(onnx_dir))
+    graphs = [fp32_path]
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        int8_path = onnx_dir / INT8_FILE
+        quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+        graphs.append(int8_path)
+
+    for graph in graphs:
+        encoder = OnnxEncoder(
+            graph,
+            tokenizer,
+            pooling=meta["pooling"],
+            normalize=meta["normalize"],
+            max_seq_length=meta["max_seq_length"],
+        )
+        report = agreement_report(model, encoder)
+        meta["agreement"][graph.name] = {**asdict(report), "speedup": report.speedup}
+        logger.info(
+            f"[OnnxEncoder] 导出 {graph.name}: mean cos {report.mean_cosine:.4f}, "
+            f"min cos {report.min_cosine:.4f}, 速度 {report.candidate_per_sec:.1f} 句/秒 "
+            f"(torch {report.reference_per_sec:.1f} 句/秒, {report.speedup:.2f}x)"
+        )
+
+    with open(onnx_dir / META_FILE, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    return meta
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        description="Export the sentence encoder to ONNX and report agreement with torch"
+    )
+    arg_parser.add_argument("--model", default=CONFIG.SENTENCE_TRANSFORMER.DIRECTORY)
+    arg_parser.add_argument("--output", default=CONFIG.SENTENCE_TRANSFORMER.ONNX.DIRECTORY)
+    arg_parser.add_argument("--no-quantize", action="store_true")
+    args = arg_parser.parse_args()
+
+    result = export_onnx(args.model, args.output, quantize=not args.no_quantize)
+    for name, report in result["agreement"].items():
+        logger.info(f"{name}: {report}")
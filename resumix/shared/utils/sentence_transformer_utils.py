@@ -1,29 +1,116 @@
 from sentence_transformers import SentenceTransformer
 import threading
+from typing import Dict, Optional
 from resumix.config.config import Config
 from resumix.shared.utils.logger import logger
 
 CONFIG = Config().config
 
 
+def model_memory_bytes(model) -> int:
+    """参数与缓冲区占用的字节数；非 torch 模型返回 0。"""
+    total = 0
+    for attr in ("parameters", "buffers"):
+        tensors = getattr(model, attr, None)
+        if not callable(tensors):
+            continue
+        try:
+            total += sum(t.numel() * t.element_size() for t in tensors())
+        except (TypeError, AttributeError):
+            return 0
+    return total
+
+
 class SentenceTransformerUtils:
-    _instance = None
+    """
+    按模型 id 缓存的 SentenceTransformer 注册表：每个模型在进程内只加载一次，
+    不同 id 的调用方各自拿到自己请求的模型。
+    """
+
+    _models: Dict[str, SentenceTransformer] = {}
+    _memory: Dict[str, int] = {}
     _lock = threading.Lock()
 
     @classmethod
     def get_instance(
         cls,
-        model_name=CONFIG.SENTENCE_TRANSFORMER.USE_MODEL,
-        model_path=CONFIG.SENTENCE_TRANSFORMER.DIRECTORY,
+        model_name: Optional[str] = None,
+        model_path: Optional[str] = None,
     ):
-        if cls._instance is None:
-            with cls._lock:  # 确保线程安全
-                if cls._instance is None:
-                    if model_name is None:
-                        raise ValueError("首次调用必须提供 model_name")
-                    cls._instance = SentenceTransformer(
-                        model_path
+        """
+        获取（必要时加载）指定模型。
+
+        参数：
+            model_name: 模型 id，默认使用 sentence_transformer.use_model
+            model_path: 加载来源；默认模型取 sentence_transformer.directory，
+                其他 id 直接交给 SentenceTransformer（本地缓存或 HuggingFace）
+
+        返回：
+            共享的 SentenceTransformer 实例
+        """
+        model_name = model_name or CONFIG.SENTENCE_TRANSFORMER.USE_MODEL
+        if model_name is None:
+            raise ValueError("未配置默认模型，必须提供 model_name")
+
+        model = cls._models.get(model_name)
+        if model is not None:
+            return model
+
+        with cls._lock:  # 确保线程安全
+            if model_name not in cls._models:
+                if model_path is None:
+                    model_path = (
+                        CONFIG.SENTENCE_TRANSFORMER.DIRECTORY
+                        if model_name == CONFIG.SENTENCE_TRANSFORMER.USE_MODEL
+                        else model_name
                     )
-                    #cls._instance.save(cache_dir)
-                    #logger.info("Model saved")
-        return cls._instance
+                cls._register(model_name, cls._load(model_name, model_path), model_path)
+            return cls._models[model_name]
+
+    @classmethod
+    def _load(cls, model_name: str, model_path: str):
+        # ONNX 后端只替换默认模型：导出目录与该模型一一对应
+        settings = CONFIG.SENTENCE_TRANSFORMER
+        if (
+            getattr(settings, "BACKEND", "torch") == "onnx"
+            and model_name == settings.USE_MODEL
+        ):
+            try:
+                from resumix.shared.utils.onnx_encoder import OnnxEncoder
+
+                return OnnxEncoder.from_pretrained(model_path)
+            except Exception as e:
+                # 缺少 onnxruntime/onnx、导出或量化失败时都回退，不影响服务启动
+                logger.warning(f"[SentenceTransformer] ONNX 后端不可用，回退到 torch: {e}")
+        return SentenceTransformer(model_path)
+
+    @classmethod
+    def register(cls, model_name: str, model):
+        """注册已构建的模型（如量化/ONNX 后端或测试替身）。"""
+        with cls._lock:
+            cls._register(model_name, model, "registered")
+
+    @classmethod
+    def _register(cls, model_name: str, model, source: str):
+        cls._models[model_name] = model
+        cls._memory[model_name] = model_memory_bytes(model)
+        logger.info(
+            f"[SentenceTransformer] 加载模型 {model_name} (来源 {source}): "
+            f"{cls._memory[model_name] / 2**20:.1f} MB，"
+            f"已加载 {len(cls._models)} 个模型共 {sum(cls._memory.values()) / 2**20:.1f} MB"
+        )
+
+    @classmethod
+    def memory_report(cls) -> Dict[str, int]:
+        """各已加载模型的权重占用（字节）。"""
+        with cls._lock:
+            return dict(cls._memory)
+
+    @classmethod
+    def unload(cls, model_name: Optional[str] = None):
+        """卸载指定模型；不指定时卸载全部。"""
+        with cls._lock:
+            names = [model_name] if model_name else list(cls._models)
+            for name in names:
+                cls._models.pop(name, None)
+                cls._memory.pop(name, None)
@@ -0,0 +1,182 @@
+"""
+Token estimation and extractive compression of long prompt inputs.
+
+JD text is split into sentences, ranked by embedding similarity to the
+resume section being processed, and the best sentences are kept (in their
+original order) until the token budget is reached.
+"""
+
+import hashlib
+import math
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List
+
+import numpy as np
+from loguru import logger
+
+from resumix.config.config import Config
+
+CONFIG = Config().config
+
+_CJK_RE = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]")
+_WORD_RE = re.compile(r"[^\s\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]+")
+_SENTENCE_RE = re.compile(r"(?<=[。！？；!?;])|(?<=\.)\s+|\n+")
+
+
+def heuristic_tokens(text: str) -> int:
+    """Rough count: one token per CJK character, ~1.3 per other word."""
+    if not text:
+        return 0
+    cjk = len(_CJK_RE.findall(text))
+    words = len(_WORD_RE.findall(text))
+    return cjk + math.ceil(words * 1.3)
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split on line breaks and sentence punctuation, dropping separators."""
+    sentences = (s.strip() for s in _SENTENCE_RE.split(text or ""))
+    return [s for s in sentences if s and s.strip("-*=_ ")]
+
+
+@dataclass
+class CompressedText:
+    text: str
+    original_tokens: int
+    tokens: int
+
+    @property
+    def saved(self) -> int:
+        return self.original_tokens - self.tokens
+
+
+class TokenBudget:
+    """
+    Estimate prompt sizes and shrink long JD text to a token budget (singleton).
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __init__(
+        self,
+        model=None,
+        enabled: bool = CONFIG.PROMPT_BUDGET.ENABLED,
+        cache_size: int = CONFIG.PROMPT_BUDGET.CACHE_SIZE,
+    ):
+        """
+        Initialize the TokenBudget.
+
+        Args:
+            model: Sentence encoder (default: shared SentenceTransformer, loaded lazily)
+            enabled: Compress text over budget; False only estimates
+            cache_size: Number of texts whose sentence embeddings are kept
+        """
+        self._model = model
+        self._tokenizer = None
+        self._tokenizer_resolved = False
+        self.enabled = enabled
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls) -> "TokenBudget":
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    @property
+    def model(self):
+        if self._model is None:
+            from resumix.shared.utils.sentence_transformer_utils import (
+                SentenceTransformerUtils,
+            )
+
+            self._model = SentenceTransformerUtils.get_instance()
+        return self._model
+
+    @property
+    def tokenizer(self):
+        # 借用嵌入模型的 tokenizer；模型不可用时退回启发式估计
+        if not self._tokenizer_resolved:
+            try:
+                self._tokenizer = getattr(self.model, "tokenizer", None)
+            except Exception as e:
+                logger.warning(f"[TokenBudget] 无法加载 tokenizer，使用启发式估计: {e}")
+            self._tokenizer_resolved = True
+        return self._tokenizer
+
+    def estimate(self, text: str) -> int:
+        """
+        Estimate the number of tokens in ``text``.
+
+        Args:
+            text: Prompt or prompt fragment
+
+        Returns:
+            Token count from the encoder's tokenizer, or a heuristic count
+        """
+        if not text:
+            return 0
+        tokenizer = self.tokenizer
+        if tokenizer is None:
+            return heuristic_tokens(text)
+        return len(tokenizer.encode(text, add_special_tokens=False, verbose=False))
+
+    def compress(self, text: str, query: str, budget: int) -> CompressedText:
+        """
+        Keep the sentences of ``text`` most similar to ``query`` within ``budget``.
+
+        Args:
+            text: Long input such as a JD section
+            query: Text the kept sentences should be relevant to
+            budget: Maximum number of tokens of the result
+
+        Returns:
+            CompressedText with the kept sentences in their original order
+        """
+        text = (text or "").strip()
+        original = self.estimate(text)
+        if not self.enabled or original <= budget:
+            return CompressedText(text, original, original)
+
+        sentences, embeddings, lengths = self._sentences(text)
+        if len(sentences) <= 1:
+            return CompressedText(text, original, original)
+
+        query_embedding = self.model.encode(
+            [query or text], normalize_embeddings=True
+        ).astype(np.float32)[0]
+        scores = embeddings @ query_embedding
+
+        kept, used = [], 0
+        for i in np.argsort(-scores, kind="stable"):
+            if used + lengths[i] <= budget or not kept:
+                kept.append(i)
+                used += lengths[i]
+
+        compressed = "\n".join(sentences[i] for i in sorted(kept))
+        return CompressedText(compressed, original, self.estimate(compressed))
+
+    def _sentences(self, text: str):
+        key = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        with self._cache_lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        sentences = split_sentences(text)
+        embeddings = self.model.encode(sentences, normalize_embeddings=True)
+        lengths = [self.estimate(s) for s in sentences]
+        entry = (sentences, np.asarray(embeddings, dtype=np.float32), lengths)
+
+        with self._cache_lock:
+            self._cache[key] = entry
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return entry
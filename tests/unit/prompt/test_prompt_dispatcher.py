@@ -0,0 +1,55 @@
+import os
+import pytest
+from resumix.backend.prompt.prompt_dispatcher import PromptDispatcher
+from resumix.shared.section.section_base import SectionBase
+from resumix.shared.utils.token_budget import TokenBudget
+
+
+JD_BASIC = SectionBase(name="basic", raw_text="3+ years of Go. Kubernetes in production.")
+JD_PREFERRED = SectionBase(name="preferred", raw_text="Istio experience.")
+SECTIONS = [
+    SectionBase(name="experience", raw_text="Built gRPC services in Go."),
+    SectionBase(name="projects", raw_text="Kubernetes operator for Redis."),
+    SectionBase(name="skills", raw_text="Go, Python, Helm"),
+]
+
+
+@pytest.fixture(autouse=True)
+def estimate_only(monkeypatch):
+    # JD 在预算内，不触发句向量编码
+    monkeypatch.setattr(
+        TokenBudget, "_instance", TokenBudget(model=object(), enabled=False)
+    )
+
+
+class TestScorePromptLayout:
+    """Test the prefix-first scoring prompt layout"""
+
+    def test_prefix_first_shares_prefix_across_sections(self):
+        prompts = [
+            PromptDispatcher().get_score_prompt(
+                section, JD_BASIC, JD_PREFERRED, layout="prefix_first"
+            )
+            for section in SECTIONS
+        ]
+        prefix = os.path.commonprefix(prompts)
+
+        assert JD_BASIC.raw_text in prefix
+        assert JD_PREFERRED.raw_text in prefix
+        assert "interface ScoreResult" in prefix
+        for section, prompt in zip(SECTIONS, prompts):
+            assert prompt.rstrip().endswith(section.raw_text)
+
+    def test_legacy_layout_puts_section_first(self):
+        prompt = PromptDispatcher().get_score_prompt(
+            SECTIONS[0], JD_BASIC, JD_PREFERRED, layout="legacy"
+        )
+        assert prompt.index(SECTIONS[0].raw_text) < prompt.index("## Evaluation")
+        assert JD_BASIC.raw_text in prompt
+
+    def test_section_text_is_not_treated_as_placeholder(self):
+        section = SectionBase(name="skills", raw_text="<JD_BASIC_TEXT> literally")
+        prompt = PromptDispatcher().get_score_prompt(
+            section, JD_BASIC, JD_PREFERRED, layout="prefix_first"
+        )
+        assert prompt.rstrip().endswith("<JD_BASIC_TEXT> literally")
@@ -0,0 +1,103 @@
+import time
+
+import pytest
+from resumix.backend.resume_generator.doc_utils import escape_for_latex
+
+
+def legacy_escape_for_latex(data):
+    """Previous recursive, per-character implementation kept as the reference."""
+    if isinstance(data, dict):
+        new_data = {}
+        for key in data.keys():
+            new_data[key] = legacy_escape_for_latex(data[key])
+        return new_data
+    elif isinstance(data, list):
+        return [legacy_escape_for_latex(item) for item in data]
+    elif isinstance(data, str):
+        latex_special_chars = {
+            "&": r"\&",
+            "%": r"\%",
+            "$": r"\$",
+            "#": r"\#",
+            "_": r"\_",
+            "{": r"\{",
+            "}": r"\}",
+            "~": r"\textasciitilde{}",
+            "^": r"\^{}",
+            "\\": r"\textbackslash{}",
+            "\n": "\\newline%\n",
+            "-": r"{-}",
+            "\xA0": "~",
+            "[": r"{[}",
+            "]": r"{]}",
+        }
+        return "".join([latex_special_chars.get(c, c) for c in data])
+
+    return data
+
+
+@pytest.fixture
+def json_resume():
+    return {
+        "basics": {
+            "name": "Zhang San",
+            "email": "zhang_san@example.com",
+            "phone": "+86 123-4567-8901",
+            "summary": "Line one\nLine two: 100% C# & C++ {fast}\xA0~^\\[x]",
+        },
+        "work": [
+            {
+                "company": "ByteDance",
+                "startDate": "2022-07",
+                "highlights": ["Cut latency by 35%", "Cost < $1k", 42, None],
+            }
+        ],
+        "skills": [{"name": "Languages", "keywords": ["Python", "Go", "C++"]}],
+        "score": 3.8,
+        "flags": [True, False, [["nested-list"]]],
+    }
+
+
+class TestEscapeForLatex:
+    """Test the translation-table based LaTeX escaper"""
+
+    def test_matches_legacy_implementation(self, json_resume):
+        assert escape_for_latex(json_resume) == legacy_escape_for_latex(json_resume)
+
+    def test_special_rules(self):
+        assert escape_for_latex("a\nb") == "a\\newline%\nb"
+        assert escape_for_latex("2020-2023") == "2020{-}2023"
+        assert escape_for_latex("\\") == r"\textbackslash{}"
+
+    def test_preserves_key_and_item_order(self, json_resume):
+        escaped = escape_for_latex(json_resume)
+        assert list(escaped.keys()) == list(json_resume.keys())
+        assert escaped["work"][0]["highlights"][2:] == [42, None]
+
+    def test_input_not_mutated(self, json_resume):
+        summary = json_resume["basics"]["summary"]
+        escape_for_latex(json_resume)
+        assert json_resume["basics"]["summary"] == summary
+
+    def test_non_container_passthrough(self):
+        assert escape_for_latex(3) == 3
+        assert escape_for_latex(None) is None
+        assert escape_for_latex([]) == []
+
+    @pytest.mark.slow
+    def test_benchmark_against_legacy(self, json_resume):
+        batch = [json_resume] * 2000
+
+        start = time.perf_counter()
+        legacy = [legacy_escape_for_latex(r) for r in batch]
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        current = [escape_for_latex(r) for r in batch]
+        current_time = time.perf_counter() - start
+
+        print(
+            f"legacy: {legacy_time:.4f}s, translate: {current_time:.4f}s, "
+            f"speedup: {legacy_time / current_time:.1f}x"
+        )
+        assert current == legacy
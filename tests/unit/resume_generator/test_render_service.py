@@ -0,0 +1,186 @@
+import os
+import subprocess
+import threading
+import time
+
+import pytest
+from resumix.backend.resume_generator import render_service
+from resumix.backend.resume_generator.render_service import RenderService
+
+RESUME = {
+    "basics": {"name": "Zhang San", "email": "zhangsan@example.com"},
+    "skills": [{"name": "Languages", "keywords": ["Python", "Go"]}],
+}
+
+
+class FakeTectonic:
+    """Stands in for ``subprocess.run``; writes a PDF next to the .tex file."""
+
+    def __init__(self, fail_only_cached=False, fail_always=False):
+        self.fail_only_cached = fail_only_cached
+        self.fail_always = fail_always
+        self.commands = []
+        self.job_dirs = []
+        self.job_files = []
+        self.caches = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, command, cwd, env, **kwargs):
+        self.release.wait(timeout=10)
+        self.commands.append(command)
+        self.job_dirs.append(cwd)
+        self.job_files.append(sorted(os.listdir(cwd)))
+        self.caches.append(env["TECTONIC_CACHE"])
+        if self.fail_always or (self.fail_only_cached and "--only-cached" in command):
+            raise subprocess.CalledProcessError(1, command)
+        tex_file = command[1]
+        with open(os.path.join(cwd, tex_file), encoding="utf-8") as f:
+            tex_source = f.read()
+        with open(os.path.join(cwd, tex_file[: -len(".tex")] + ".pdf"), "wb") as f:
+            f.write(b"%PDF-" + str(len(tex_source)).encode())
+        return subprocess.CompletedProcess(command, 0)
+
+
+@pytest.fixture
+def tectonic(monkeypatch):
+    fake = FakeTectonic()
+    monkeypatch.setattr(render_service.subprocess, "run", fake)
+    return fake
+
+
+@pytest.fixture
+def service(tmp_path):
+    service = RenderService(
+        max_workers=2, cache_dir=str(tmp_path), only_cached=True, max_cache_files=4
+    )
+    yield service
+    service.shutdown()
+
+
+def wait_forgotten(service):
+    """Done callbacks may still be running when ``result()`` returns."""
+    deadline = time.monotonic() + 5
+    while service._in_flight and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return service._in_flight
+
+
+def other_resume():
+    return {**RESUME, "basics": {**RESUME["basics"], "name": "Li Si"}}
+
+
+class TestRenderService:
+    """Test the cached, parallel PDF render service"""
+
+    def test_jobs_compile_in_isolated_directories(self, service, tectonic):
+        first = service.submit("Simple", RESUME)
+        second = service.submit("Simple", other_resume())
+
+        assert first.result() != second.result()
+        assert len(set(tectonic.job_dirs)) == 2
+        assert not any(os.path.exists(job_dir) for job_dir in tectonic.job_dirs)
+        for files in tectonic.job_files:
+            assert "Simple-resume.tex" in files
+            assert {os.path.basename(f) for f in render_service.SUPPORT_FILES} <= set(files)
+        assert all("--only-cached" in command for command in tectonic.commands)
+        assert set(tectonic.caches) == {render_service.TECTONIC_CACHE_DIR}
+
+    def test_cached_pdf_skips_compile(self, service, tectonic):
+        pdf = service.render_pdf("Simple", RESUME)
+
+        future = service.submit("Simple", RESUME)
+
+        assert future.done()
+        assert os.path.basename(future.result()) == (
+            service.cache_key(
+                "Simple",
+                render_service.escape_for_latex(RESUME),
+                render_service.get_final_section_ordering([]),
+            )
+            + ".pdf"
+        )
+        assert service.render_pdf("Simple", RESUME) == pdf
+        assert len(tectonic.commands) == 1
+
+    def test_identical_jobs_in_flight_share_one_compile(self, service, tectonic):
+        tectonic.release.clear()
+
+        first = service.submit("Simple", RESUME)
+        second = service.submit("Simple", dict(RESUME))
+        tectonic.release.set()
+
+        assert first is second
+        assert first.result()
+        assert len(tectonic.commands) == 1
+        assert wait_forgotten(service) == {}
+
+    def test_only_cached_failure_does_not_download_by_default(self, service, tectonic):
+        tectonic.fail_only_cached = True
+
+        with pytest.raises(subprocess.CalledProcessError):
+            service.render_pdf("Simple", RESUME)
+        assert len(tectonic.commands) == 1
+        assert tectonic.caches == [render_service.TECTONIC_CACHE_DIR]
+
+    def test_download_fallback_uses_a_per_job_cache(self, service, tectonic):
+        service.download_fallback = True
+        tectonic.fail_only_cached = True
+
+        assert service.render_pdf("Simple", RESUME).startswith(b"%PDF-")
+        assert len(tectonic.commands) == 2
+        assert "--only-cached" in tectonic.commands[0]
+        assert "--only-cached" not in tectonic.commands[1]
+        assert tectonic.job_dirs[0] == tectonic.job_dirs[1]
+        assert tectonic.caches == [
+            render_service.TECTONIC_CACHE_DIR,
+            os.path.join(tectonic.job_dirs[1], "tectonic_cache"),
+        ]
+
+    def test_failure_propagates_and_is_not_cached(self, service, tectonic):
+        tectonic.fail_always = True
+
+        with pytest.raises(subprocess.CalledProcessError):
+            service.render_pdf("Simple", RESUME)
+        assert len(tectonic.commands) == 1
+        assert list(service.cache_dir.glob("*.pdf")) == []
+        assert wait_forgotten(service) == {}
+
+        tectonic.fail_always = False
+        assert service.render_pdf("Simple", RESUME).startswith(b"%PDF-")
+
+    def test_identical_tex_is_not_recompiled(self, service, tectonic):
+        # A field no template renders changes the cache key but not the .tex
+        first = service.submit("Simple", RESUME).result()
+        second = service.submit("Simple", {**RESUME, "meta": {"source": "upload"}}).result()
+
+        assert first != second
+        assert open(first, "rb").read() == open(second, "rb").read()
+        assert len(tectonic.commands) == 1
+        assert len(list(service.cache_dir.glob("tex-*.pdf"))) == 1
+
+    def test_cache_evicts_least_recently_used(self, service, tectonic):
+        def resume(name):
+            return {**RESUME, "basics": {**RESUME["basics"], "name": name}}
+
+        older = service.submit("Simple", resume("A One")).result()
+        oldest = service.submit("Simple", resume("B Two")).result()
+        os.utime(older, (100, 100))
+        os.utime(oldest, (50, 50))
+
+        # A hit refreshes the entry, so the other one is evicted first
+        assert service.submit("Simple", resume("B Two")).result() == oldest
+        newest = service.submit("Simple", resume("C Three")).result()
+
+        assert len(list(service.cache_dir.glob("*.pdf"))) == 4
+        assert not os.path.exists(older)
+        assert os.path.exists(oldest) and os.path.exists(newest)
+
+    def test_export_writes_the_rendered_pdf(self, service, tectonic, tmp_path):
+        output_path = str(tmp_path / "exports" / "Simple-resume.pdf")
+        os.makedirs(os.path.dirname(output_path))
+
+        assert service.export_pdf("Simple", RESUME, output_path) == output_path
+        assert open(output_path, "rb").read() == service.render_pdf("Simple", RESUME)
+        assert os.listdir(os.path.dirname(output_path)) == ["Simple-resume.pdf"]
+        assert len(tectonic.commands) == 1
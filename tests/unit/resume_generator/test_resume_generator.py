@@ -0,0 +1,103 @@
+from resumix.backend.resume_generator import resume_generator
+from resumix.backend.resume_generator.resume_generator import (
+    generate_latex,
+    get_latex_jinja_env,
+    get_template_set,
+    render_batch,
+)
+
+RESUMES = [
+    {
+        "basics": {"name": "Zhang San", "email": "zhangsan@example.com"},
+        "skills": [{"name": "Languages", "keywords": ["Python", "C++"]}],
+        "awards": [{"title": "ICPC 50% Bronze", "date": "2021-12"}],
+    },
+    {
+        "basics": {"name": "Li Si", "email": "lisi@example.com"},
+        "projects": [{"name": "R&D", "description": "Cut latency by 35%"}],
+    },
+]
+
+
+class TestJinjaEnvironment:
+    """Test the lazily built, shared LaTeX Jinja environment"""
+
+    def test_environment_is_built_on_first_use(self, monkeypatch, tmp_path):
+        cache_dir = tmp_path / "jinja_cache"
+        monkeypatch.setattr(resume_generator, "JINJA_CACHE_DIR", str(cache_dir))
+        monkeypatch.setattr(resume_generator, "_LATEX_JINJA_ENV", None)
+
+        assert not cache_dir.exists()
+        env = get_latex_jinja_env()
+
+        assert cache_dir.is_dir()
+        assert get_latex_jinja_env() is env
+        assert resume_generator.LATEX_JINJA_ENV is env
+
+    def test_template_sets_are_shared(self):
+        env = get_latex_jinja_env()
+
+        templates = get_template_set("Simple")
+
+        assert get_template_set("Simple") is templates
+        assert get_template_set("Simple", env) is templates
+        assert templates["resume"].environment is env
+
+
+class TestRenderBatch:
+    """Test batch rendering against per-resume rendering"""
+
+    def test_matches_single_renders(self):
+        templates = ["Simple", "Awesome"]
+
+        results = render_batch(RESUMES, templates, ["skills"])
+
+        assert results == [
+            {
+                template: generate_latex(template, resume, ["skills"])
+                for template in templates
+            }
+            for resume in RESUMES
+        ]
+
+    def test_defaults_to_every_template(self):
+        (result,) = render_batch(RESUMES[:1])
+
+        assert list(result) == resume_generator.TEMPLATE_NAMES
+        assert all(result.values())
+
+
+class TestFragmentCache:
+    """Test that unchanged sections are not re-rendered"""
+
+    def test_unchanged_section_is_reused(self, monkeypatch):
+        monkeypatch.setattr(resume_generator, "_FRAGMENT_CACHE", resume_generator.OrderedDict())
+        templates = get_template_set("Simple")
+        rendered = []
+        for part in ("basics", "skills"):
+            render = templates[part].render
+            monkeypatch.setattr(
+                templates[part],
+                "render",
+                lambda *args, _part=part, _render=render, **kwargs: (
+                    rendered.append(_part) or _render(*args, **kwargs)
+                ),
+            )
+
+        first = generate_latex("Simple", RESUMES[0], [])
+        changed = {**RESUMES[0], "skills": [{"name": "Tools", "keywords": ["Docker"]}]}
+        second = generate_latex("Simple", changed, [])
+
+        assert rendered == ["basics", "skills", "skills"]
+        assert "Docker" in second and "Docker" not in first
+        assert generate_latex("Simple", RESUMES[0], []) == first
+        assert rendered == ["basics", "skills", "skills"]
+
+    def test_cache_is_bounded(self, monkeypatch):
+        monkeypatch.setattr(resume_generator, "_FRAGMENT_CACHE", resume_generator.OrderedDict())
+        monkeypatch.setattr(resume_generator, "FRAGMENT_CACHE_SIZE", 3)
+
+        for i in range(5):
+            generate_latex("Simple", {"basics": {"name": f"User {i}"}}, [])
+
+        assert len(resume_generator._FRAGMENT_CACHE) == 3
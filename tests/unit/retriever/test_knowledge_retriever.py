@@ -0,0 +1,268 @@
+import json
+import time
+import zlib
+
+import faiss
+import numpy as np
+import pytest
+from resumix.backend.retriever import knowledge_retriever
+from resumix.backend.retriever.bm25_index import BM25Index, TechCategories, tokenize
+from resumix.backend.retriever.knowledge_retriever import (
+    KnowledgeRetriever,
+    reciprocal_rank_fusion,
+)
+from resumix.shared.section.section_base import SectionBase
+
+
+CORPUS = [
+    "Developed a distributed microservices backend using Golang and gRPC.",
+    "Deployed and managed Kubernetes clusters with Istio service mesh.",
+    "Built RESTful APIs for internal services with Flask and PostgreSQL.",
+    "Implemented monitoring using Prometheus and Grafana dashboards.",
+    "Trained PyTorch models for NLP and deployed them behind FastAPI.",
+    "负责后端服务开发，使用 Redis 和 Kafka 提升系统吞吐。",
+]
+
+KEYWORDS = {
+    "programming_languages": ["Go", "Golang", "Python", "C++"],
+    "cloud_devops": ["Kubernetes", "Istio", "Prometheus", "Grafana"],
+    "databases_storage": ["PostgreSQL", "Redis"],
+    "ai_ml_nlp": ["PyTorch", "NLP"],
+}
+
+
+class FakeModel:
+    """Deterministic bag-of-words embedding used in place of the encoder."""
+
+    def __init__(self, dim=64):
+        self.dim = dim
+
+    def encode(self, texts, normalize_embeddings=True):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in tokenize(text):
+                vectors[row, zlib.crc32(token.encode()) % self.dim] += 1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-9)
+
+
+@pytest.fixture
+def categories():
+    return TechCategories(KEYWORDS)
+
+
+@pytest.fixture
+def retriever(tmp_path, monkeypatch, categories):
+    model = FakeModel()
+    index = faiss.IndexFlatIP(model.dim)
+    index.add(model.encode(CORPUS))
+    index_path = tmp_path / "index.faiss"
+    faiss.write_index(index, str(index_path))
+
+    data_path = tmp_path / "data.json"
+    data_path.write_text(json.dumps([{"text": t} for t in CORPUS]), encoding="utf-8")
+    keywords_path = tmp_path / "tech_keywords.json"
+    keywords_path.write_text(json.dumps(KEYWORDS), encoding="utf-8")
+
+    monkeypatch.setattr(
+        knowledge_retriever.SentenceTransformerUtils, "get_instance", lambda *a: model
+    )
+    return KnowledgeRetriever(
+        data_path=str(data_path),
+        index_path=str(index_path),
+        bm25_path=str(tmp_path / "bm25"),
+        tech_keywords_path=str(keywords_path),
+        candidate_k=4,
+        rrf_k=60,
+        shard_dir="",
+    )
+
+
+class TestTokenize:
+    """Test tech-aware tokenization"""
+
+    def test_keeps_tech_terms(self):
+        tokens = tokenize("C++, C#, Node.js and CI/CD on gRPC")
+        assert {"c++", "c#", "node.js", "node", "js", "ci/cd", "grpc"} <= set(tokens)
+
+    def test_cjk_characters(self):
+        assert tokenize("后端 Redis") == ["后", "端", "redis"]
+
+
+class TestBM25Index:
+    """Test the CSR BM25 index"""
+
+    def test_rare_term_ranks_first(self, categories):
+        bm25 = BM25Index.build(CORPUS, categories)
+        doc_ids, scores = bm25.search("istio", top_k=3)
+        assert doc_ids.tolist() == [1]
+        assert scores[0] > 0
+
+    def test_matches_reference_scores(self, categories):
+        bm25 = BM25Index.build(CORPUS, categories)
+        query = "backend services using kafka"
+        doc_ids, scores = bm25.search(query, top_k=len(CORPUS))
+
+        docs = [tokenize(t) for t in CORPUS]
+        avgdl = sum(len(d) for d in docs) / len(docs)
+        expected = {}
+        for doc_id, doc in enumerate(docs):
+            score = 0.0
+            for term in tokenize(query):
+                df = sum(term in d for d in docs)
+                tf = doc.count(term)
+                if not tf:
+                    continue
+                idf = np.log1p((len(docs) - df + 0.5) / (df + 0.5))
+                norm = 1.5 * (1 - 0.75 + 0.75 * len(doc) / avgdl)
+                score += idf * tf * 2.5 / (tf + norm)
+            if score:
+                expected[doc_id] = score
+
+        assert dict(zip(doc_ids.tolist(), scores.tolist())) == pytest.approx(expected)
+
+    def test_category_filter(self, categories):
+        bm25 = BM25Index.build(CORPUS, categories)
+        allowed = bm25.category_filter(["databases_storage"])
+        assert np.flatnonzero(allowed).tolist() == [2, 5]
+
+        doc_ids, _ = bm25.search("services", top_k=5, allowed=allowed)
+        assert set(doc_ids.tolist()) <= {2, 5}
+
+        with pytest.raises(ValueError):
+            bm25.category_filter(["unknown"])
+
+    def test_save_and_mmap_load(self, categories, tmp_path):
+        bm25 = BM25Index.build(CORPUS, categories)
+        bm25.save(str(tmp_path / "bm25"))
+
+        loaded = BM25Index.load(str(tmp_path / "bm25"))
+        assert isinstance(loaded.postings_docs, np.memmap)
+        for query in ["grpc golang", "prometheus", "后端 kafka"]:
+            expected_ids, expected_scores = bm25.search(query, top_k=3)
+            ids, scores = loaded.search(query, top_k=3)
+            assert ids.tolist() == expected_ids.tolist()
+            np.testing.assert_allclose(scores, expected_scores)
+
+    def test_no_matching_terms(self, categories):
+        bm25 = BM25Index.build(CORPUS, categories)
+        doc_ids, scores = bm25.search("cobol mainframe", top_k=3)
+        assert len(doc_ids) == 0 and len(scores) == 0
+
+
+class TestReciprocalRankFusion:
+    """Test RRF score fusion"""
+
+    def test_fuses_rankings(self):
+        fused = reciprocal_rank_fusion([[1, 2, 3], [3, 1]], k=60)
+        assert [doc_id for doc_id, _ in fused] == [1, 3, 2]
+        assert fused[0][1] == pytest.approx(1 / 61 + 1 / 62)
+
+
+class TestKnowledgeRetriever:
+    """Test hybrid BM25 + vector retrieval"""
+
+    def test_hybrid_retrieve(self, retriever):
+        section = SectionBase(name="experience", raw_text="Set up Istio for traffic routing")
+        results = retriever.retrieve(section, ["Istio"], ["SRE"], top_k=2)
+
+        # 向量检索单独只能把 Istio 片段排在第 3，BM25 的字面匹配将其召回
+        assert CORPUS[1] in results
+        assert set(retriever.last_latency) == {"encode", "vector", "bm25", "fuse"}
+
+    def test_category_filter_applies_to_both_retrievers(self, retriever):
+        section = SectionBase(name="experience", raw_text="Backend services and APIs")
+        hits = retriever.search(
+            section, [], [], top_k=5, categories=["databases_storage"]
+        )
+        assert {doc_id for doc_id, _ in hits} <= {2, 5}
+
+    @pytest.mark.slow
+    def test_bm25_latency_large_corpus(self, categories):
+        rng = np.random.default_rng(0)
+        vocabulary = [f"term{i}" for i in range(50000)] + ["grpc", "istio"]
+        texts = [
+            " ".join(vocabulary[i] for i in row)
+            for row in rng.integers(0, len(vocabulary), size=(200000, 20))
+        ]
+        bm25 = BM25Index.build(texts, categories)
+
+        start = time.perf_counter()
+        for _ in range(100):
+            bm25.search("istio grpc term42 term4242", top_k=50)
+        per_query_ms = (time.perf_counter() - start) * 10
+        print(f"BM25 query latency over {len(texts)} docs: {per_query_ms:.2f} ms")
+        assert per_query_ms < 50
+
+
+class CountingIndex:
+    """Wrap a FAISS index and count search calls."""
+
+    def __init__(self, index):
+        self.index = index
+        self.calls = 0
+
+    def search(self, *args, **kwargs):
+        self.calls += 1
+        return self.index.search(*args, **kwargs)
+
+
+class TestBatchedRetrieval:
+    """Test batched encoding, multi-query search and the query cache"""
+
+    SECTIONS = [
+        SectionBase(name=f"s{i}", raw_text=text)
+        for i, text in enumerate(
+            [
+                "Istio traffic routing",
+                "gRPC microservices in Golang",
+                "Flask APIs on PostgreSQL",
+                "Grafana dashboards",
+                "PyTorch NLP models",
+                "Redis 缓存与 Kafka",
+            ]
+        )
+    ]
+
+    def test_one_encode_and_one_search(self, retriever, monkeypatch):
+        calls = []
+        encode = retriever.model.encode
+        monkeypatch.setattr(
+            retriever.model,
+            "encode",
+            lambda texts, **kw: calls.append(len(texts)) or encode(texts, **kw),
+        )
+        retriever.index = CountingIndex(retriever.index)
+
+        results = retriever.retrieve_many(self.SECTIONS, ["Go"], ["Backend"], top_k=2)
+
+        assert calls == [6]
+        assert retriever.index.calls == 1
+        assert len(results) == 6
+
+    def test_matches_single_queries(self, retriever):
+        batched = retriever.retrieve_many(self.SECTIONS, ["Go"], ["Backend"], top_k=3)
+        single = [
+            retriever.retrieve(section, ["Go"], ["Backend"], top_k=3)
+            for section in self.SECTIONS
+        ]
+        assert batched == single
+
+    def test_query_embeddings_are_memoized(self, retriever, monkeypatch):
+        retriever.retrieve_many(self.SECTIONS[:3], [], [], top_k=2)
+
+        calls = []
+        encode = retriever.model.encode
+        monkeypatch.setattr(
+            retriever.model,
+            "encode",
+            lambda texts, **kw: calls.append(len(texts)) or encode(texts, **kw),
+        )
+        retriever.retrieve_many(self.SECTIONS, [], [], top_k=2)
+
+        assert calls == [3]
+
+    def test_query_cache_is_bounded(self, retriever):
+        retriever.query_cache_size = 2
+        retriever.retrieve_many(self.SECTIONS, [], [], top_k=2)
+        assert len(retriever._query_cache) == 2
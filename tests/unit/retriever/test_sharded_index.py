@@ -0,0 +1,201 @@
+import json
+import zlib
+
+import numpy as np
+import pytest
+from resumix.backend.retriever import knowledge_retriever
+from resumix.backend.retriever.bm25_index import tokenize
+from resumix.backend.retriever.knowledge_retriever import KnowledgeRetriever
+from resumix.backend.retriever.sharded_index import (
+    ShardedCorpus,
+    ShardedIndexBuilder,
+    TextStore,
+    read_manifest,
+)
+from resumix.shared.section.section_base import SectionBase
+
+
+KEYWORDS = {
+    "cloud_devops": ["Kubernetes", "Istio"],
+    "databases_storage": ["Redis", "PostgreSQL"],
+}
+
+
+class FakeModel:
+    """Deterministic bag-of-words embedding used in place of the encoder."""
+
+    def __init__(self, dim=32):
+        self.dim = dim
+        self.encoded = 0
+
+    def encode(self, texts, normalize_embeddings=True):
+        self.encoded += len(texts)
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in tokenize(text):
+                vectors[row, zlib.crc32(token.encode()) % self.dim] += 1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-9)
+
+
+def write_corpus(path, texts):
+    with open(path, "w", encoding="utf-8") as f:
+        for text in texts:
+            f.write(json.dumps({"text": text}, ensure_ascii=False) + "\n")
+
+
+TEXTS = [f"Snippet {i} about service number {i}" for i in range(10)] + [
+    "Operated Kubernetes clusters with Istio mesh",
+    "Cached hot keys in Redis — 延迟降低 80%",
+]
+
+
+@pytest.fixture
+def keywords_path(tmp_path):
+    path = tmp_path / "tech_keywords.json"
+    path.write_text(json.dumps(KEYWORDS), encoding="utf-8")
+    return str(path)
+
+
+def make_builder(tmp_path, keywords_path, model=None):
+    return ShardedIndexBuilder(
+        output_dir=str(tmp_path / "shards"),
+        model=model or FakeModel(),
+        shard_size=5,
+        batch_size=2,
+        tech_keywords_path=keywords_path,
+    )
+
+
+class TestTextStore:
+    """Test the offsets + blob text store"""
+
+    def test_round_trip(self, tmp_path):
+        texts = ["alpha", "", "多字节文本", "omega"]
+        TextStore.write(texts, tmp_path / "t.blob", tmp_path / "t.offsets.npy")
+
+        store = TextStore(str(tmp_path / "t.blob"), str(tmp_path / "t.offsets.npy"))
+        assert len(store) == 4
+        assert [store[i] for i in range(4)] == texts
+
+    def test_empty_blob(self, tmp_path):
+        TextStore.write([""], tmp_path / "t.blob", tmp_path / "t.offsets.npy")
+        store = TextStore(str(tmp_path / "t.blob"), str(tmp_path / "t.offsets.npy"))
+        assert store[0] == ""
+
+
+class TestShardedIndexBuilder:
+    """Test streaming, resumable shard builds"""
+
+    def test_builds_shards(self, tmp_path, keywords_path):
+        corpus = tmp_path / "corpus.jsonl"
+        write_corpus(corpus, TEXTS)
+
+        manifest = make_builder(tmp_path, keywords_path).build(str(corpus))
+
+        assert [s["num_docs"] for s in manifest["shards"]] == [5, 5, 2]
+        assert [s["start"] for s in manifest["shards"]] == [0, 5, 10]
+        corpus_view = ShardedCorpus(str(tmp_path / "shards"))
+        assert corpus_view.num_docs == len(TEXTS)
+        assert [corpus_view.text(i) for i in range(len(TEXTS))] == TEXTS
+
+    def test_rerun_resumes_without_reencoding(self, tmp_path, keywords_path):
+        corpus = tmp_path / "corpus.jsonl"
+        write_corpus(corpus, TEXTS)
+        make_builder(tmp_path, keywords_path).build(str(corpus))
+
+        model = FakeModel()
+        manifest = make_builder(tmp_path, keywords_path, model).build(str(corpus))
+
+        assert model.encoded == 0
+        assert len(manifest["shards"]) == 3
+
+    def test_resume_after_interrupted_shard(self, tmp_path, keywords_path):
+        corpus = tmp_path / "corpus.jsonl"
+        write_corpus(corpus, TEXTS)
+
+        class CrashingModel(FakeModel):
+            def encode(self, texts, normalize_embeddings=True):
+                if self.encoded >= 6:
+                    raise RuntimeError("killed")
+                return super().encode(texts, normalize_embeddings)
+
+        with pytest.raises(RuntimeError):
+            make_builder(tmp_path, keywords_path, CrashingModel()).build(str(corpus))
+        assert len(read_manifest(tmp_path / "shards")["shards"]) == 1
+
+        model = FakeModel()
+        make_builder(tmp_path, keywords_path, model).build(str(corpus))
+        corpus_view = ShardedCorpus(str(tmp_path / "shards"))
+
+        assert model.encoded == len(TEXTS) - 5
+        assert [corpus_view.text(i) for i in range(len(TEXTS))] == TEXTS
+
+    def test_append_new_source(self, tmp_path, keywords_path):
+        first = tmp_path / "first.jsonl"
+        second = tmp_path / "second.jsonl"
+        write_corpus(first, TEXTS[:5])
+        write_corpus(second, TEXTS[5:])
+
+        make_builder(tmp_path, keywords_path).build(str(first))
+        manifest = make_builder(tmp_path, keywords_path).build(str(second))
+
+        assert len(manifest["sources"]) == 2
+        corpus_view = ShardedCorpus(str(tmp_path / "shards"))
+        assert [corpus_view.text(i) for i in range(len(TEXTS))] == TEXTS
+
+    def test_skips_invalid_lines(self, tmp_path, keywords_path):
+        corpus = tmp_path / "corpus.jsonl"
+        corpus.write_text(
+            '{"text": "valid one"}\nnot json\n\n{"other": 1}\n{"text": "valid two"}\n',
+            encoding="utf-8",
+        )
+        manifest = make_builder(tmp_path, keywords_path).build(str(corpus))
+
+        assert sum(s["num_docs"] for s in manifest["shards"]) == 2
+        assert manifest["sources"][str(corpus.resolve())] == 5
+
+
+class TestShardedRetrieval:
+    """Test KnowledgeRetriever on top of lazily loaded shards"""
+
+    @pytest.fixture
+    def retriever(self, tmp_path, keywords_path, monkeypatch):
+        model = FakeModel()
+        corpus = tmp_path / "corpus.jsonl"
+        write_corpus(corpus, TEXTS)
+        make_builder(tmp_path, keywords_path, model).build(str(corpus))
+
+        monkeypatch.setattr(
+            knowledge_retriever.SentenceTransformerUtils,
+            "get_instance",
+            lambda *a: model,
+        )
+        return KnowledgeRetriever(
+            shard_dir=str(tmp_path / "shards"), candidate_k=5, rrf_k=60
+        )
+
+    def test_shards_load_lazily(self, retriever):
+        assert retriever.shards._loaded == {}
+        section = SectionBase(name="experience", raw_text="Istio service mesh")
+        results = retriever.retrieve(section, ["Istio"], [], top_k=3)
+
+        assert TEXTS[10] in results
+        assert len(retriever.shards._loaded) == 3
+
+    def test_category_filter_across_shards(self, retriever):
+        section = SectionBase(name="experience", raw_text="service with hot keys")
+        hits = retriever.search(section, [], [], top_k=5, categories=["databases_storage"])
+
+        assert [doc_id for doc_id, _ in hits] == [11]
+
+    def test_batched_retrieval_across_shards(self, retriever):
+        sections = [
+            SectionBase(name="a", raw_text="Istio service mesh"),
+            SectionBase(name="b", raw_text="hot keys in Redis"),
+        ]
+        batched = retriever.retrieve_many(sections, [], [], top_k=3)
+
+        assert batched == [
+            retriever.retrieve(section, [], [], top_k=3) for section in sections
+        ]
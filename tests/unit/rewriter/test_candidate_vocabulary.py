@@ -0,0 +1,134 @@
+import zlib
+
+import numpy as np
+import pytest
+from resumix.backend.rewriter.candidate_vocabulary import CandidateVocabulary, mmr
+
+
+class FakeModel:
+    """Deterministic bag-of-words encoder; counts encoded texts."""
+
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts, **kwargs):
+        single = isinstance(texts, str)
+        texts = [texts] if single else texts
+        self.encoded.extend(texts)
+        vectors = np.zeros((len(texts), 64), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in text.lower().split():
+                vectors[row, zlib.crc32(token.encode()) % 64] += 1.0
+        return vectors[0] if single else vectors
+
+
+def keybert_mmr(doc, words, top_n, diversity):
+    """Reference MMR as implemented by KeyBERT (full similarity matrices)."""
+    word_doc = words @ doc
+    word_word = words @ words.T
+    keywords = [int(np.argmax(word_doc))]
+    candidates = [i for i in range(len(words)) if i != keywords[0]]
+    for _ in range(min(top_n - 1, len(words) - 1)):
+        target = np.max(word_word[candidates][:, keywords], axis=1)
+        scores = (1 - diversity) * word_doc[candidates] - diversity * target
+        best = candidates[int(np.argmax(scores))]
+        keywords.append(best)
+        candidates.remove(best)
+    return keywords
+
+
+class TestMMR:
+    """Test the incremental MMR selection"""
+
+    @pytest.mark.parametrize("diversity", [0.0, 0.5, 0.9])
+    def test_matches_keybert_reference(self, diversity):
+        rng = np.random.default_rng(0)
+        words = rng.standard_normal((40, 16)).astype(np.float32)
+        words /= np.linalg.norm(words, axis=1, keepdims=True)
+        doc = words[:5].mean(axis=0)
+        doc /= np.linalg.norm(doc)
+
+        selected, scores = mmr(doc, words, 8, diversity)
+
+        assert selected.tolist() == keybert_mmr(doc, words, 8, diversity)
+        np.testing.assert_allclose(scores, words[selected] @ doc, rtol=1e-6)
+
+    def test_zero_diversity_ranks_by_relevance(self):
+        words = np.eye(4, dtype=np.float32)
+        doc = np.array([0.1, 0.7, 0.2, 0.0], dtype=np.float32)
+
+        selected, _ = mmr(doc, words, 3, diversity=0.0)
+
+        assert selected.tolist() == [1, 2, 0]
+
+    def test_empty(self):
+        selected, scores = mmr(np.ones(4, np.float32), np.empty((0, 4), np.float32), 5)
+        assert len(selected) == len(scores) == 0
+        assert len(mmr(np.ones(4, np.float32), np.eye(4, dtype=np.float32), 0)[0]) == 0
+
+
+class TestCandidateVocabulary:
+    """Test dictionary-mode extraction over cached phrase embeddings"""
+
+    def test_phrases_are_embedded_once(self):
+        model = FakeModel()
+        vocabulary = CandidateVocabulary(["Python", "Docker", "python", " "], model)
+        assert vocabulary.phrases == ["docker", "python"]
+        assert model.encoded == ["docker", "python"]
+        model.encoded.clear()
+
+        vocabulary.extract(["python and docker", "docker only"], top_n=2)
+        vocabulary.extract(["python"], top_n=2)
+
+        assert model.encoded == ["python and docker", "docker only", "python"]
+
+    def test_matches_whole_phrases_only(self):
+        vocabulary = CandidateVocabulary(
+            ["go", "c++", "ci/cd", "machine learning", "learning"], FakeModel()
+        )
+
+        found = vocabulary.matches("Google uses C++, CI/CD and machine learning.")
+
+        assert [vocabulary.phrases[row] for row in found] == [
+            "c++", "ci/cd", "learning", "machine learning"
+        ]
+
+    def test_extract_returns_present_candidates(self):
+        vocabulary = CandidateVocabulary(["python", "docker", "java"], FakeModel())
+
+        results = vocabulary.extract(["python docker services", "no match", "java"], top_n=5)
+
+        assert sorted(kw for kw, _ in results[0]) == ["docker", "python"]
+        assert results[1] == []
+        assert results[2] == [("java", 1.0)]
+
+    def test_key_ignores_order_and_case(self):
+        assert CandidateVocabulary.key(["B", "a"]) == CandidateVocabulary.key({"a", "b"})
+
+
+class TestKeywordExtractorCache:
+    """Test that KeywordExtractor reuses vocabularies"""
+
+    def test_batch_uses_cached_vocabulary(self):
+        keyword_extractor = pytest.importorskip("resumix.backend.rewriter.keyword_extractor")
+        extractor = object.__new__(keyword_extractor.KeywordExtractor)
+        model = FakeModel()
+        extractor.embedder = model
+        extractor._vocabularies = keyword_extractor.OrderedDict()
+        extractor._vocabulary_lock = keyword_extractor.threading.Lock()
+
+        first = extractor.extract_keywords_batch(
+            ["Python and Docker", "Java"], candidates=["Python", "Docker", "Java"], top_k=3
+        )
+        model.encoded.clear()
+        single = extractor.extract_keywords(
+            "Python and Docker",
+            candidates={"java", "docker", "python"},
+            dict_only=True,
+            custom_dict=["Docker"],
+        )
+
+        assert first[1] == [("java", 1.0)]
+        assert single == [("docker", dict(first[0])["docker"])]
+        assert model.encoded == ["python and docker"]
+        assert len(extractor._vocabularies) == 1
@@ -0,0 +1,134 @@
+import threading
+import time
+
+import pytest
+from resumix.backend.rewriter import resume_rewriter
+from resumix.backend.rewriter.resume_rewriter import ResumeRewriter
+from resumix.shared.section.section_base import SectionBase
+
+
+NAMES = ["personal_info", "education", "experience", "projects", "skills", "awards"]
+
+
+class SlowLLM:
+    """Fake LLM sleeping per call; fails or hangs on configured sections."""
+
+    def __init__(self, delay=0.2, fail=(), hang=()):
+        self.delay = delay
+        self.fail = fail
+        self.hang = hang
+        self.prompts = []
+        self.release = threading.Event()
+
+    def __call__(self, prompt):
+        self.prompts.append(prompt)
+        if any(f"raw {name}" in prompt for name in self.hang):
+            self.release.wait(5)
+        time.sleep(self.delay)
+        if any(f"raw {name}" in prompt for name in self.fail):
+            raise RuntimeError("LLM unavailable")
+        return f"  rewritten {prompt.count('raw')}  "
+
+
+@pytest.fixture(autouse=True)
+def no_retriever(monkeypatch):
+    monkeypatch.setattr(resume_rewriter, "KnowledgeRetriever", lambda: None)
+
+
+def make_sections():
+    return {name: SectionBase(name=name, raw_text=f"raw {name}") for name in NAMES}
+
+
+class TestRewriteAll:
+    """Test concurrent whole-resume rewriting"""
+
+    def test_latency_is_max_not_sum(self):
+        rewriter = ResumeRewriter(SlowLLM(delay=0.3), max_workers=6, section_timeout=5)
+
+        start = time.perf_counter()
+        result = rewriter.rewrite_all(make_sections())
+        elapsed = time.perf_counter() - start
+
+        assert elapsed < 0.3 * len(NAMES) / 2
+        assert list(result) == NAMES
+        assert all(s.rewritten_text == "rewritten 1" for s in result.values())
+
+    def test_partial_results_on_failure(self):
+        rewriter = ResumeRewriter(
+            SlowLLM(delay=0.01, fail=["skills"]), max_workers=3, section_timeout=5
+        )
+        result = rewriter.rewrite_all(make_sections())
+
+        assert list(result) == NAMES
+        assert result["skills"].rewritten_text is None
+        assert result["education"].rewritten_text == "rewritten 1"
+        assert set(rewriter.last_errors) == {"skills"}
+
+    def test_section_timeout(self):
+        llm = SlowLLM(delay=0.01, hang=["awards"])
+        rewriter = ResumeRewriter(llm, max_workers=6, section_timeout=0.3)
+        try:
+            start = time.perf_counter()
+            result = rewriter.rewrite_all(make_sections())
+            assert time.perf_counter() - start < 2
+        finally:
+            llm.release.set()
+
+        assert isinstance(rewriter.last_errors["awards"], TimeoutError)
+        assert result["projects"].rewritten_text == "rewritten 1"
+
+    def test_queued_sections_time_out_behind_hung_calls(self):
+        # Both workers hang, so the remaining sections never start
+        llm = SlowLLM(delay=0.01, hang=NAMES[:2])
+        rewriter = ResumeRewriter(llm, max_workers=2, section_timeout=0.3)
+        try:
+            start = time.perf_counter()
+            result = rewriter.rewrite_all(make_sections())
+            elapsed = time.perf_counter() - start
+        finally:
+            llm.release.set()
+
+        # Overall deadline: section_timeout x 3 waves
+        assert elapsed < 2
+        assert list(result) == NAMES
+        assert set(rewriter.last_errors) == set(NAMES)
+        assert all(isinstance(e, TimeoutError) for e in rewriter.last_errors.values())
+        assert all(s.rewritten_text is None for s in result.values())
+        assert len(llm.prompts) == 2
+
+    def test_late_result_is_discarded(self):
+        llm = SlowLLM(delay=0.01, hang=["awards"])
+        rewriter = ResumeRewriter(llm, max_workers=6, section_timeout=0.2)
+        sections = make_sections()
+        try:
+            result = rewriter.rewrite_all(sections)
+        finally:
+            llm.release.set()
+        # Let the abandoned worker finish after rewrite_all returned
+        time.sleep(0.2)
+
+        assert isinstance(rewriter.last_errors["awards"], TimeoutError)
+        assert result["awards"].rewritten_text is None
+        assert sections["awards"].rewritten_text is None
+
+    def test_progress_callback_in_completion_order(self):
+        events = []
+        rewriter = ResumeRewriter(
+            SlowLLM(delay=0.01, fail=["awards"]), max_workers=2, section_timeout=5
+        )
+        rewriter.rewrite_all(
+            make_sections(),
+            on_progress=lambda name, section, error: events.append((name, error)),
+        )
+
+        assert sorted(name for name, _ in events) == sorted(NAMES)
+        assert [name for name, error in events if error] == ["awards"]
+
+    def test_jd_text_reaches_prompt(self):
+        llm = SlowLLM(delay=0)
+        rewriter = ResumeRewriter(llm)
+        rewriter.rewrite_section(
+            SectionBase(name="skills", raw_text="raw skills"), "Needs Kubernetes"
+        )
+
+        assert "Needs Kubernetes" in llm.prompts[0]
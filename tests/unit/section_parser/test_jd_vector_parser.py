@@ -0,0 +1,56 @@
+import pytest
+
+jd_vector_parser = pytest.importorskip("resumix.backend.section_parser.jd_vector_parser")
+JDVectorParser = jd_vector_parser.JDVectorParser
+
+
+@pytest.fixture
+def parser(monkeypatch):
+    parser = object.__new__(JDVectorParser)
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("unavailable")
+
+    monkeypatch.setattr(parser, "parse_with_llm", fail, raising=False)
+    monkeypatch.setattr(parser, "detect_sections", fail, raising=False)
+    monkeypatch.setattr(
+        parser, "normalize_text", lambda text, keep_blank=True: text.splitlines(),
+        raising=False,
+    )
+    return parser
+
+
+class TestUnparsedFallback:
+    """Test that the parser's placeholder result is recognisable"""
+
+    def test_fallback_placeholder_is_unparsed(self, parser):
+        sections = parser.parse("Backend engineer\nPython, Go")
+
+        assert JDVectorParser.is_unparsed(sections)
+
+    def test_placeholder_is_not_stored(self, parser, monkeypatch):
+        stored = []
+
+        class Store:
+            def add_job_description(self, *args):
+                stored.append(args)
+                return True
+
+            def save_index(self):
+                return True
+
+        monkeypatch.setattr(JDVectorParser, "job_store", Store())
+
+        parser.parse_and_store("Backend engineer", job_id="job_1")
+
+        assert stored == []
+
+    def test_parsed_sections_are_not_unparsed(self):
+        sections = {
+            "overview": jd_vector_parser.SectionBase(
+                name="overview", raw_text="Backend engineer"
+            )
+        }
+
+        assert not JDVectorParser.is_unparsed(sections)
+        assert JDVectorParser.is_unparsed({})
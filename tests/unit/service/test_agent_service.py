@@ -0,0 +1,47 @@
+import pytest
+from resumix.shared.section.section_base import SectionBase
+
+agent_service = pytest.importorskip("resumix.backend.service.agent_service")
+
+
+class FakeRewriter:
+    """Records which rewrite entry point was used."""
+
+    def __init__(self):
+        self.calls = []
+
+    def rewrite_section_rag(self, section, tech_stacks, job_positions):
+        self.calls.append(("single", [section.name]))
+        return section
+
+    def rewrite_sections_rag(self, sections, tech_stacks, job_positions):
+        self.calls.append(("batch", [section.name for section in sections]))
+        return sections
+
+
+@pytest.fixture
+def service():
+    service = object.__new__(agent_service.AgentService)
+    service.rewriter = FakeRewriter()
+    return service
+
+
+class TestOptimizeResume:
+    """Test that AgentService batches multi-section rewrites"""
+
+    def test_sections_share_one_batched_call(self, service):
+        sections = [
+            SectionBase(name="skills", raw_text="python"),
+            SectionBase(name="projects", raw_text="resume parser"),
+        ]
+
+        result = service.optimize_resume(sections, ["python"], ["backend"])
+
+        assert result == sections
+        assert service.rewriter.calls == [("batch", ["skills", "projects"])]
+
+    def test_single_section(self, service):
+        section = SectionBase(name="skills", raw_text="python")
+
+        assert service.optimize_resume(section, ["python"], ["backend"]) is section
+        assert service.rewriter.calls == [("single", ["skills"])]
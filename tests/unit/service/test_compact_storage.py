@@ -0,0 +1,198 @@
+import zlib
+
+import numpy as np
+import pytest
+from resumix.backend.service.benchmark_embeddings import (
+    benchmark_prefilter,
+    benchmark_storage,
+    synthetic_embeddings,
+)
+from resumix.backend.service.fast_matching_service import FastMatchingService
+from resumix.backend.service.job_embedding_store import JobEmbeddingStore
+from resumix.backend.service.resume_embedding_store import ResumeEmbeddingStore
+from resumix.shared.utils import sentence_transformer_utils
+from resumix.shared.utils.sentence_transformer_utils import SentenceTransformerUtils
+
+
+class FakeModel:
+    """Deterministic bag-of-words encoder with the store's 384 dimensions."""
+
+    def encode(self, texts, convert_to_tensor=False, **kwargs):
+        single = isinstance(texts, str)
+        texts = [texts] if single else texts
+        vectors = np.zeros((len(texts), 384), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in text.lower().split():
+                vectors[row, zlib.crc32(token.encode()) % 384] += 1.0
+        return vectors[0] if single else vectors
+
+
+@pytest.fixture(autouse=True)
+def fake_model(monkeypatch):
+    monkeypatch.setattr(SentenceTransformerUtils, "_models", {})
+    monkeypatch.setattr(SentenceTransformerUtils, "_memory", {})
+    SentenceTransformerUtils.register(
+        sentence_transformer_utils.CONFIG.SENTENCE_TRANSFORMER.USE_MODEL, FakeModel()
+    )
+
+
+JOBS = [
+    ("python", "python backend developer django", {}),
+    ("java", "java spring microservices engineer", {}),
+    ("data", "data scientist python pandas statistics", {}),
+    ("frontend", "react typescript frontend developer", {}),
+]
+
+
+class TestCompactStores:
+    """Test stores backed by fp16 / sq8 vectors with a float32 side file"""
+
+    @pytest.mark.parametrize("storage", ["fp16", "sq8"])
+    def test_rescored_search_matches_flat(self, tmp_path, storage):
+        flat = JobEmbeddingStore(index_file=str(tmp_path / "flat.faiss"), storage="flat")
+        compact = JobEmbeddingStore(index_file=str(tmp_path / "compact.faiss"), storage=storage)
+        flat.add_job_descriptions(JOBS)
+        compact.add_job_descriptions(JOBS)
+
+        query = FakeModel().encode("python developer")
+        expected = flat.search_similar_jobs(query, k=3)
+        rescored = compact.search_similar_jobs(query, k=3, rescore=True)
+
+        assert [job_id for job_id, _ in rescored] == [job_id for job_id, _ in expected]
+        for (_, a), (_, b) in zip(rescored, expected):
+            assert a == pytest.approx(b, abs=1e-6)
+
+    def test_exact_side_file_round_trip(self, tmp_path):
+        index_file = str(tmp_path / "resumes.faiss")
+        store = ResumeEmbeddingStore(index_file=index_file, storage="sq8")
+        store.add_resume("r1", "python developer", {})
+        store.add_resume("r2", "java engineer", {})
+        assert store.save_index()
+        assert (tmp_path / "resumes.f32.npy").exists()
+
+        reloaded = ResumeEmbeddingStore(index_file=index_file)
+        stats = reloaded.get_index_stats()
+        assert stats["storage"] == "sq8"
+        assert stats["bytes_per_vector"] == 384
+        assert stats["exact_rescoring"]
+
+        expected = FakeModel().encode("java engineer")
+        np.testing.assert_allclose(
+            reloaded.get_resume_embedding("r2"), expected / np.linalg.norm(expected), rtol=1e-6
+        )
+
+    def test_out_of_sync_side_file_disables_rescoring(self, tmp_path):
+        index_file = str(tmp_path / "jobs.faiss")
+        store = JobEmbeddingStore(index_file=index_file, storage="fp16")
+        store.add_job_descriptions(JOBS)
+        store.save_index()
+        (tmp_path / "jobs.f32.npy").unlink()
+
+        reloaded = JobEmbeddingStore(index_file=index_file)
+        assert reloaded.exact is None
+        assert len(reloaded.search_similar_jobs(FakeModel().encode("python"), k=2, rescore=True)) == 2
+
+    def test_clear_removes_side_file(self, tmp_path):
+        store = JobEmbeddingStore(index_file=str(tmp_path / "jobs.faiss"), storage="sq8")
+        store.add_job_descriptions(JOBS)
+        store.save_index()
+
+        assert store.clear_index()
+        assert not (tmp_path / "jobs.f32.npy").exists()
+        assert store.add_job_description("new", "go developer", {})
+        assert len(store.exact) == 1
+
+
+RESUMES = [
+    ("r-python", "python developer django flask", {}),
+    ("r-java", "java spring engineer", {}),
+    ("r-data", "python pandas statistics data scientist", {}),
+    ("r-web", "react typescript frontend", {}),
+]
+
+
+class TestBinarySearchMode:
+    """Test the sign-code prefilter search mode of the resume store"""
+
+    @pytest.fixture
+    def resume_store(self, tmp_path):
+        store = ResumeEmbeddingStore(index_file=str(tmp_path / "resumes.faiss"))
+        for resume_id, text, sections in RESUMES:
+            store.add_resume(resume_id, text, sections)
+        return store
+
+    def test_binary_mode_matches_flat(self, resume_store):
+        query = FakeModel().encode("python developer")
+        flat = resume_store.search_similar_resumes(query, k=2)
+        binary = resume_store.search_similar_resumes(query, k=2, mode="binary")
+
+        assert [r for r, _ in binary] == [r for r, _ in flat]
+        for (_, a), (_, b) in zip(binary, flat):
+            assert a == pytest.approx(b, abs=1e-6)
+
+    def test_prefilter_follows_adds_and_persists(self, resume_store):
+        query = FakeModel().encode("golang kubernetes")
+        resume_store.search_similar_resumes(query, k=1, mode="binary")
+        resume_store.add_resume("r-go", "golang kubernetes", {})
+
+        assert resume_store.binary.ntotal == 5
+        assert resume_store.search_similar_resumes(query, k=1, mode="binary")[0][0] == "r-go"
+
+        resume_store.save_index()
+        reloaded = ResumeEmbeddingStore(index_file=str(resume_store.index_file))
+        assert reloaded.binary is not None and reloaded.binary.ntotal == 5
+
+    def test_removal_drops_stale_prefilter(self, resume_store):
+        resume_store.search_similar_resumes(FakeModel().encode("java"), k=1, mode="binary")
+        resume_store.save_index()
+        resume_store.remove_resume("r-java")
+        resume_store.save_index()
+
+        assert resume_store.binary is None
+        assert not (resume_store.index_file.with_name("resumes.binary.faiss")).exists()
+
+    def test_unknown_mode(self, resume_store):
+        with pytest.raises(ValueError, match="Unknown search mode"):
+            resume_store.search_similar_resumes(FakeModel().encode("java"), mode="lsh")
+
+    def test_find_best_candidates_search_mode(self, resume_store, tmp_path):
+        job_store = JobEmbeddingStore(index_file=str(tmp_path / "jobs.faiss"))
+        job_store.add_job_descriptions(JOBS)
+        service = FastMatchingService()
+        service.job_store = job_store
+        service.resume_store = resume_store
+
+        flat = service.find_best_candidates("python", k=2)
+        binary = service.find_best_candidates("python", k=2, search_mode="binary")
+
+        assert [c["resume_id"] for c in binary] == [c["resume_id"] for c in flat]
+        with pytest.raises(ValueError):
+            service.find_best_candidates("python", search_mode="hamming")
+
+
+class TestStorageBenchmark:
+    """Test the recall benchmark of the storage options"""
+
+    def test_compact_storage_keeps_recall(self):
+        vectors = synthetic_embeddings(2000, dim=128)
+        queries = vectors[:50]
+
+        results = {r.storage: r for r in benchmark_storage(vectors, queries, k=10)}
+
+        assert results["flat"].recall == 1.0
+        assert results["fp16"].compression == 2.0
+        assert results["sq8"].compression == 4.0
+        assert results["fp16"].recall > 0.98
+        assert results["sq8"].recall_rescored > 0.98
+
+    def test_prefilter_benchmark(self):
+        vectors = synthetic_embeddings(3000, dim=128)
+        queries = vectors[:20]
+
+        results = benchmark_prefilter(
+            vectors, queries, k=5, candidate_counts=(3000,), kinds=("flat",)
+        )
+
+        assert [r.mode for r in results] == ["flat", "binary-flat"]
+        assert results[1].recall == 1.0
+        assert all(r.qps > 0 for r in results)
@@ -0,0 +1,222 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from resumix.backend.service.jd_ingestion_pipeline import (
+    HostRateLimiter,
+    JDIngestionPipeline,
+    url_job_id,
+)
+from resumix.shared.utils.html_extractor import HtmlExtractor
+from resumix.shared.utils.http_fetcher import HttpResponse
+
+
+PARAGRAPH = (
+    "We are hiring a backend engineer to design distributed services, "
+    "own reliability of production systems, review code, mentor junior "
+    "engineers, and collaborate with product managers on roadmap planning "
+    "for our data platform across several regions and teams."
+)
+
+
+class FakeFetcher:
+    def __init__(self, fail=()):
+        self.calls = []
+        self.fail = set(fail)
+        self._lock = threading.Lock()
+
+    def fetch(self, url, timeout=None):
+        with self._lock:
+            self.calls.append(url)
+        if url in self.fail:
+            raise OSError("connection reset")
+        html = f"<html><body><article><p>{url}</p><p>{PARAGRAPH}</p></article></body></html>"
+        return HttpResponse(url=url, status_code=200, content=html.encode("utf-8"))
+
+
+class FakeSection:
+    def __init__(self, raw_text):
+        self.raw_text = raw_text
+        self.parsed_data = {"raw": raw_text}
+
+
+class FakeParser:
+    UNPARSED_TEXT = "unparsed"
+
+    def __init__(self, delay=0.0, unparsable=()):
+        self.delay = delay
+        self.unparsable = set(unparsable)
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def parse(self, text):
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.delay)
+        with self._lock:
+            self.in_flight -= 1
+        if any(url in text for url in self.unparsable):
+            return {"overview": FakeSection(self.UNPARSED_TEXT)}
+        return {"overview": FakeSection(text)}
+
+    @classmethod
+    def is_unparsed(cls, sections):
+        return not sections or any(
+            s.raw_text == cls.UNPARSED_TEXT for s in sections.values()
+        )
+
+    @staticmethod
+    def to_structured_data(sections):
+        return {
+            name: {"raw_text": s.raw_text, "parsed_data": s.parsed_data}
+            for name, s in sections.items()
+        }
+
+
+class FakeStore:
+    def __init__(self):
+        self.jobs = {}
+        self.batches = []
+        self.backfills = 0
+        self.saves = 0
+
+    def list_all_jobs(self):
+        return list(self.jobs)
+
+    def add_job_descriptions(self, jobs, batch_size=64):
+        self.batches.append(len(jobs))
+        for job_id, jd_text, structured_data in jobs:
+            self.jobs[job_id] = (jd_text, structured_data)
+        return len(jobs)
+
+    def backfill_sentences(self, batch_size=64):
+        self.backfills += 1
+        return 0
+
+    def save_index(self):
+        self.saves += 1
+        return True
+
+
+def make_pipeline(tmp_path, parser=None, store=None, fetcher=None):
+    return JDIngestionPipeline(
+        parser=parser or FakeParser(),
+        job_store=store or FakeStore(),
+        fetcher=fetcher or FakeFetcher(),
+        fetch_concurrency=4,
+        per_host_concurrency=2,
+        per_host_interval=0.0,
+        extract_workers=2,
+        llm_concurrency=2,
+        embed_batch_size=8,
+        embed_flush_interval=0.05,
+        queue_size=4,
+        journal_path=str(tmp_path / "journal.jsonl"),
+    )
+
+
+URLS = [f"https://jobs{i % 3}.example.com/posting/{i}" for i in range(12)]
+
+
+@pytest.fixture(autouse=True)
+def extractor(tmp_path, monkeypatch):
+    instance = HtmlExtractor(cache_dir=str(tmp_path / "extract_cache"))
+    monkeypatch.setattr(HtmlExtractor, "_instance", instance)
+    return instance
+
+
+class TestJDIngestionPipeline:
+    """Test the staged JD ingestion pipeline with in-process stand-ins"""
+
+    def test_ingests_all_urls(self, tmp_path):
+        store = FakeStore()
+        parser = FakeParser(delay=0.02)
+        stats = make_pipeline(tmp_path, parser=parser, store=store).run(
+            URLS + URLS[:2]
+        )
+
+        assert stats.submitted == len(URLS)
+        assert stats.embedded == len(URLS)
+        assert set(store.jobs) == {url_job_id(u) for u in URLS}
+        assert store.saves == 1
+        assert store.backfills == 1
+        assert 1 < parser.max_in_flight <= 2
+        assert sum(store.batches) == len(URLS)
+
+    def test_failed_fetch_does_not_stop_pipeline(self, tmp_path):
+        store = FakeStore()
+        fetcher = FakeFetcher(fail={URLS[0]})
+        stats = make_pipeline(tmp_path, store=store, fetcher=fetcher).run(URLS)
+
+        assert stats.failed == 1
+        assert stats.embedded == len(URLS) - 1
+        assert url_job_id(URLS[0]) not in store.jobs
+
+    def test_parser_fallback_counts_as_failed(self, tmp_path):
+        store = FakeStore()
+        parser = FakeParser(unparsable={URLS[0]})
+        stats = make_pipeline(tmp_path, parser=parser, store=store).run(URLS)
+
+        assert stats.failed == 1
+        assert stats.parsed == len(URLS) - 1
+        assert url_job_id(URLS[0]) not in store.jobs
+        assert url_job_id(URLS[0]) not in (tmp_path / "journal.jsonl").read_text()
+
+        # 重跑时重新解析该条，其余条目已入库被跳过
+        parser = FakeParser()
+        stats = make_pipeline(tmp_path, parser=parser, store=store).run(URLS)
+
+        assert stats.skipped == len(URLS) - 1
+        assert parser.calls == 1
+        assert url_job_id(URLS[0]) in store.jobs
+
+    def test_rerun_skips_stored_jobs(self, tmp_path):
+        store = FakeStore()
+        make_pipeline(tmp_path, store=store).run(URLS)
+
+        fetcher = FakeFetcher()
+        stats = make_pipeline(tmp_path, store=store, fetcher=fetcher).run(URLS)
+
+        assert stats.skipped == len(URLS)
+        assert fetcher.calls == []
+        assert store.saves == 1
+
+    def test_resume_from_journal_without_refetch(self, tmp_path):
+        # 第一次运行解析完成但索引未保存（模拟崩溃）
+        make_pipeline(tmp_path).run(URLS)
+
+        store = FakeStore()
+        fetcher = FakeFetcher()
+        parser = FakeParser()
+        stats = make_pipeline(
+            tmp_path, parser=parser, store=store, fetcher=fetcher
+        ).run(URLS)
+
+        assert stats.resumed == len(URLS)
+        assert fetcher.calls == []
+        assert parser.calls == 0
+        assert len(store.jobs) == len(URLS)
+
+
+class TestHostRateLimiter:
+    """Test per-host request spacing"""
+
+    def test_min_interval_per_host(self):
+        limiter = HostRateLimiter(concurrency=4, min_interval=0.05)
+        starts = []
+
+        async def hit(host):
+            async with limiter.limit(host):
+                starts.append((host, time.perf_counter()))
+
+        async def main():
+            await asyncio.gather(*(hit("a") for _ in range(3)), hit("b"))
+
+        asyncio.run(main())
+        a_times = sorted(t for h, t in starts if h == "a")
+        assert a_times[2] - a_times[0] >= 0.09
@@ -0,0 +1,162 @@
+import zlib
+
+import numpy as np
+import pytest
+from resumix.backend.service.job_embedding_store import JobEmbeddingStore, jd_sentences
+from resumix.backend.service.store_registry import StoreRegistry
+from resumix.shared.utils import sentence_transformer_utils
+from resumix.shared.utils.sentence_transformer_utils import SentenceTransformerUtils
+
+
+class FakeModel:
+    """Deterministic bag-of-words encoder with the store's 384 dimensions."""
+
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts, convert_to_tensor=False, **kwargs):
+        single = isinstance(texts, str)
+        texts = [texts] if single else texts
+        self.encoded.extend(texts)
+        vectors = np.zeros((len(texts), 384), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in text.lower().split():
+                vectors[row, zlib.crc32(token.encode()) % 384] += 1.0
+        return vectors[0] if single else vectors
+
+
+@pytest.fixture(autouse=True)
+def fake_model(monkeypatch):
+    monkeypatch.setattr(SentenceTransformerUtils, "_models", {})
+    monkeypatch.setattr(SentenceTransformerUtils, "_memory", {})
+    model = FakeModel()
+    SentenceTransformerUtils.register(
+        sentence_transformer_utils.CONFIG.SENTENCE_TRANSFORMER.USE_MODEL, model
+    )
+    return model
+
+
+JD = "Python backend developer\n\n  Docker and Kubernetes  \nGood communication"
+
+
+def expected_rows(sentences):
+    vectors = FakeModel().encode(sentences)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+class TestJobSentenceVectors:
+    """Test per-sentence JD embeddings cached at ingest time"""
+
+    def test_ingest_stores_sentence_matrix(self, tmp_path):
+        store = JobEmbeddingStore(index_file=str(tmp_path / "jobs.faiss"))
+        store.add_job_description("j1", JD, {})
+        store.add_job_descriptions([("j2", "java\nspring", {}), ("j3", "", {})])
+
+        sentences, matrix = store.get_job_sentences("j1")
+
+        assert sentences == jd_sentences(JD) == [
+            "Python backend developer", "Docker and Kubernetes", "Good communication"
+        ]
+        np.testing.assert_allclose(matrix, expected_rows(sentences), rtol=1e-6)
+        assert store.get_job_sentences("j2")[1].shape == (2, 384)
+        assert store.get_job_sentences("j3")[1].shape == (0, 384)
+        assert store.get_job_sentences("missing") is None
+
+    def test_sentences_are_memory_mapped_after_reload(self, tmp_path, fake_model):
+        store = JobEmbeddingStore(index_file=str(tmp_path / "jobs.faiss"))
+        store.add_job_descriptions([("j1", JD, {}), ("j2", "java\nspring", {})])
+        store.save_index()
+        fake_model.encoded.clear()
+
+        reloaded = JobEmbeddingStore(index_file=str(tmp_path / "jobs.faiss"))
+        _, matrix = reloaded.get_job_sentences("j2")
+
+        assert isinstance(reloaded.sentences.vectors._mapped, np.memmap)
+        np.testing.assert_allclose(matrix, expected_rows(["java", "spring"]), rtol=1e-6)
+        assert fake_model.encoded == []
+        assert reloaded.get_index_stats()["jd_sentence_vectors"] == 5
+
+    def test_backfills_stores_saved_without_sentences(self, tmp_path):
+        store = JobEmbeddingStore(index_file=str(tmp_path / "jobs.faiss"))
+        store.add_job_descriptions([("j1", JD, {}), ("j2", "java\nspring", {})])
+        store.save_index()
+        store.sentences.delete()
+
+        reloaded = JobEmbeddingStore(index_file=str(tmp_path / "jobs.faiss"))
+        assert reloaded.sentences is None
+
+        assert reloaded.backfill_sentences() == 5
+        sentences, matrix = reloaded.get_job_sentences("j1")
+        np.testing.assert_allclose(matrix, expected_rows(sentences), rtol=1e-6)
+        assert len(reloaded.sentences) == 2
+        assert reloaded.backfill_sentences() == 0
+
+    def test_encodes_only_requested_job_before_backfill(self, tmp_path, fake_model):
+        store = JobEmbeddingStore(index_file=str(tmp_path / "jobs.faiss"))
+        store.add_job_descriptions([("j1", JD, {}), ("j2", "java\nspring", {})])
+        store.save_index()
+        store.sentences.delete()
+        reloaded = JobEmbeddingStore(index_file=str(tmp_path / "jobs.faiss"))
+        fake_model.encoded.clear()
+
+        sentences, matrix = reloaded.get_job_sentences("j2")
+
+        assert fake_model.encoded == ["java", "spring"]
+        np.testing.assert_allclose(matrix, expected_rows(sentences), rtol=1e-6)
+        assert reloaded.sentences is None
+
+    def test_backfill_covers_jobs_added_meanwhile(self, tmp_path):
+        store = JobEmbeddingStore(index_file=str(tmp_path / "jobs.faiss"))
+        store.add_job_description("j1", JD, {})
+        store.save_index()
+        store.sentences.delete()
+        reloaded = JobEmbeddingStore(index_file=str(tmp_path / "jobs.faiss"))
+        encode = reloaded._encode
+
+        def add_during_encode(texts, **kwargs):
+            if "j2" not in reloaded.job_metadata:
+                reloaded.add_job_description("j2", "java\nspring", {})
+            return encode(texts, **kwargs)
+
+        reloaded._encode = add_during_encode
+        assert reloaded.backfill_sentences() == 5
+        np.testing.assert_allclose(
+            reloaded.get_job_sentences("j2")[1], expected_rows(["java", "spring"]), rtol=1e-6
+        )
+
+    def test_removal_and_clear(self, tmp_path):
+        store = JobEmbeddingStore(index_file=str(tmp_path / "jobs.faiss"))
+        store.add_job_descriptions([("j1", JD, {}), ("j2", "java\nspring", {})])
+        store.save_index()
+
+        store.remove_job("j1")
+        np.testing.assert_allclose(
+            store.get_job_sentences("j2")[1], expected_rows(["java", "spring"]), rtol=1e-6
+        )
+
+        store.clear_index()
+        assert not (tmp_path / "jobs.sentences.npy").exists()
+        assert not (tmp_path / "jobs.sentences.offsets.npy").exists()
+
+
+class TestFastKeywordPath:
+    """Test that the fast keyword path encodes only the resume"""
+
+    def test_extract_relevant_keywords_fast(self, tmp_path, monkeypatch, fake_model):
+        keyword_extractor = pytest.importorskip("resumix.backend.rewriter.keyword_extractor")
+        store = JobEmbeddingStore(index_file=str(tmp_path / "jobs.faiss"))
+        store.add_job_description("j1", JD, {})
+        monkeypatch.setattr(StoreRegistry, "job_store", classmethod(lambda cls: store))
+
+        extractor = object.__new__(keyword_extractor.KeywordExtractor)
+        extractor.embedder = fake_model
+        selected = []
+        monkeypatch.setattr(
+            extractor, "extract_keywords", lambda text, top_k=10: selected.append(text) or []
+        )
+        fake_model.encoded.clear()
+
+        extractor.extract_relevant_keywords_fast("j1", "kubernetes docker", top_k=1)
+
+        assert fake_model.encoded == ["kubernetes docker"]
+        assert selected == ["Docker and Kubernetes"]
@@ -0,0 +1,217 @@
+import zlib
+
+import numpy as np
+import pytest
+from resumix.backend.service.fast_matching_service import FastMatchingService
+from resumix.backend.service.resume_embedding_store import ResumeEmbeddingStore
+from resumix.backend.service.section_index import (
+    FULL_TEXT,
+    SectionIndex,
+    late_interaction_scores,
+    section_chunks,
+)
+from resumix.shared.utils import sentence_transformer_utils
+from resumix.shared.utils.sentence_transformer_utils import SentenceTransformerUtils
+
+
+class FakeModel:
+    """Deterministic bag-of-words encoder with the store's 384 dimensions."""
+
+    def encode(self, texts, convert_to_tensor=False, **kwargs):
+        single = isinstance(texts, str)
+        texts = [texts] if single else texts
+        vectors = np.zeros((len(texts), 384), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in text.lower().split():
+                vectors[row, zlib.crc32(token.encode()) % 384] += 1.0
+        return vectors[0] if single else vectors
+
+
+@pytest.fixture(autouse=True)
+def fake_model(monkeypatch):
+    monkeypatch.setattr(SentenceTransformerUtils, "_models", {})
+    monkeypatch.setattr(SentenceTransformerUtils, "_memory", {})
+    SentenceTransformerUtils.register(
+        sentence_transformer_utils.CONFIG.SENTENCE_TRANSFORMER.USE_MODEL, FakeModel()
+    )
+
+
+def unit(*vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+# A long resume whose one Kubernetes line drowns in its whole-text embedding
+FILLER = " ".join(f"word{i}" for i in range(60))
+RESUMES = [
+    (
+        "r-k8s",
+        {
+            "personal_info": "alice",
+            "experience": f"{FILLER}。kubernetes operator golang",
+            "skills": "golang kubernetes",
+        },
+    ),
+    ("r-java", {"experience": "java spring microservices", "skills": "java spring"}),
+    ("r-data", {"experience": "pandas statistics", "skills": "python pandas"}),
+]
+
+
+@pytest.fixture
+def resume_store(tmp_path):
+    store = ResumeEmbeddingStore(index_file=str(tmp_path / "resumes.faiss"))
+    for resume_id, sections in RESUMES:
+        store.add_resume(resume_id, "\n".join(sections.values()), sections)
+    return store
+
+
+class TestLateInteractionScores:
+    """Test the vectorized max-sim / weighted section scorer"""
+
+    def test_max_sim_takes_best_chunk_per_document(self):
+        chunks = unit([1, 0, 0], [0, 1, 0], [0, 0, 1], [1, 1, 0])
+        docs, scores = late_interaction_scores(unit([1, 0, 0]), chunks, [7, 7, 3, 3])
+
+        assert docs.tolist() == [7, 3]
+        np.testing.assert_allclose(scores, [1.0, 1 / np.sqrt(2)], rtol=1e-6)
+
+    def test_multi_vector_query_averages_max_sims(self):
+        chunks = unit([1, 0, 0], [0, 1, 0])
+        _, scores = late_interaction_scores(unit([1, 0, 0], [0, 1, 0]), chunks, [0, 0])
+
+        np.testing.assert_allclose(scores, [1.0], rtol=1e-6)
+
+    def test_weighted_fusion_normalizes_over_present_sections(self):
+        chunks = unit([1, 0, 0], [0, 1, 0], [1, 0, 0])
+        docs, scores = late_interaction_scores(
+            unit([1, 0, 0]),
+            chunks,
+            [0, 0, 1],
+            ["skills", "education", "skills"],
+            aggregation="weighted",
+            weights={"skills": 3.0, "education": 1.0},
+        )
+
+        assert docs.tolist() == [0, 1]
+        np.testing.assert_allclose(scores, [0.75, 1.0], rtol=1e-6)
+
+    def test_zero_weights_fall_back_to_max_sim(self):
+        _, scores = late_interaction_scores(
+            unit([1, 0, 0]),
+            unit([0, 1, 0], [1, 0, 0]),
+            [0, 0],
+            ["personal_info", "hobbies"],
+            aggregation="weighted",
+            weights={"personal_info": 0.0},
+        )
+
+        np.testing.assert_allclose(scores, [1.0], rtol=1e-6)
+
+    def test_unknown_aggregation(self):
+        with pytest.raises(ValueError, match="Unknown aggregation"):
+            late_interaction_scores(unit([1, 0]), unit([1, 0]), [0], aggregation="sum")
+
+
+class TestSectionChunks:
+    """Test splitting parsed sections into encoder-sized chunks"""
+
+    def test_chunks_respect_token_budget(self):
+        text = "。".join(f"sentence {i} with some words" for i in range(20))
+        chunks = section_chunks({"Experience": text}, chunk_tokens=16)
+
+        assert len(chunks) > 1
+        assert {name for name, _ in chunks} == {"experience"}
+
+    def test_falls_back_to_full_text(self):
+        assert section_chunks({"skills": ""}, "python developer") == [
+            (FULL_TEXT, "python developer")
+        ]
+
+    def test_accepts_nested_sections(self):
+        chunks = section_chunks({"skills": ["python", {"level": "expert"}]})
+
+        assert chunks == [("skills", "python\nexpert")]
+
+
+class TestSectionSearch:
+    """Test the section-level resume search of the store"""
+
+    def test_sections_mode_finds_buried_skill(self, resume_store):
+        query = FakeModel().encode("kubernetes operator golang")
+
+        results = resume_store.search_similar_resumes(query, k=2, mode="sections")
+
+        assert results[0][0] == "r-k8s"
+        assert results[0][1] > resume_store.search_similar_resumes(query, k=1)[0][1]
+
+    def test_multi_vector_query(self, resume_store):
+        queries = FakeModel().encode(["java spring", "microservices"])
+
+        results = resume_store.search_resumes_by_sections(queries, k=1, aggregation="max")
+
+        assert results[0][0] == "r-java"
+
+    def test_chunks_round_trip(self, resume_store):
+        chunks = resume_store.sections.ntotal
+        assert resume_store.save_index()
+
+        reloaded = ResumeEmbeddingStore(index_file=str(resume_store.index_file))
+
+        assert reloaded.sections is not None and reloaded.sections.ntotal == chunks
+        assert reloaded.get_index_stats()["section_chunks"] == chunks
+
+    def test_backfills_resumes_saved_without_chunks(self, resume_store):
+        for metadata in resume_store.resume_metadata.values():
+            del metadata["section_chunks"]
+        resume_store.save_index()
+
+        reloaded = ResumeEmbeddingStore(index_file=str(resume_store.index_file))
+        assert reloaded.sections is None
+
+        query = FakeModel().encode("python pandas")
+        assert reloaded.search_similar_resumes(query, k=1, mode="sections")[0][0] == "r-data"
+        assert reloaded.sections.documents() == {0, 1, 2}
+
+    def test_removal_reindexes_chunks(self, resume_store):
+        resume_store.remove_resume("r-k8s")
+
+        assert resume_store.sections.documents() == {0, 1}
+        query = FakeModel().encode("java spring")
+        assert resume_store.search_similar_resumes(query, k=1, mode="sections")[0][0] == "r-java"
+
+    def test_clear_removes_chunk_files(self, resume_store, tmp_path):
+        resume_store.save_index()
+        assert (tmp_path / "resumes.chunks.faiss").exists()
+
+        resume_store.clear_index()
+
+        assert not (tmp_path / "resumes.chunks.faiss").exists()
+        assert not (tmp_path / "resumes.chunks.pkl").exists()
+        assert resume_store.sections.ntotal == 0
+
+    def test_find_similar_candidates_by_sections(self, resume_store):
+        service = FastMatchingService()
+        service.resume_store = resume_store
+
+        candidates = service.find_similar_candidates(
+            "We need golang.\nKubernetes operator experience", k=1, search_mode="sections"
+        )
+
+        assert candidates[0]["resume_id"] == "r-k8s"
+        with pytest.raises(ValueError):
+            service.find_similar_candidates("golang", search_mode="colbert")
+
+
+class TestSectionIndexFile:
+    """Test persistence of a SectionIndex"""
+
+    def test_inconsistent_layout_is_ignored(self, tmp_path):
+        index = SectionIndex(3)
+        index.add(0, ["skills"], unit([1, 0, 0]))
+        index.save(tmp_path / "x.chunks.faiss")
+        index.owners.append(1)
+        index.sections.append("skills")
+        index.save(tmp_path / "y.chunks.faiss")
+
+        assert SectionIndex.load(tmp_path / "x.chunks.faiss", 3).ntotal == 1
+        assert SectionIndex.load(tmp_path / "y.chunks.faiss", 3) is None
@@ -0,0 +1,127 @@
+import zlib
+
+import numpy as np
+import pytest
+from resumix.backend.service.fast_matching_service import FastMatchingService
+from resumix.backend.service.job_embedding_store import JobEmbeddingStore
+from resumix.backend.service.resume_embedding_store import ResumeEmbeddingStore
+from resumix.shared.utils import sentence_transformer_utils
+from resumix.shared.utils.sentence_transformer_utils import SentenceTransformerUtils
+
+
+class FakeModel:
+    """Deterministic bag-of-words encoder with the store's 384 dimensions."""
+
+    def encode(self, texts, convert_to_tensor=False, **kwargs):
+        single = isinstance(texts, str)
+        texts = [texts] if single else texts
+        vectors = np.zeros((len(texts), 384), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in text.lower().split():
+                vectors[row, zlib.crc32(token.encode()) % 384] += 1.0
+        return vectors[0] if single else vectors
+
+
+class FakeCrossEncoder:
+    """Scores a pair by the resume's count of the word "senior"."""
+
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, pairs, batch_size=32, convert_to_numpy=True):
+        self.calls.append(list(pairs))
+        return np.array([resume.split().count("senior") for _, resume in pairs], dtype=np.float32)
+
+
+class FakeScoreService:
+    """Records the sections sent to the LLM."""
+
+    def __init__(self):
+        self.sections = []
+
+    def score_resume(self, resume_section, jd_section_basic, jd_section_preferred):
+        self.sections.append((resume_section.name, jd_section_basic.raw_text))
+        return {"score": 80}
+
+
+@pytest.fixture(autouse=True)
+def fake_model(monkeypatch):
+    monkeypatch.setattr(SentenceTransformerUtils, "_models", {})
+    monkeypatch.setattr(SentenceTransformerUtils, "_memory", {})
+    SentenceTransformerUtils.register(
+        sentence_transformer_utils.CONFIG.SENTENCE_TRANSFORMER.USE_MODEL, FakeModel()
+    )
+
+
+@pytest.fixture
+def service(tmp_path):
+    job_store = JobEmbeddingStore(index_file=str(tmp_path / "jobs.faiss"))
+    job_store.add_job_description(
+        "py",
+        "python backend developer",
+        {"requirements_basic": {"raw_text": "python backend", "parsed_data": {}}},
+    )
+    resume_store = ResumeEmbeddingStore(index_file=str(tmp_path / "resumes.faiss"))
+    resume_store.add_resume(
+        "r-junior", "python backend developer", {"skills": "python backend developer"}
+    )
+    resume_store.add_resume(
+        "r-senior",
+        "senior senior python engineer",
+        {"skills": "senior senior python engineer", "education": "bsc", "hobbies": "chess"},
+    )
+    resume_store.add_resume("r-java", "java engineer", {"skills": "java engineer"})
+
+    service = FastMatchingService()
+    service.job_store = job_store
+    service.resume_store = resume_store
+    service.cross_encoder = FakeCrossEncoder()
+    service.score_service = FakeScoreService()
+    return service
+
+
+class TestShortlistCandidates:
+    """Test the recall -> rerank -> LLM shortlist cascade"""
+
+    def test_rerank_reorders_recalled_candidates(self, service):
+        recalled = service.find_best_candidates("py", k=2)
+        result = service.shortlist_candidates("py", recall_k=2, rerank_k=2, llm_k=0)
+
+        assert recalled[0]["resume_id"] == "r-junior"
+        assert [c["resume_id"] for c in result["candidates"]] == ["r-senior", "r-junior"]
+        assert result["candidates"][0]["rerank_score"] == 2.0
+        assert len(service.cross_encoder.calls) == 1
+
+    def test_stage_budgets(self, service):
+        result = service.shortlist_candidates("py", recall_k=3, rerank_k=2, llm_k=1)
+
+        stages = {s["stage"]: s for s in result["stages"]}
+        assert [s["stage"] for s in result["stages"]] == ["recall", "rerank", "llm"]
+        assert (stages["recall"]["input"], stages["recall"]["output"]) == (3, 3)
+        assert (stages["rerank"]["input"], stages["rerank"]["output"]) == (2, 2)
+        assert stages["llm"]["output"] == 1
+        assert all(s["latency_ms"] >= 0 for s in result["stages"])
+        assert len(result["candidates"]) == 2
+
+    def test_llm_scores_only_finalists(self, service):
+        result = service.shortlist_candidates("py", recall_k=3, rerank_k=3, llm_k=1)
+
+        finalist, *others = result["candidates"]
+        assert finalist["resume_id"] == "r-senior"
+        # Sections without a score prompt are not sent to the LLM
+        assert set(finalist["llm_scores"]) == {"skills", "education"}
+        assert all("llm_scores" not in c for c in others)
+        assert result["llm_calls"] == 2
+        assert {jd for _, jd in service.score_service.sections} == {"python backend"}
+
+    def test_zero_rerank_keeps_vector_order(self, service):
+        result = service.shortlist_candidates("py", recall_k=3, rerank_k=0, llm_k=0)
+
+        assert [s["stage"] for s in result["stages"]] == ["recall"]
+        assert result["candidates"][0]["resume_id"] == "r-junior"
+        assert service.cross_encoder.calls == []
+
+    def test_unknown_job(self, service):
+        result = service.shortlist_candidates("missing")
+
+        assert result["candidates"] == [] and result["stages"] == []
@@ -0,0 +1,182 @@
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from resumix.backend.service.fast_matching_service import FastMatchingService
+from resumix.backend.service.job_embedding_store import JobEmbeddingStore
+from resumix.backend.service.resume_embedding_store import ResumeEmbeddingStore
+from resumix.backend.service.store_registry import StoreRegistry
+from resumix.shared.utils import sentence_transformer_utils
+from resumix.shared.utils.sentence_transformer_utils import SentenceTransformerUtils
+
+
+class FakeModel:
+    """Deterministic bag-of-words encoder with the store's 384 dimensions."""
+
+    def encode(self, texts, convert_to_tensor=False, **kwargs):
+        single = isinstance(texts, str)
+        texts = [texts] if single else texts
+        vectors = np.zeros((len(texts), 384), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in text.lower().split():
+                vectors[row, zlib.crc32(token.encode()) % 384] += 1.0
+        return vectors[0] if single else vectors
+
+
+@pytest.fixture(autouse=True)
+def isolated_registry(monkeypatch):
+    monkeypatch.setattr(SentenceTransformerUtils, "_models", {})
+    monkeypatch.setattr(SentenceTransformerUtils, "_memory", {})
+    SentenceTransformerUtils.register(
+        sentence_transformer_utils.CONFIG.SENTENCE_TRANSFORMER.USE_MODEL, FakeModel()
+    )
+    monkeypatch.setattr(StoreRegistry, "_stores", {})
+
+
+class TestStoreRegistry:
+    """Test the process-wide embedding store registry"""
+
+    def test_same_path_shares_one_instance(self, tmp_path, monkeypatch):
+        loads = []
+        load = JobEmbeddingStore._load_index
+        monkeypatch.setattr(
+            JobEmbeddingStore,
+            "_load_index",
+            lambda self: loads.append(self.index_file) or load(self),
+        )
+        index_file = str(tmp_path / "jobs.faiss")
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            stores = list(
+                pool.map(lambda _: StoreRegistry.job_store(index_file), range(16))
+            )
+
+        assert all(store is stores[0] for store in stores)
+        assert len(loads) == 1
+
+    def test_keyed_by_resolved_path_and_class(self, tmp_path):
+        a = StoreRegistry.job_store(str(tmp_path / "jobs.faiss"))
+        b = StoreRegistry.job_store(str(tmp_path / "sub" / ".." / "jobs.faiss"))
+        c = StoreRegistry.job_store(str(tmp_path / "other.faiss"))
+        d = StoreRegistry.get(ResumeEmbeddingStore, str(tmp_path / "jobs.faiss"))
+
+        assert a is b
+        assert a is not c
+        assert isinstance(d, ResumeEmbeddingStore)
+
+    def test_clear(self, tmp_path):
+        store = StoreRegistry.job_store(str(tmp_path / "jobs.faiss"))
+        StoreRegistry.clear()
+        assert StoreRegistry.job_store(str(tmp_path / "jobs.faiss")) is not store
+
+    def test_concurrent_writers_share_lock(self, tmp_path):
+        store = StoreRegistry.job_store(str(tmp_path / "jobs.faiss"))
+
+        def add(i):
+            return store.add_job_description(f"job{i}", f"python backend {i}", {})
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            assert all(pool.map(add, range(50)))
+
+        assert store.get_job_count() == 50
+        faiss_ids = sorted(m["faiss_index"] for m in store.job_metadata.values())
+        assert faiss_ids == list(range(50))
+
+    def test_concurrent_duplicate_ids_are_added_once(self, tmp_path):
+        store = StoreRegistry.job_store(str(tmp_path / "jobs.faiss"))
+
+        def add(_):
+            return store.add_job_description("job", "python backend\ndocker", {})
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            added = list(pool.map(add, range(16)))
+
+        assert added.count(True) == 1
+        assert store.get_job_count() == 1
+        assert len(store.sentences) == 1
+
+    def test_encode_runs_outside_lock(self, tmp_path):
+        job_store = StoreRegistry.job_store(str(tmp_path / "jobs.faiss"))
+        resume_store = StoreRegistry.get(
+            ResumeEmbeddingStore, str(tmp_path / "resumes.faiss")
+        )
+        held = []
+
+        class LockProbe(FakeModel):
+            def encode(self, texts, **kwargs):
+                held.append(job_store.lock._is_owned() or resume_store.lock._is_owned())
+                return super().encode(texts, **kwargs)
+
+        job_store.sentence_transformer = resume_store.sentence_transformer = LockProbe()
+        job_store.add_job_description("job1", "python backend", {})
+        job_store.add_job_descriptions([("job2", "go", {}), ("job1", "dup", {})])
+        resume_store.add_resume("r1", "python developer", {"skills": "python"})
+
+        assert held == [False, False, False]
+        assert job_store.get_job_count() == 2
+
+    def test_parse_and_store_encodes_outside_lock(self, tmp_path, monkeypatch):
+        jd_vector_parser = pytest.importorskip(
+            "resumix.backend.section_parser.jd_vector_parser"
+        )
+        store = StoreRegistry.job_store(str(tmp_path / "jobs.faiss"))
+        store.add_job_description("job0", "go backend", {})
+        encoding, release = threading.Event(), threading.Event()
+
+        class BlockingModel(FakeModel):
+            def encode(self, texts, **kwargs):
+                encoding.set()
+                release.wait(5)
+                return super().encode(texts, **kwargs)
+
+        store.sentence_transformer = BlockingModel()
+        parser = object.__new__(jd_vector_parser.JDVectorParser)
+        monkeypatch.setattr(
+            parser,
+            "parse",
+            lambda text: {"overview": jd_vector_parser.SectionBase(name="overview", raw_text=text)},
+            raising=False,
+        )
+        monkeypatch.setattr(jd_vector_parser.JDVectorParser, "job_store", store)
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            writer = pool.submit(parser.parse_and_store, "python backend", "job1")
+            assert encoding.wait(5)
+            # Readers are not blocked while the writer is encoding
+            reader = pool.submit(
+                lambda: (store.get_job_metadata("job0"), store.get_job_embedding("job0"))
+            )
+            metadata, embedding = reader.result(timeout=2)
+            release.set()
+            writer.result(timeout=5)
+
+        assert metadata["jd_text"] == "go backend"
+        assert embedding is not None
+        assert store.get_job_count() == 2
+
+
+class TestLazyStores:
+    """Test that services no longer load stores at construction"""
+
+    def test_fast_matching_service_loads_on_first_use(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(
+            StoreRegistry,
+            "job_store",
+            classmethod(
+                lambda cls: cls.get(JobEmbeddingStore, str(tmp_path / "jobs.faiss"))
+            ),
+        )
+        service = FastMatchingService()
+        assert StoreRegistry._stores == {}
+
+        assert service.job_store is StoreRegistry.job_store()
+        assert len(StoreRegistry._stores) == 1
+
+    def test_override_store(self, tmp_path):
+        service = FastMatchingService()
+        store = JobEmbeddingStore(index_file=str(tmp_path / "jobs.faiss"))
+        service.job_store = store
+        assert service.job_store is store
+        assert StoreRegistry._stores == {}
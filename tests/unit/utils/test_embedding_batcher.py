@@ -0,0 +1,98 @@
+import threading
+
+import numpy as np
+import pytest
+
+from resumix.shared.utils.embedding_batcher import EmbeddingBatcher
+
+
+class FakeModel:
+    """Embeds a text as [len(text), 1] and records every batch"""
+
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+        self.lock = threading.Lock()
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True):
+        with self.lock:
+            self.batches.append(list(texts))
+        if self.fail:
+            raise RuntimeError("encode failed")
+        return np.array([[len(t), 1.0] for t in texts], dtype=np.float32)
+
+
+class TestEmbeddingBatcher:
+    """Test coalescing of concurrent encode calls"""
+
+    def test_single_text(self):
+        batcher = EmbeddingBatcher(FakeModel(), max_latency_ms=1)
+        np.testing.assert_allclose(batcher.encode("abc"), [3.0, 1.0])
+
+    def test_list_keeps_order_and_normalizes(self):
+        batcher = EmbeddingBatcher(FakeModel(), max_latency_ms=1)
+        embeddings = batcher.encode(["a", "abcd"], normalize_embeddings=True)
+
+        assert embeddings.shape == (2, 2)
+        np.testing.assert_allclose(np.linalg.norm(embeddings, axis=1), [1.0, 1.0])
+        assert embeddings[1, 0] > embeddings[0, 0]
+
+    def test_concurrent_calls_share_batches(self):
+        model = FakeModel()
+        batcher = EmbeddingBatcher(model, max_batch_size=64, max_latency_ms=200)
+        barrier = threading.Barrier(16)
+        results = {}
+
+        def call(i):
+            barrier.wait()
+            results[i] = batcher.encode("x" * (i + 1))
+
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert all(results[i][0] == i + 1 for i in range(16))
+        assert len(model.batches) < 16
+        stats = batcher.stats()
+        assert stats["requests"] == 16
+        assert stats["batches"] == len(model.batches)
+        assert sum(stats["batch_size_histogram"].values()) == stats["batches"]
+
+    def test_max_batch_size(self):
+        model = FakeModel()
+        batcher = EmbeddingBatcher(model, max_batch_size=4, max_latency_ms=100)
+        futures = [batcher.submit(f"text {i}") for i in range(10)]
+        for future in futures:
+            future.result(timeout=5)
+
+        assert max(len(batch) for batch in model.batches) <= 4
+
+    def test_duplicates_encoded_once(self):
+        model = FakeModel()
+        batcher = EmbeddingBatcher(model, max_latency_ms=100)
+        futures = [batcher.submit("same") for _ in range(5)]
+        for future in futures:
+            np.testing.assert_allclose(future.result(timeout=5), [4.0, 1.0])
+
+        assert sum(len(batch) for batch in model.batches) < 5
+
+    def test_errors_reach_every_caller(self):
+        batcher = EmbeddingBatcher(FakeModel(fail=True), max_latency_ms=50)
+        futures = [batcher.submit(f"text {i}") for i in range(3)]
+        for future in futures:
+            with pytest.raises(RuntimeError, match="encode failed"):
+                future.result(timeout=5)
+
+    def test_disabled_encodes_in_caller(self):
+        model = FakeModel()
+        batcher = EmbeddingBatcher(model, enabled=False)
+        np.testing.assert_allclose(batcher.encode("ab"), [2.0, 1.0])
+
+        assert model.batches == [["ab"]]
+        assert batcher._worker is None
+
+    def test_histogram_buckets(self):
+        counts = EmbeddingBatcher._histogram({1: 2, 3: 1, 5: 4, 6: 1})
+        assert counts == {"1": 2, "2-3": 1, "4-7": 5}
@@ -0,0 +1,215 @@
+import faiss
+import numpy as np
+import pytest
+from resumix.shared.utils.faiss_utils import (
+    BinaryPrefilter,
+    ExactVectors,
+    SegmentedVectors,
+    binary_path,
+    bytes_per_vector,
+    exact_path,
+    index_storage,
+    new_index,
+    read_index_mmap,
+    rescore_exact,
+    sentences_path,
+    sign_codes,
+    to_writable,
+    write_index_atomic,
+)
+
+
+@pytest.fixture
+def index_path(tmp_path):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((1000, 32)).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    index = faiss.IndexFlatIP(32)
+    index.add(vectors)
+    path = tmp_path / "index.faiss"
+    faiss.write_index(index, str(path))
+    return path
+
+
+class TestFaissUtils:
+    """Test memory-mapped FAISS loading helpers"""
+
+    def test_mmap_matches_heap_search(self, index_path):
+        query = np.ones((1, 32), dtype=np.float32)
+        mapped = read_index_mmap(index_path)
+        loaded = faiss.read_index(str(index_path))
+
+        assert mapped.ntotal == loaded.ntotal
+        np.testing.assert_array_equal(mapped.search(query, 5)[1], loaded.search(query, 5)[1])
+
+    def test_to_writable_allows_add(self, index_path):
+        writable = to_writable(read_index_mmap(index_path))
+        writable.add(np.ones((1, 32), dtype=np.float32))
+        assert writable.ntotal == 1001
+
+    def test_atomic_write_keeps_mapped_view_valid(self, index_path):
+        mapped = read_index_mmap(index_path)
+        before = mapped.reconstruct(0)
+
+        replacement = faiss.IndexFlatIP(32)
+        replacement.add(np.zeros((3, 32), dtype=np.float32))
+        write_index_atomic(replacement, index_path)
+
+        np.testing.assert_array_equal(mapped.reconstruct(0), before)
+        assert read_index_mmap(index_path).ntotal == 3
+
+    def test_heap_read_when_mmap_disabled(self, index_path):
+        index = read_index_mmap(index_path, mmap=False)
+        index.add(np.ones((1, 32), dtype=np.float32))
+        assert index.ntotal == 1001
+
+    def test_binary_index(self, tmp_path):
+        index = faiss.IndexBinaryFlat(64)
+        index.add(np.arange(24, dtype=np.uint8).reshape(3, 8))
+        path = tmp_path / "binary.faiss"
+        write_index_atomic(index, path, binary=True)
+
+        mapped = read_index_mmap(path, binary=True)
+        writable = to_writable(mapped, binary=True)
+        writable.add(np.zeros((1, 8), dtype=np.uint8))
+        assert mapped.ntotal == 3 and writable.ntotal == 4
+
+
+class TestCompactStorage:
+    """Test float16 / 8-bit storage and exact float32 rescoring"""
+
+    @pytest.fixture
+    def vectors(self):
+        rng = np.random.default_rng(0)
+        vectors = rng.standard_normal((500, 64)).astype(np.float32)
+        faiss.normalize_L2(vectors)
+        return vectors
+
+    @pytest.mark.parametrize(
+        "storage, code_size", [("flat", 256), ("fp16", 128), ("sq8", 64)]
+    )
+    def test_new_index_storage(self, vectors, storage, code_size):
+        index = new_index(64, storage)
+        index.add(vectors)
+
+        assert index_storage(index) == storage
+        assert bytes_per_vector(index) == code_size
+        np.testing.assert_allclose(index.reconstruct(0), vectors[0], atol=0.01)
+
+    def test_unknown_storage(self):
+        with pytest.raises(ValueError, match="Unknown vector storage"):
+            new_index(64, "pq")
+
+    def test_storage_survives_mmap_reload(self, vectors, tmp_path):
+        index = new_index(64, "sq8")
+        index.add(vectors)
+        write_index_atomic(index, tmp_path / "sq8.faiss")
+
+        assert index_storage(read_index_mmap(tmp_path / "sq8.faiss")) == "sq8"
+
+    def test_exact_vectors_pending_and_saved_rows(self, vectors, tmp_path):
+        exact = ExactVectors(exact_path(tmp_path / "store.faiss"), 64)
+        exact.append(vectors[:300])
+        exact.save()
+        exact.append(vectors[300:])
+
+        assert exact.path.name == "store.f32.npy"
+        assert len(exact) == 500
+        np.testing.assert_array_equal(exact.rows([1, 299, 300, 499]), vectors[[1, 299, 300, 499]])
+
+        reopened = ExactVectors(exact.path, 64)
+        assert len(reopened) == 300
+        assert isinstance(reopened._mapped, np.memmap)
+
+    def test_rescore_restores_exact_order(self, vectors):
+        exact = ExactVectors("unsaved.f32.npy", 64)
+        exact.append(vectors)
+        query = vectors[7]
+
+        scores, ids = rescore_exact(query, [-1, 3, 7, 11], exact, k=2)
+
+        assert ids[0] == 7
+        assert scores[0] == pytest.approx(1.0)
+        assert len(ids) == 2
+
+
+class TestBinaryPrefilter:
+    """Test the sign-code Hamming prefilter"""
+
+    @pytest.fixture
+    def vectors(self):
+        rng = np.random.default_rng(0)
+        vectors = rng.standard_normal((2000, 64)).astype(np.float32)
+        faiss.normalize_L2(vectors)
+        return vectors
+
+    def test_sign_codes(self):
+        codes = sign_codes(np.array([[1, -1, 1, -1, 0, 0, 0, 2]], dtype=np.float32))
+        assert codes.dtype == np.uint8
+        assert codes.tolist() == [[0b10100001]]
+
+    @pytest.mark.parametrize("kind", ["flat", "hnsw"])
+    def test_search_finds_exact_neighbours(self, vectors, kind):
+        prefilter = BinaryPrefilter(64, kind=kind)
+        prefilter.add(vectors)
+        query = vectors[42]
+
+        scores, ids = prefilter.search(query, 5, 200, lambda ids: vectors[ids])
+
+        assert ids[0] == 42
+        assert scores[0] == pytest.approx(1.0)
+        assert list(scores) == sorted(scores, reverse=True)
+
+    def test_hnsw_returns_all_requested_candidates(self, vectors):
+        prefilter = BinaryPrefilter(64, kind="hnsw")
+        prefilter.add(vectors)
+        assert len(prefilter.candidates(vectors[0], 500)) == 500
+
+    def test_save_load_then_add(self, vectors, tmp_path):
+        prefilter = BinaryPrefilter(64)
+        prefilter.add(vectors[:100])
+        path = binary_path(tmp_path / "store.faiss")
+        prefilter.save(path)
+
+        loaded = BinaryPrefilter.load(path, 64)
+        loaded.add(vectors[100:110])
+
+        assert path.name == "store.binary.faiss"
+        assert loaded.ntotal == 110
+
+    def test_invalid_arguments(self):
+        with pytest.raises(ValueError, match="divisible by 8"):
+            BinaryPrefilter(60)
+        with pytest.raises(ValueError, match="Unknown binary index"):
+            BinaryPrefilter(64, kind="lsh")
+
+
+class TestSegmentedVectors:
+    """Test variable-length vector groups with an offsets table"""
+
+    def test_groups_round_trip(self, tmp_path):
+        path = sentences_path(tmp_path / "jobs.faiss")
+        groups = [np.full((3, 4), 1, np.float32), np.empty((0, 4), np.float32), np.full((2, 4), 2, np.float32)]
+        segmented = SegmentedVectors(path, 4)
+        for group in groups:
+            segmented.append(group)
+        segmented.save()
+
+        loaded = SegmentedVectors(path, 4)
+        loaded.append(np.full((1, 4), 3, np.float32))
+
+        assert path.name == "jobs.sentences.npy"
+        assert (tmp_path / "jobs.sentences.offsets.npy").exists()
+        assert len(loaded) == 4 and loaded.num_rows == 6 and loaded.consistent()
+        for i, group in enumerate(groups):
+            np.testing.assert_array_equal(loaded.group(i), group)
+        np.testing.assert_array_equal(loaded.group(3), np.full((1, 4), 3))
+
+    def test_delete(self, tmp_path):
+        segmented = SegmentedVectors(tmp_path / "x.sentences.npy", 4)
+        segmented.append(np.ones((2, 4), np.float32))
+        segmented.save()
+
+        segmented.delete()
+
+        assert list(tmp_path.iterdir()) == []
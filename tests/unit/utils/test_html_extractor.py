@@ -0,0 +1,97 @@
+import pytest
+from bs4 import BeautifulSoup
+from readability import Document
+from resumix.shared.utils.html_extractor import HtmlExtractor
+
+
+PAGE = """
+<html>
+  <head><title>Backend Engineer</title><style>p { color: red; }</style></head>
+  <body>
+    <header><nav><a href="/">Home</a> <a href="/jobs">Jobs</a></nav></header>
+    <div id="content">
+      <article>
+        <h1>Backend Engineer &amp; SRE</h1>
+        <p>We are hiring a backend engineer to design distributed services,
+        own reliability of production systems, review code and mentor junior
+        engineers across several regions.</p>
+        <section>
+          <h2>Responsibilities</h2>
+          <ul>
+            <li>Build <b>gRPC</b> APIs in Go and Python</li>
+            <li>Operate Kubernetes clusters with 99.9% uptime</li>
+            <li>Collaborate with product managers on roadmap planning</li>
+          </ul>
+        </section>
+        <!-- tracking comment -->
+        <script>window.tracking = true;</script>
+      </article>
+    </div>
+    <aside>Similar jobs</aside>
+    <footer>Copyright</footer>
+  </body>
+</html>
+"""
+
+
+def legacy_blocks(html):
+    """Previous BeautifulSoup implementation from JDVectorParser.fetch_text_from_url."""
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(
+        ["script", "style", "noscript", "footer", "header", "nav", "form", "meta", "aside"]
+    ):
+        tag.decompose()
+    tags = soup.find_all(["p", "li", "div", "section"])
+    return "\n".join(t.get_text(strip=True) for t in tags if t.get_text(strip=True))
+
+
+def legacy_readability(html):
+    """Previous readability + BeautifulSoup implementation from UrlFetcher.fetch."""
+    summary_html = Document(html).summary()
+    text = BeautifulSoup(summary_html, "html.parser").get_text(separator="\n", strip=True)
+    return text if text and len(text.split()) > 30 else ""
+
+
+@pytest.fixture
+def extractor(tmp_path):
+    return HtmlExtractor(cache_dir=str(tmp_path), memory_cache_size=4, min_words=30)
+
+
+class TestHtmlExtractor:
+    """Test the lxml based, memoized HTML extractor"""
+
+    def test_readability_matches_legacy(self, extractor):
+        text = extractor.extract(PAGE)
+        assert text
+        assert text == legacy_readability(PAGE)
+
+    def test_blocks_match_legacy(self, extractor):
+        assert extractor.extract_blocks(PAGE) == legacy_blocks(PAGE)
+
+    def test_short_content_rejected(self, extractor):
+        assert extractor.extract("<html><body><p>Too short</p></body></html>") == ""
+
+    def test_memoized_skips_extraction(self, extractor, monkeypatch):
+        first = extractor.extract(PAGE)
+
+        def fail(html):
+            raise AssertionError("extraction should be served from cache")
+
+        monkeypatch.setattr(extractor, "_extract_readability", fail)
+        assert extractor.extract(PAGE) == first
+        assert extractor.lookup(PAGE) == first
+        assert extractor.lookup(PAGE + " ") is None
+
+    def test_disk_cache_shared_between_instances(self, extractor, tmp_path):
+        first = extractor.extract(PAGE)
+
+        other = HtmlExtractor(cache_dir=str(tmp_path), memory_cache_size=4)
+        assert other.lookup(PAGE) == first
+
+    def test_modes_cached_separately(self, extractor):
+        assert extractor.extract_blocks(PAGE) != extractor.extract(PAGE)
+
+    def test_memory_lru_bounded(self, extractor):
+        for i in range(10):
+            extractor.extract_blocks(f"<p>posting {i}</p>")
+        assert len(extractor._memory) == 4
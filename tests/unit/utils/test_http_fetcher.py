@@ -0,0 +1,172 @@
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+from resumix.shared.utils.http_fetcher import HttpFetcher
+
+
+PAGES = {
+    "/etag": {
+        "body": "<html><body>Job description</body></html>".encode("utf-8"),
+        "headers": {"Content-Type": "text/html; charset=utf-8", "ETag": '"v1"'},
+    },
+    "/max-age": {
+        "body": b"<html><body>Fresh posting</body></html>",
+        "headers": {
+            "Content-Type": "text/html; charset=utf-8",
+            "Cache-Control": "max-age=600",
+        },
+    },
+    "/must-revalidate": {
+        "body": b"<html><body>Revalidated posting</body></html>",
+        "headers": {
+            "Content-Type": "text/html; charset=utf-8",
+            "Cache-Control": "max-age=600, must-revalidate",
+        },
+    },
+    "/gbk": {
+        "body": "<html><body>岗位职责：负责后端开发与系统设计，熟悉分布式系统。</body></html>".encode(
+            "gbk"
+        ),
+        "headers": {"Content-Type": "text/html; charset=gbk", "Cache-Control": "no-store"},
+    },
+    "/no-charset": {
+        "body": "<html><body>Résumé café naïve</body></html>".encode("utf-8"),
+        "headers": {"Content-Type": "text/html", "Cache-Control": "no-store"},
+    },
+    "/bad-charset": {
+        "body": "<html><body>Résumé café naïve</body></html>".encode("utf-8"),
+        "headers": {
+            "Content-Type": "text/html; charset=x-unknown-8",
+            "Cache-Control": "no-store",
+        },
+    },
+}
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    hits = {}
+
+    def do_GET(self):
+        StandInHandler.hits[self.path] = StandInHandler.hits.get(self.path, 0) + 1
+        page = PAGES.get(self.path)
+        if page is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        etag = page["headers"].get("ETag")
+        if etag and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        for name, value in page["headers"].items():
+            self.send_header(name, value)
+        if etag:
+            self.send_header("Cache-Control", "no-cache")
+        self.send_header("Content-Length", str(len(page["body"])))
+        self.end_headers()
+        self.wfile.write(page["body"])
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def stand_in_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+@pytest.fixture
+def fetcher(tmp_path):
+    StandInHandler.hits = {}
+    return HttpFetcher(
+        cache_dir=str(tmp_path),
+        pool_size=2,
+        timeout=5,
+        default_max_age=0,
+        chardet_sample_bytes=1024,
+        max_entries=2,
+    )
+
+
+class TestHttpFetcher:
+    """Test the cached HTTP fetcher against a local stand-in server"""
+
+    def test_max_age_served_without_network(self, fetcher, stand_in_server):
+        first = fetcher.fetch(stand_in_server + "/max-age")
+        second = fetcher.fetch(stand_in_server + "/max-age")
+
+        assert not first.from_cache
+        assert second.from_cache
+        assert second.text == first.text
+        assert StandInHandler.hits["/max-age"] == 1
+
+    def test_must_revalidate_served_while_fresh(self, fetcher, stand_in_server):
+        fetcher.fetch(stand_in_server + "/must-revalidate")
+        second = fetcher.fetch(stand_in_server + "/must-revalidate")
+
+        assert second.from_cache
+        assert StandInHandler.hits["/must-revalidate"] == 1
+
+    def test_cache_evicts_least_recently_used(self, fetcher, stand_in_server):
+        fetcher.fetch(stand_in_server + "/max-age")
+        fetcher.fetch(stand_in_server + "/must-revalidate")
+        os.utime(fetcher._meta_path(stand_in_server + "/max-age"), (50, 50))
+        os.utime(fetcher._meta_path(stand_in_server + "/must-revalidate"), (100, 100))
+
+        # A hit refreshes the entry, so the other one is evicted first
+        assert fetcher.fetch(stand_in_server + "/max-age").from_cache
+        fetcher.fetch(stand_in_server + "/etag")
+
+        assert len(list(fetcher.cache_dir.glob("*.json"))) == 2
+        assert len(list(fetcher.cache_dir.glob("*.body"))) == 2
+        assert fetcher.fetch(stand_in_server + "/max-age").from_cache
+        assert not fetcher.fetch(stand_in_server + "/must-revalidate").from_cache
+        assert StandInHandler.hits["/must-revalidate"] == 2
+
+    def test_etag_revalidation(self, fetcher, stand_in_server):
+        first = fetcher.fetch(stand_in_server + "/etag")
+        second = fetcher.fetch(stand_in_server + "/etag")
+
+        assert not first.from_cache
+        assert second.from_cache
+        assert second.text == "<html><body>Job description</body></html>"
+        assert StandInHandler.hits["/etag"] == 2
+
+    def test_charset_from_header(self, fetcher, stand_in_server):
+        response = fetcher.fetch(stand_in_server + "/gbk")
+
+        assert response.encoding == "gbk"
+        assert "岗位职责" in response.text
+
+    def test_no_store_not_cached(self, fetcher, stand_in_server):
+        fetcher.fetch(stand_in_server + "/gbk")
+        fetcher.fetch(stand_in_server + "/gbk")
+
+        assert StandInHandler.hits["/gbk"] == 2
+
+    def test_chardet_fallback(self, fetcher, stand_in_server):
+        response = fetcher.fetch(stand_in_server + "/no-charset")
+
+        assert "café" in response.text
+
+    def test_unknown_charset_falls_back_to_chardet(self, fetcher, stand_in_server):
+        response = fetcher.fetch(stand_in_server + "/bad-charset")
+
+        assert response.encoding != "x-unknown-8"
+        assert "café" in response.text
+
+    def test_http_error_raises(self, fetcher, stand_in_server):
+        with pytest.raises(requests.HTTPError):
+            fetcher.fetch(stand_in_server + "/missing")
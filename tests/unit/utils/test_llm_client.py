@@ -0,0 +1,80 @@
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from resumix.shared.utils import llm_client
+from resumix.shared.utils.llm_client import LLMClient
+
+
+class TestUsageStats:
+    """Test provider usage parsing and cache-hit accounting"""
+
+    def test_parse_deepseek_usage(self):
+        usage = {
+            "prompt_tokens": 1200,
+            "completion_tokens": 80,
+            "prompt_cache_hit_tokens": 1024,
+            "prompt_cache_miss_tokens": 176,
+        }
+        assert LLMClient.parse_usage(usage) == {
+            "prompt_tokens": 1200,
+            "cached_tokens": 1024,
+            "completion_tokens": 80,
+        }
+
+    def test_parse_openai_compatible_usage(self):
+        usage = {
+            "prompt_tokens": 900,
+            "completion_tokens": 50,
+            "prompt_tokens_details": {"cached_tokens": 512},
+        }
+        assert LLMClient.parse_usage(usage)["cached_tokens"] == 512
+
+    def test_parse_ollama_response(self):
+        response = {"response": "ok", "prompt_eval_count": 300, "eval_count": 40}
+        assert LLMClient.parse_usage(response) == {
+            "prompt_tokens": 300,
+            "cached_tokens": 0,
+            "completion_tokens": 40,
+        }
+
+    def test_missing_usage(self):
+        assert LLMClient.parse_usage(None) == {}
+        assert LLMClient.parse_usage({"response": "ok"}) == {}
+
+    def test_cache_hit_rate(self):
+        client = LLMClient()
+        before = client.get_usage_stats()
+        client._record_usage({"prompt_tokens": 100, "prompt_cache_hit_tokens": 60})
+        client._record_usage({"prompt_tokens": 100, "prompt_cache_hit_tokens": 100})
+        stats = client.get_usage_stats()
+
+        assert stats["calls"] == before["calls"] + 2
+        assert stats["cached_tokens"] - before["cached_tokens"] == 160
+        assert client.last_usage["cached_tokens"] == 100
+
+
+class TestLocalDriver:
+    """Test that the Ollama driver inherits the client's timeout"""
+
+    def test_driver_uses_client_timeout(self, monkeypatch):
+        created = []
+
+        class Driver:
+            def __init__(self, **kwargs):
+                created.append(kwargs)
+
+            def generate(self, prompt):
+                return {"response": "ok"}
+
+        monkeypatch.setattr(llm_client, "OllamaDriver", Driver)
+        client = object.__new__(LLMClient)
+        client.__dict__.update(
+            ollama=None, base_url="http://ollama", model_name="gemma3:4b", timeout=7
+        )
+        monkeypatch.setattr(client, "_record_usage", lambda data: None)
+
+        assert client._call_local_llm("hello") == "ok"
+        assert created == [
+            {"url": "http://ollama", "model": "gemma3:4b", "timeout": 7}
+        ]
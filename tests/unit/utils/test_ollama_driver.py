@@ -0,0 +1,140 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+from resumix.shared.utils.ollama_driver import GenerationStats, OllamaDriver
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+
+class FakeSession:
+    """Records payloads and tracks how many requests overlap."""
+
+    def __init__(self, delay=0.0, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.payloads = []
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def post(self, url, json=None, timeout=None):
+        if self.fail:
+            raise requests.ConnectionError("ollama down")
+        with self.lock:
+            self.payloads.append(json)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+        return FakeResponse(
+            {
+                "response": f"echo {json.get('prompt')}",
+                "prompt_eval_count": 200,
+                "prompt_eval_duration": 500_000_000,
+                "eval_count": 50,
+                "eval_duration": 2_000_000_000,
+                "load_duration": 3_000_000,
+                "total_duration": 2_600_000_000,
+            }
+        )
+
+
+def make_driver(session, **kwargs):
+    kwargs.setdefault("max_in_flight", 2)
+    return OllamaDriver(
+        url="http://ollama/api/generate",
+        model="gemma3:4b",
+        keep_alive="30m",
+        num_ctx=4096,
+        num_predict=256,
+        num_thread=0,
+        session=session,
+        **kwargs,
+    )
+
+
+class TestOllamaDriver:
+    """Test keep-alive payloads, request coalescing and throughput stats"""
+
+    def test_payload_pins_model_and_sets_options(self):
+        session = FakeSession()
+        data = make_driver(session).generate("hello", temperature=0.2)
+
+        assert data["response"] == "echo hello"
+        assert session.payloads[0] == {
+            "model": "gemma3:4b",
+            "prompt": "hello",
+            "stream": False,
+            "keep_alive": "30m",
+            "options": {"num_ctx": 4096, "num_predict": 256, "temperature": 0.2},
+        }
+
+    def test_in_flight_window_is_bounded(self):
+        session = FakeSession(delay=0.05)
+        driver = make_driver(session, max_in_flight=2)
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(driver.generate, [f"p{i}" for i in range(8)]))
+
+        assert len(session.payloads) == 8
+        assert session.max_active == 2
+
+    def test_waiting_for_a_slot_times_out(self):
+        session = FakeSession(delay=0.5)
+        driver = make_driver(session, max_in_flight=1, timeout=0.1)
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            futures = [pool.submit(driver.generate, p) for p in ("first", "second")]
+            errors = [f.exception() for f in futures]
+
+        assert sum(isinstance(e, requests.Timeout) for e in errors) == 1
+        assert len(session.payloads) == 1
+        assert driver._in_flight == {}
+
+    def test_identical_concurrent_prompts_share_one_request(self):
+        session = FakeSession(delay=0.1)
+        driver = make_driver(session, max_in_flight=4)
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(driver.generate, ["same"] * 4))
+
+        assert len(session.payloads) == 1
+        assert all(r["response"] == "echo same" for r in results)
+
+    def test_tokens_per_second(self):
+        driver = make_driver(FakeSession())
+        driver.generate("hello")
+
+        assert driver.last_stats.tokens_per_sec == pytest.approx(25.0)
+        assert driver.last_stats.prompt_tokens_per_sec == pytest.approx(400.0)
+        assert driver.last_stats.load_ms == pytest.approx(3.0)
+
+    def test_stats_without_counters(self):
+        assert GenerationStats.from_response({}).tokens_per_sec == 0.0
+
+    def test_warm(self):
+        session = FakeSession()
+        assert make_driver(session).warm()
+        assert "prompt" not in session.payloads[0]
+        assert session.payloads[0]["keep_alive"] == "30m"
+
+        assert not make_driver(FakeSession(fail=True)).warm()
+
+    def test_errors_propagate_and_clear_in_flight(self):
+        driver = make_driver(FakeSession(fail=True))
+        with pytest.raises(requests.ConnectionError):
+            driver.generate("hello")
+        assert driver._in_flight == {}
@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("onnxruntime")
+
+from resumix.shared.utils.onnx_encoder import OnnxEncoder, agreement_report
+
+
+class FakeTokenizer:
+    """Whitespace tokenizer returning padded numpy features"""
+
+    def __call__(self, texts, padding, truncation, max_length, return_tensors):
+        lengths = [min(len(t.split()), max_length) for t in texts]
+        width = max(lengths)
+        input_ids = np.zeros((len(texts), width), dtype=np.int64)
+        attention_mask = np.zeros((len(texts), width), dtype=np.int64)
+        for row, length in enumerate(lengths):
+            input_ids[row, :length] = np.arange(1, length + 1)
+            attention_mask[row, :length] = 1
+        return {"input_ids": input_ids, "attention_mask": attention_mask}
+
+
+class FakeSession:
+    """Hidden state of token i is [i, 1]; padding positions are large"""
+
+    def __init__(self):
+        self.calls = []
+
+    def run(self, outputs, inputs):
+        self.calls.append(inputs)
+        ids = inputs["input_ids"].astype(np.float32)
+        hidden = np.stack([ids, np.ones_like(ids)], axis=-1)
+        hidden[inputs["attention_mask"] == 0] = 100.0
+        return [hidden]
+
+
+def make_encoder(pooling="mean", normalize=False):
+    encoder = OnnxEncoder.__new__(OnnxEncoder)
+    encoder.session = FakeSession()
+    encoder.input_names = {"input_ids", "attention_mask"}
+    encoder.tokenizer = FakeTokenizer()
+    encoder.pooling = pooling
+    encoder.normalize = normalize
+    encoder.max_seq_length = 8
+    encoder._dim = 2
+    return encoder
+
+
+class TestOnnxEncoder:
+    """Test pooling and batching of the ONNX backend"""
+
+    def test_mean_pooling_ignores_padding(self):
+        embeddings = make_encoder().encode(["a b c", "a"])
+        np.testing.assert_allclose(embeddings, [[2.0, 1.0], [1.0, 1.0]])
+
+    def test_cls_pooling(self):
+        embeddings = make_encoder(pooling="cls").encode(["a b c"])
+        np.testing.assert_allclose(embeddings, [[1.0, 1.0]])
+
+    def test_single_text_and_normalization(self):
+        embedding = make_encoder().encode("a b c", normalize_embeddings=True)
+        assert embedding.shape == (2,)
+        assert np.linalg.norm(embedding) == pytest.approx(1.0)
+
+    def test_batches_keep_input_order(self):
+        encoder = make_encoder()
+        texts = ["a", "a b c d e", "a b c"]
+        embeddings = encoder.encode(texts, batch_size=2)
+
+        assert len(encoder.session.calls) == 2
+        np.testing.assert_allclose(embeddings[:, 0], [1.0, 3.0, 2.0])
+
+    def test_empty_input(self):
+        assert make_encoder().encode([]).shape == (0, 2)
+
+
+class TestAgreementReport:
+    """Test the cosine agreement against a reference encoder"""
+
+    def test_identical_encoders_agree(self):
+        encoder = make_encoder()
+        report = agreement_report(encoder, encoder, ["a b", "a b c"], repeats=1)
+        assert report.mean_cosine == pytest.approx(1.0)
+        assert report.min_cosine == pytest.approx(1.0)
+
+    def test_disagreement_is_reported(self):
+        report = agreement_report(
+            make_encoder(), make_encoder(pooling="cls"), ["a", "a b c d e"], repeats=1
+        )
+        assert report.min_cosine < 0.99
+        assert report.mean_cosine > report.min_cosine
@@ -1,80 +1,94 @@
 import pytest
 from unittest.mock import Mock, patch
 import numpy as np
-from resumix.shared.utils.sentence_transformer_utils import SentenceTransformerUtils
+from resumix.backend.service.job_embedding_store import JobEmbeddingStore
+from resumix.shared.utils.faiss_utils import IndexDimensionError
+from resumix.shared.utils.sentence_transformer_utils import (
+    SentenceTransformerUtils,
+    model_memory_bytes,
+)
+
+
+class FakeTensor:
+    def __init__(self, numel, element_size):
+        self._numel = numel
+        self._element_size = element_size
+
+    def numel(self):
+        return self._numel
+
+    def element_size(self):
+        return self._element_size
 
 
 class TestSentenceTransformerUtils:
-    """Test sentence transformer utility functions"""
+    """Test the per-model SentenceTransformer registry"""
     
     def setup_method(self):
-        """Reset singleton before each test"""
-        SentenceTransformerUtils._instance = None
+        """Reset the registry before each test"""
+        SentenceTransformerUtils.unload()
+    
+    def teardown_method(self):
+        SentenceTransformerUtils.unload()
     
     @pytest.fixture
-    def mock_sentence_transformer(self):
-        """Mock SentenceTransformer model"""
+    def mock_st(self):
+        """Mock SentenceTransformer class returning a new model per load"""
         with patch('resumix.shared.utils.sentence_transformer_utils.SentenceTransformer') as mock_st:
             with patch('resumix.shared.utils.sentence_transformer_utils.CONFIG') as mock_config:
                 # Mock config values
                 mock_config.SENTENCE_TRANSFORMER.USE_MODEL = "all-MiniLM-L6-v2"
                 mock_config.SENTENCE_TRANSFORMER.DIRECTORY = "/tmp/models"
+                mock_config.SENTENCE_TRANSFORMER.BACKEND = "torch"
                 
-                mock_model = Mock()
-                # Mock encode method to return proper embeddings
-                mock_model.encode.return_value = np.array([[0.1, 0.2, 0.3, 0.4]])
-                mock_st.return_value = mock_model
+                def load(path):
+                    model = Mock(name=f"model({path})")
+                    model.encode.return_value = np.array([[0.1, 0.2, 0.3, 0.4]])
+                    model.parameters.return_value = [FakeTensor(1000, 4)]
+                    model.buffers.return_value = [FakeTensor(10, 8)]
+                    return model
                 
-                yield mock_model
+                mock_st.side_effect = load
+                yield mock_st
 
-    def test_singleton_pattern(self, mock_sentence_transformer):
-        """Test that SentenceTransformerUtils follows singleton pattern"""
+    def test_same_model_is_shared(self, mock_st):
+        """Test that one model id maps to one instance"""
         instance1 = SentenceTransformerUtils.get_instance()
-        instance2 = SentenceTransformerUtils.get_instance()
+        instance2 = SentenceTransformerUtils.get_instance("all-MiniLM-L6-v2")
         
         assert instance1 is instance2
-        assert instance1 is not None
+        assert mock_st.call_count == 1
 
-    def test_get_instance_with_custom_model(self, mock_sentence_transformer):
-        """Test getting instance with custom model name"""
-        custom_model = "custom-model-name"
-        instance = SentenceTransformerUtils.get_instance(model_name=custom_model)
+    def test_default_model_loads_from_directory(self, mock_st):
+        """Test that the configured model is loaded from the local directory"""
+        SentenceTransformerUtils.get_instance()
+        mock_st.assert_called_once_with("/tmp/models")
+
+    def test_each_model_id_gets_its_own_model(self, mock_st):
+        """Test that callers asking for different models are not given the first one loaded"""
+        default = SentenceTransformerUtils.get_instance()
+        other = SentenceTransformerUtils.get_instance(model_name="custom-model-name")
         
-        assert instance is not None
-        # Verify SentenceTransformer was called
-        assert mock_sentence_transformer.encode is not None
+        assert default is not other
+        mock_st.assert_called_with("custom-model-name")
+
+    def test_explicit_model_path(self, mock_st):
+        """Test loading a model id from an explicit path"""
+        SentenceTransformerUtils.get_instance("custom", model_path="/opt/custom")
+        mock_st.assert_called_once_with("/opt/custom")
 
-    def test_encode_functionality(self, mock_sentence_transformer):
+    def test_encode_functionality(self, mock_st):
         """Test that the returned instance can encode text"""
         transformer = SentenceTransformerUtils.get_instance()
         
-        # Test encoding
         test_text = "This is a test sentence"
         embeddings = transformer.encode(test_text)
         
-        # Verify encode was called
-        mock_sentence_transformer.encode.assert_called_with(test_text)
-        assert embeddings is not None
-
-    def test_encode_multiple_sentences(self, mock_sentence_transformer):
-        """Test encoding multiple sentences"""
-        transformer = SentenceTransformerUtils.get_instance()
-        
-        # Mock return value for multiple sentences
-        mock_sentence_transformer.encode.return_value = np.array([
-            [0.1, 0.2, 0.3, 0.4],
-            [0.5, 0.6, 0.7, 0.8]
-        ])
-        
-        sentences = ["First sentence", "Second sentence"]
-        embeddings = transformer.encode(sentences)
-        
-        mock_sentence_transformer.encode.assert_called_with(sentences)
+        transformer.encode.assert_called_with(test_text)
         assert embeddings is not None
-        assert len(embeddings) == 2
 
-    def test_thread_safety(self, mock_sentence_transformer):
-        """Test that singleton is thread-safe"""
+    def test_thread_safety(self, mock_st):
+        """Test that concurrent first calls load the model once"""
         import threading
         import time
         
@@ -82,71 +96,117 @@ class TestSentenceTransformerUtils:
         
         def get_instance():
             time.sleep(0.01)  # Small delay to simulate concurrent access
-            instance = SentenceTransformerUtils.get_instance()
-            instances.append(instance)
+            instances.append(SentenceTransformerUtils.get_instance())
         
-        threads = []
-        for _ in range(10):
-            thread = threading.Thread(target=get_instance)
-            threads.append(thread)
+        threads = [threading.Thread(target=get_instance) for _ in range(10)]
+        for thread in threads:
             thread.start()
-        
         for thread in threads:
             thread.join()
         
-        # All instances should be the same object
-        first_instance = instances[0]
-        for instance in instances:
-            assert instance is first_instance
-
-    def test_error_handling_no_model_name_first_call(self):
-        """Test error handling when no model name provided on first call"""
-        # Reset singleton to test first call behavior
-        SentenceTransformerUtils._instance = None
-        
+        assert all(instance is instances[0] for instance in instances)
+        assert mock_st.call_count == 1
+
+    def test_error_handling_no_model_name(self):
+        """Test error handling when no model name is given or configured"""
         with patch('resumix.shared.utils.sentence_transformer_utils.CONFIG') as mock_config:
-            with patch('resumix.shared.utils.sentence_transformer_utils.SentenceTransformer') as mock_st:
-                # Set config to None to simulate missing model name
+            with patch('resumix.shared.utils.sentence_transformer_utils.SentenceTransformer'):
                 mock_config.SENTENCE_TRANSFORMER.USE_MODEL = None
                 mock_config.SENTENCE_TRANSFORMER.DIRECTORY = "/tmp/models"
                 
-                with pytest.raises(ValueError, match="首次调用必须提供 model_name"):
+                with pytest.raises(ValueError, match="必须提供 model_name"):
                     SentenceTransformerUtils.get_instance(model_name=None)
 
-    def test_config_integration(self, mock_sentence_transformer):
-        """Test that config values are used correctly"""
-        with patch('resumix.shared.utils.sentence_transformer_utils.CONFIG') as mock_config:
-            mock_config.SENTENCE_TRANSFORMER.USE_MODEL = "test-model"
-            mock_config.SENTENCE_TRANSFORMER.DIRECTORY = "/test/path"
-            
-            instance = SentenceTransformerUtils.get_instance()
-            
-            # Verify SentenceTransformer was initialized with correct path
-            assert instance is not None
-
-    def test_subsequent_calls_ignore_parameters(self, mock_sentence_transformer):
-        """Test that subsequent calls ignore model_name parameter"""
-        # First call with specific model
-        instance1 = SentenceTransformerUtils.get_instance(model_name="first-model")
-        
-        # Second call with different model should return same instance
-        instance2 = SentenceTransformerUtils.get_instance(model_name="second-model")
-        
-        assert instance1 is instance2
+    def test_memory_accounting(self, mock_st):
+        """Test that weight memory is tracked per loaded model"""
+        SentenceTransformerUtils.get_instance()
+        SentenceTransformerUtils.get_instance("other-model")
+        
+        assert SentenceTransformerUtils.memory_report() == {
+            "all-MiniLM-L6-v2": 4080,
+            "other-model": 4080,
+        }
+        
+        SentenceTransformerUtils.unload("other-model")
+        assert list(SentenceTransformerUtils.memory_report()) == ["all-MiniLM-L6-v2"]
 
-    def test_reset_singleton(self, mock_sentence_transformer):
-        """Test that singleton can be reset for testing"""
-        instance1 = SentenceTransformerUtils.get_instance()
-        
-        # Reset singleton
-        SentenceTransformerUtils._instance = None
+    def test_memory_of_non_torch_model(self):
+        """Test that models without parameters count as zero bytes"""
+        assert model_memory_bytes(object()) == 0
+
+    def test_onnx_backend_falls_back_to_torch(self, mock_st):
+        """Test that a missing onnxruntime falls back to the torch model"""
+        from resumix.shared.utils.sentence_transformer_utils import CONFIG
+
+        CONFIG.SENTENCE_TRANSFORMER.BACKEND = "onnx"
+        with patch.dict("sys.modules", {"resumix.shared.utils.onnx_encoder": None}):
+            SentenceTransformerUtils.get_instance()
+        mock_st.assert_called_once_with("/tmp/models")
+
+    def test_onnx_export_failure_falls_back_to_torch(self, mock_st):
+        """Test that an export or quantization error falls back to the torch model"""
+        from resumix.shared.utils.sentence_transformer_utils import CONFIG
+
+        CONFIG.SENTENCE_TRANSFORMER.BACKEND = "onnx"
+        onnx_module = Mock()
+        onnx_module.OnnxEncoder.from_pretrained.side_effect = RuntimeError("no onnx")
+        with patch.dict("sys.modules", {"resumix.shared.utils.onnx_encoder": onnx_module}):
+            SentenceTransformerUtils.get_instance()
+        mock_st.assert_called_once_with("/tmp/models")
+
+    def test_onnx_backend_loads_default_model(self, mock_st):
+        """Test that the onnx backend replaces only the configured model"""
+        from resumix.shared.utils.sentence_transformer_utils import CONFIG
+
+        CONFIG.SENTENCE_TRANSFORMER.BACKEND = "onnx"
+        onnx_module = Mock()
+        with patch.dict("sys.modules", {"resumix.shared.utils.onnx_encoder": onnx_module}):
+            default = SentenceTransformerUtils.get_instance()
+            SentenceTransformerUtils.get_instance("other-model")
+
+        assert default is onnx_module.OnnxEncoder.from_pretrained.return_value
+        onnx_module.OnnxEncoder.from_pretrained.assert_called_once_with("/tmp/models")
+        mock_st.assert_called_once_with("other-model")
+
+    def test_register(self):
+        """Test registering a prebuilt model"""
+        model = Mock()
+        SentenceTransformerUtils.register("prebuilt", model)
+        assert SentenceTransformerUtils.get_instance("prebuilt") is model
+
+
+class TestStoreDimensionValidation:
+    """Test that stores reject encoders and indexes of another dimension"""
+    
+    def setup_method(self):
+        SentenceTransformerUtils.unload()
+    
+    def teardown_method(self):
+        SentenceTransformerUtils.unload()
+    
+    def register_default(self, dim):
+        from resumix.shared.utils.sentence_transformer_utils import CONFIG
         
-        # Create a new mock for the second instance
-        with patch('resumix.shared.utils.sentence_transformer_utils.SentenceTransformer') as mock_st2:
-            mock_model2 = Mock()
-            mock_st2.return_value = mock_model2
-            
-            instance2 = SentenceTransformerUtils.get_instance()
-            
-            # Should be different instances after reset
-            assert instance1 is not instance2
\ No newline at end of file
+        model = Mock()
+        model.get_sentence_embedding_dimension.return_value = dim
+        SentenceTransformerUtils.register(CONFIG.SENTENCE_TRANSFORMER.USE_MODEL, model)
+
+    def test_model_dimension_mismatch(self, tmp_path):
+        self.register_default(768)
+        with pytest.raises(ValueError, match="768-dim"):
+            JobEmbeddingStore(index_file=str(tmp_path / "jobs.faiss"))
+
+    def test_index_dimension_mismatch(self, tmp_path):
+        import faiss
+        
+        self.register_default(384)
+        index_file = tmp_path / "jobs.faiss"
+        faiss.write_index(faiss.IndexFlatIP(768), str(index_file))
+        store = JobEmbeddingStore.__new__(JobEmbeddingStore)
+        store.embedding_dim = 384
+        store.index_file = index_file
+        store.metadata_file = tmp_path / "jobs_metadata.pkl"
+        store.metadata_file.write_bytes(b"")
+        
+        with pytest.raises(IndexDimensionError):
+            store._load_index()
@@ -0,0 +1,128 @@
+import zlib
+
+import numpy as np
+import pytest
+from resumix.backend.prompt import prompt_dispatcher
+from resumix.backend.prompt.prompt_dispatcher import PromptDispatcher
+from resumix.shared.section.section_base import SectionBase
+from resumix.shared.utils.token_budget import (
+    TokenBudget,
+    heuristic_tokens,
+    split_sentences,
+)
+
+
+class FakeModel:
+    """Bag-of-words encoder without a tokenizer, counting encoded texts."""
+
+    def __init__(self, dim=64):
+        self.dim = dim
+        self.encoded = 0
+
+    def encode(self, texts, normalize_embeddings=True):
+        self.encoded += len(texts)
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in text.lower().replace(".", " ").split():
+                vectors[row, zlib.crc32(token.encode()) % self.dim] += 1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-9)
+
+
+JD = "\n".join(
+    [
+        "We are a fast growing fintech company.",
+        "You will build Kubernetes operators in Go.",
+        "Our office has free snacks and a gym.",
+        "Experience with Kubernetes and Helm is required.",
+        "We offer flexible hours and remote days.",
+    ]
+)
+
+
+@pytest.fixture
+def budget():
+    return TokenBudget(model=FakeModel(), enabled=True, cache_size=2)
+
+
+class TestHelpers:
+    """Test token heuristics and sentence splitting"""
+
+    def test_heuristic_tokens(self):
+        assert heuristic_tokens("") == 0
+        assert heuristic_tokens("负责后端") == 4
+        assert heuristic_tokens("build go services") == 4
+
+    def test_split_sentences(self):
+        text = "熟悉 Redis。了解 Kafka！Node.js is a plus. Docker\n---\nHelm"
+        assert split_sentences(text) == [
+            "熟悉 Redis。",
+            "了解 Kafka！",
+            "Node.js is a plus.",
+            "Docker",
+            "Helm",
+        ]
+
+
+class TestTokenBudget:
+    """Test extractive JD compression"""
+
+    def test_under_budget_is_unchanged(self, budget):
+        result = budget.compress(JD, "Kubernetes", budget=1000)
+        assert result.text == JD
+        assert result.saved == 0
+        assert budget.model.encoded == 0
+
+    def test_keeps_relevant_sentences_in_order(self, budget):
+        result = budget.compress(JD, "Built Kubernetes operators with Helm", budget=20)
+
+        assert result.text.splitlines() == [
+            "You will build Kubernetes operators in Go.",
+            "Experience with Kubernetes and Helm is required.",
+        ]
+        assert result.tokens <= 20
+        assert result.saved == result.original_tokens - result.tokens > 0
+
+    def test_sentence_embeddings_are_cached(self, budget):
+        budget.compress(JD, "Kubernetes", budget=10)
+        encoded = budget.model.encoded
+        budget.compress(JD, "Go services", budget=10)
+
+        assert budget.model.encoded == encoded + 1
+
+    def test_disabled_only_estimates(self):
+        budget = TokenBudget(model=FakeModel(), enabled=False, cache_size=2)
+        result = budget.compress(JD, "Kubernetes", budget=10)
+        assert result.text == JD
+        assert result.original_tokens > 10
+
+
+class TestPromptBudget:
+    """Test that score and RAG prompts are fitted to the budget"""
+
+    @pytest.fixture(autouse=True)
+    def shared_budget(self, budget, monkeypatch):
+        monkeypatch.setattr(TokenBudget, "_instance", budget)
+        for key in ("JD_TOKENS", "JD_PREFERRED_TOKENS", "CONTEXT_TOKENS"):
+            monkeypatch.setattr(prompt_dispatcher.CONFIG.PROMPT_BUDGET, key, 20)
+
+    def test_score_prompt_compresses_jd(self):
+        section = SectionBase(name="projects", raw_text="Kubernetes operators")
+        basic = SectionBase(name="basic", raw_text=JD)
+        preferred = SectionBase(name="preferred", raw_text="Helm")
+
+        prompt = PromptDispatcher().get_score_prompt(
+            section, basic, preferred, layout="legacy"
+        )
+
+        assert "free snacks" not in prompt
+        assert "Kubernetes operators in Go" in prompt
+
+    def test_rag_prompt_compresses_context(self):
+        section = SectionBase(name="projects", raw_text="Kubernetes operators")
+        context = "\n---\n".join([JD, "Ran Kubernetes in production."])
+
+        prompt = PromptDispatcher().get_rag_prompt(section, ["Go"], ["SRE"], context)
+
+        assert "free snacks" not in prompt
+        assert "Ran Kubernetes in production." in prompt